@@ -1,14 +1,25 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import os
+from contextlib import contextmanager
 from datetime import date, datetime
-import matplotlib.pyplot as plt
 import altair as alt
-import numpy as np
-from gspread.exceptions import WorksheetNotFound
-from fpdf import FPDF         
-import io                     
+from magazyn import MagazynSheets, MagazynSQLite, MagazynZLustrem, MagazynZPamiecia, ZmianyRekordow, ARKUSZE, ARKUSZE_WYMAGANE
+from synchronizacja import scal_edycje, scal_kolumne, oblicz_zmiany
+from kolejka_zapisow import KolejkaZapisow
+from migawki import MagazynZMigawka, TylkoDoOdczytu, dostepne as migawki_dostepne
+from schemat import KOLUMNY_ARKUSZY, dekoduj, koduj, nadaj_id, pusta_ramka
+from miejsca import PlanMiejsc, uklad_po_zmianie, bez_stolu, dopisz_rekordy, rekordy_z_list, miejsca_z_imion, listy_stolow
+from rozsadzanie import rozsadz, wczytaj_grupy
+from wykresy import obraz_stolu, obraz_sali
+from eksport_pdf import generuj_pdf, czcionka_dostepna, WERSJA_PDF
+from pamiec_eksportow import PamiecEksportow, skrot_danych
+from budzet import PodsumowanieBudzetu, SymulatorScenariuszy
+from wspolne_dane import WspolneRamki
+from wyszukiwanie import IndeksNazwisk
+from import_gosci import importuj
+from eksport_danych import FORMATY, WERSJA_EKSPORTU, eksportuj
+from profil import profil, mierz
 
 # --- STYLIZACJA CSS ---
 def local_css():
@@ -22,8 +33,7 @@ def local_css():
         [data-testid="stDataEditor"] { border: 1px solid #444 !important; border-radius: 10px; background-color: #262730; }
         [data-testid="stMetricLabel"] { color: white !important; }
         [data-testid="stMetricValue"] { color: #4CAF50 !important; }
-        button[data-baseweb="tab"] { font-size: 18px !important; font-weight: 600 !important; }
-        button[data-baseweb="tab"][aria-selected="true"] { color: white !important; }
+        [data-testid="stButtonGroup"] button p { font-size: 18px !important; font-weight: 600 !important; }
     </style>
     """, unsafe_allow_html=True)
 
@@ -32,49 +42,168 @@ st.set_page_config(page_title="Menadżer Ślubny", page_icon="💍", layout="wid
 local_css()
 
 # ==========================================================
-# 1. NAJPIERW POŁĄCZENIE Z GOOGLE SHEETS
+# 1. NAJPIERW POŁĄCZENIE Z MAGAZYNEM DANYCH
 # ==========================================================
+# Tryb pracy wybieramy zmienną WESELE_MAGAZYN albo wpisem [magazyn] tryb = "..." w secrets:
+#   "sheets"         – tylko Google Sheets (domyślnie, gdy są dane logowania)
+#   "lokalny"        – tylko lokalny plik SQLite, działa bez sieci
+#   "lokalny+sheets" – SQLite jako główny magazyn, Google Sheets jako lustro
+# Zapisy do Google Sheets idą przez kolejkę w tle ([magazyn] kolejka = ścieżka pliku kolejki).
+# [magazyn] klucz_arkusza = "..." otwiera arkusz po kluczu z adresu URL, bez wyszukiwania po nazwie w Drive.
+# Brakujące zakładki zakładamy przy starcie razem z nagłówkami.
+# W trybie "sheets" ostatni stan zakładek zapisujemy w migawkach na dysku ([magazyn] migawki = katalog,
+# "" wyłącza): aplikacja startuje z migawek, a z Sheets łączy się w tle (patrz migawki.py).
+# Całość opakowujemy wspólną pamięcią podręczną zakładek (czas życia: [magazyn] ttl, w sekundach).
+def wczytaj_sekrety():
+    try:
+        return st.secrets.to_dict()
+    except Exception:
+        return {}
+
+# --- PROFIL PRZEBIEGU ---
+# Przełącznik "⏱ Profil" (na dole paska bocznego) włącza pomiary tej sesji; [profil] zawsze = true – wszystkich
+# przebiegów i wątków w tle. Przebieg kończymy i pokazujemy na samym końcu skryptu (patrz profil.py).
+profil.wszedzie = bool(wczytaj_sekrety().get("profil", {}).get("zawsze", False))
+profil.zacznij(st.session_state.get("profil", False))
+
 @st.cache_resource
-def pobierz_arkusze():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds_dict = dict(st.secrets["gcp_service_account"])
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
+def pobierz_magazyn():
+    sekrety = wczytaj_sekrety()
+    ttl = float(sekrety.get("magazyn", {}).get("ttl", 120))
+    baza, kolejka = utworz_magazyn(sekrety)
+    magazyn = MagazynZPamiecia(baza, ttl=ttl)
+    if isinstance(baza, MagazynZMigawka):
+        # Kolejka zapisów powstaje dopiero po połączeniu w tle; wtedy też pobieramy jednym zapytaniem wszystkie
+        # zakładki (nowa wersja tylko dla tych, które różnią się od migawek) – każda dostaje aktualną migawkę
+        def po_polaczeniu(kolejka):
+            kolejka.po_zapisie = kolejka.po_bledzie = magazyn.uniewaznij
+            magazyn.odswiez([nazwa for nazwa in ARKUSZE if kolejka.istnieje(nazwa)])
+        baza.uruchom(po_polaczeniu)
+        return magazyn
+    magazyn.kolejka = kolejka
+    if kolejka is not None and baza is kolejka:
+        # W trybie samego Sheets odświeżamy pamięć dopiero, gdy zapis faktycznie dotrze do arkusza
+        # albo zostanie odrzucony (wtedy zakładka wraca do stanu z arkusza)
+        kolejka.po_zapisie = kolejka.po_bledzie = magazyn.uniewaznij
+    return magazyn
+
+def utworz_magazyn(sekrety):
+    ustawienia = sekrety.get("magazyn", {})
+    domyslny_tryb = "sheets" if "gcp_service_account" in sekrety else "lokalny"
+    tryb = os.environ.get("WESELE_MAGAZYN") or ustawienia.get("tryb") or domyslny_tryb
+    sciezka = os.environ.get("WESELE_BAZA") or ustawienia.get("sciezka", "wesele.db")
+    sciezka_kolejki = ustawienia.get("kolejka", "kolejka_zapisow.db")
+
+    if tryb == "lokalny":
+        lokalny = MagazynSQLite(sciezka)
+        lokalny.zaloz_arkusze(KOLUMNY_ARKUSZY)
+        return lokalny, None
+
+    def polacz():
+        sheets = MagazynSheets(dict(sekrety["gcp_service_account"]), klucz=ustawienia.get("klucz_arkusza"))
+        try:
+            sheets.zaloz_arkusze(KOLUMNY_ARKUSZY)
+        except Exception:
+            pass    # np. brak uprawnień do edycji – brakujące zakładki zgłosimy niżej
+        return KolejkaZapisow(sheets, sciezka_kolejki)
 
+    katalog_migawek = ustawienia.get("migawki", "migawki")
     try:
-        sh = client.open("Wesele_Baza")
+        if tryb == "sheets" and katalog_migawek and migawki_dostepne():
+            return MagazynZMigawka(polacz, katalog_migawek), None
+        kolejka = polacz()
     except Exception:
         st.error("⚠️ Nie znaleziono arkusza 'Wesele_Baza'.")
         st.stop()
+    if tryb == "lokalny+sheets":
+        lokalny = MagazynSQLite(sciezka)
+        z_lustrem = MagazynZLustrem(lokalny, kolejka)
+        lokalny.zaloz_arkusze(KOLUMNY_ARKUSZY)
+        return z_lustrem, kolejka
+    return kolejka, kolejka
+
+magazyn = pobierz_magazyn()
+
+# --- TRYB TYLKO DO ODCZYTU (start z migawek, zanim połączymy się z Google Sheets) ---
+# Przyciski zapisu są wtedy wyłączone, a jednorazowe migracje (ID, zakładka Miejsca) czekają na połączenie.
+# Zapis, który mimo to dotrze do magazynu (przycisk narysowany chwilę wcześniej), kończy się ostrzeżeniem.
+TEKST_TYLKO_ODCZYT = "📴 Brak połączenia z Google Sheets – tryb tylko do odczytu, zmiany nie zostały zapisane."
+
+def tylko_do_odczytu():
+    return isinstance(magazyn.magazyn, MagazynZMigawka) and magazyn.magazyn.tylko_odczyt()
+
+@contextmanager
+def zapis_lub_ostrzezenie(w_callbacku=False):
+    # Przerywa resztę bloku po TylkoDoOdczytu; w callbacku komunikat pokaże dopiero fragment (patrz komunikat())
+    try:
+        yield
+    except TylkoDoOdczytu:
+        if w_callbacku:
+            komunikat(TEKST_TYLKO_ODCZYT, "warning")
+        else:
+            st.warning(TEKST_TYLKO_ODCZYT)
 
-    arkusze = {}
-    try: arkusze["Goscie"] = sh.worksheet("Goscie")
-    except WorksheetNotFound: st.stop()
-    
-    try: arkusze["Obsluga"] = sh.worksheet("Obsluga")
-    except WorksheetNotFound: st.stop()
-    
-    try: arkusze["Zadania"] = sh.worksheet("Zadania")
-    except WorksheetNotFound: arkusze["Zadania"] = None
-    
-    try: arkusze["Stoly"] = sh.worksheet("Stoly")
-    except WorksheetNotFound: arkusze["Stoly"] = None
-    
-    try: arkusze["Harmonogram"] = sh.worksheet("Harmonogram")
-    except WorksheetNotFound: arkusze["Harmonogram"] = None
-    
-    try: arkusze["Ustawienia"] = sh.worksheet("Ustawienia")
-    except WorksheetNotFound: arkusze["Ustawienia"] = None
-    
-    return arkusze
+# Wygenerowane pliki (PDF, CSV) są wspólne dla wszystkich sesji; [eksport] katalog = "..." włącza też kopię na dysku
+@st.cache_resource
+def pobierz_pamiec_eksportow():
+    ustawienia = wczytaj_sekrety().get("eksport", {})
+    return PamiecEksportow(
+        maks_bajtow=int(ustawienia.get("maks_mb", 64)) * 1024 * 1024,
+        katalog=ustawienia.get("katalog"),
+    )
 
-arkusze = pobierz_arkusze()
-worksheet_goscie  = arkusze["Goscie"]
-worksheet_obsluga = arkusze["Obsluga"]
-worksheet_zadania = arkusze["Zadania"]
-worksheet_stoly   = arkusze["Stoly"]
-worksheet_harmonogram = arkusze.get("Harmonogram")
-worksheet_ustawienia = arkusze.get("Ustawienia") # <-- TERAZ ZMIENNA ISTNIEJE
+pamiec_eksportow = pobierz_pamiec_eksportow()
+
+# Jedna zdekodowana ramka na zakładkę, wspólna dla wszystkich sesji (patrz wspolne_dane.py)
+@st.cache_resource
+def pobierz_wspolne_ramki():
+    return WspolneRamki(magazyn)
+
+wspolne_ramki = pobierz_wspolne_ramki()
+
+# Indeks wyszukiwania po imieniu i nazwisku (wyszukiwarka gości, podpowiedzi przy miejscach), wspólny dla sesji
+@st.cache_resource
+def pobierz_indeks_gosci():
+    return IndeksNazwisk()
+
+indeks_gosci = pobierz_indeks_gosci()
+
+BRAKUJACE_ZAKLADKI = {
+    "Goscie": "⚠️ Brak zakładki 'Goscie'. Utwórz ją z nagłówkami: Imie_Nazwisko, Imie_Osoby_Tow, RSVP, Zaproszenie_Wyslane.",
+    "Obsluga": "⚠️ Brak zakładki 'Obsluga'. Utwórz ją z nagłówkami: Kategoria, Rola, Informacje, Koszt, Czy_Oplacone, Zaliczka, Czy_Zaliczka_Oplacona.",
+    "Zadania": "⚠️ Brak zakładki 'Zadania' – lista zadań nie będzie działać.",
+    "Stoly": "⚠️ Brak zakładki 'Stoly' – plan stołów nie będzie działać.",
+    "Harmonogram": "⚠️ Brak zakładki 'Harmonogram' – harmonogram dnia nie będzie dostępny.",
+    "Ustawienia": "⚠️ Brak zakładki 'Ustawienia' – data ślubu nie będzie trwale zapisywana.",
+    "Miejsca": "⚠️ Brak zakładki 'Miejsca' (nagłówki: Stol, Miejsce, Gosc_ID) – układ stołów zapisujemy w kolumnie Goscie_Lista.",
+}
+for nazwa, komunikat in BRAKUJACE_ZAKLADKI.items():
+    if not magazyn.istnieje(nazwa):
+        if nazwa in ARKUSZE_WYMAGANE:
+            st.error(komunikat)
+            st.stop()
+        st.warning(komunikat)
+
+# --- SEKCJE APLIKACJI ---
+# Przy każdym przebiegu skryptu wykonujemy tylko kod widocznej sekcji; każda sekcja wymienia zakładki,
+# których potrzebuje, i tylko te są wczytywane (pozostałe – dopiero gdy użytkownik do nich przejdzie).
+SEKCJE = {
+    "👥 Lista Gości": ["Goscie"],
+    "🎧 Organizacja": ["Obsluga", "Goscie"],
+    "✅ Lista Zadań": ["Zadania"],
+    "🍽️ Rozplanowanie Stołów": ["Goscie", "Stoly", "Miejsca"],
+    "⏰ Harmonogram Dnia": ["Harmonogram"],
+    "🍽️ Diety": ["Goscie"],
+}
+SEKCJA_STARTOWA = "👥 Lista Gości"
+
+# --- WSTĘPNE WCZYTANIE ZAKŁADEK (jedno zapytanie) ---
+# Zakładki, których nie ma jeszcze we wspólnej pamięci magazynu, pobieramy jedną paczką;
+# funkcje load_* i data ślubu czytają potem już z pamięci.
+def pobierz_surowe(nazwy):
+    magazyn.pobierz_wiele([n for n in dict.fromkeys(nazwy) if magazyn.istnieje(n)])
+
+pobierz_surowe(["Ustawienia"] + SEKCJE[st.session_state.get("sekcja") or SEKCJA_STARTOWA])
 
 
 # ==========================================================
@@ -82,9 +211,9 @@ worksheet_ustawienia = arkusze.get("Ustawienia") # <-- TERAZ ZMIENNA ISTNIEJE
 # ==========================================================
 def pobierz_date_z_arkusza():
     domyslna = date(2027, 7, 13)
-    if worksheet_ustawienia is not None:
+    if magazyn.istnieje("Ustawienia"):
         try:
-            data_str = worksheet_ustawienia.acell('A2').value
+            data_str = magazyn.pobierz_komorke("Ustawienia", 2, 1)
             if data_str:
                 return datetime.strptime(data_str, "%Y-%m-%d").date()
         except Exception as e:
@@ -101,17 +230,19 @@ if "data_slubu" not in st.session_state:
 # --- SIDEBAR Z DATĄ ŚLUBU ---
 with st.sidebar:
     st.header("⚙️ Ustawienia")
-    nowa_data = st.date_input("Wybierz datę ślubu", value=st.session_state["data_slubu"])
+    nowa_data = st.date_input("Wybierz datę ślubu", value=st.session_state["data_slubu"], disabled=tylko_do_odczytu())
     
     if nowa_data != st.session_state["data_slubu"]:
         st.session_state["data_slubu"] = nowa_data
         
-        # Zapis do Google Sheets
-        if worksheet_ustawienia is not None:
+        # Zapis do magazynu danych
+        if magazyn.istnieje("Ustawienia"):
             try:
                 # Używamy konkretnego adresu komórki 'A2'
-                worksheet_ustawienia.update_acell('A2', nowa_data.strftime("%Y-%m-%d"))
+                magazyn.aktualizuj_komorke("Ustawienia", 2, 1, nowa_data.strftime("%Y-%m-%d"))
                 st.success("✅ Data ślubu została trwale zapisana!")
+            except TylkoDoOdczytu:
+                st.warning(TEKST_TYLKO_ODCZYT)
             except Exception as e:
                 # Jeśli coś pójdzie nie tak, błąd zostanie na ekranie
                 st.error(f"Błąd zapisu daty do arkusza: {e}")
@@ -121,6 +252,29 @@ with st.sidebar:
         
     st.caption(f"Obecna data: {st.session_state['data_slubu'].strftime('%d.%m.%Y')}")
 
+    if getattr(magazyn, "blad_lustra", None):
+        st.warning(f"⚠️ Lustro Google Sheets nie nadąża: {magazyn.blad_lustra}")
+
+    if getattr(magazyn, "tylko_odczyt", None):
+        czas_migawki = datetime.fromtimestamp(magazyn.czas_migawki() or 0).strftime("%d.%m %H:%M")
+        if magazyn.tylko_odczyt() and magazyn.blad:
+            st.warning(f"📴 Brak połączenia z Google Sheets ({magazyn.blad}) – tryb tylko do odczytu, dane z {czas_migawki}.")
+        elif magazyn.tylko_odczyt():
+            st.info(f"⏳ Łączę z Google Sheets – do tego czasu dane z migawki z {czas_migawki}.")
+        elif magazyn.blad:
+            st.warning(f"📴 Google Sheets nie odpowiada ({magazyn.blad}) – pokazuję dane z migawki.")
+
+    kolejka = magazyn.kolejka
+    if kolejka is not None:
+        czasy = ", ".join(f"{krok} {czas * 1000:.0f} ms" for krok, czas in kolejka.magazyn.czasy_startu.items())
+        st.caption(f"🔌 Połączenie z Google Sheets: {czasy}")
+        st.caption(f"📤 Zapisy oczekujące na wysłanie: {kolejka.glebokosc()}")
+        if kolejka.nieudane():
+            st.error(f"⛔ Nieudane zapisy: {kolejka.nieudane()} – nie trafiły do Google Sheets, dane pokazują stan arkusza."
+                     + (f" Ostatni błąd: {kolejka.blad_trwaly}" if kolejka.blad_trwaly else ""))
+        if kolejka.ostatni_blad:
+            st.warning(f"⚠️ Ponawiam zapis do Google Sheets: {kolejka.ostatni_blad}")
+
 
 # --- LICZNIK (wyświetlany pod tytułem) ---
 st.title("💍 Menadżer Ślubny")
@@ -133,379 +287,370 @@ else:
     st.success("🎉 Wesele już było! Czas na miesiąc miodowy!")
     
     
-# --- STAŁE KOLUMN ---
-KOLUMNY_GOSCIE = ["Imie_Nazwisko", "Imie_Osoby_Tow", "RSVP", "Zaproszenie_Wyslane", "Dieta"]
-KOLUMNY_OBSLUGA  = ["Kategoria", "Rola", "Informacje", "Koszt", "Czy_Oplacone", "Zaliczka", "Czy_Zaliczka_Oplacona"]
-KOLUMNY_ZADANIA  = ["Zadanie", "Termin", "Czy_Zrobione"]
-KOLUMNY_STOLY    = ["Numer", "Ksztalt", "Liczba_Miejsc", "Goscie_Lista"]
-KOLUMNY_HARMONOGRAM = ["Godzina", "Czynność", "Uwagi"]
-
-# --- POŁĄCZENIE Z GOOGLE SHEETS I CACHE'OWANIE ARKUSZY ---
-@st.cache_resource
-def pobierz_arkusze():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds_dict = dict(st.secrets["gcp_service_account"])
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    client = gspread.authorize(creds)
+# --- FUNKCJE POMOCNICZE ---
+def pobierz_dane(nazwa):
+    # Wspólna, już zdekodowana ramka zakładki. Zapamiętujemy jej wersję – po niej poznamy, że inna sesja
+    # coś zapisała. Starsze arkusze najpierw dostają kolumnę ID (jednorazowo, jednym zapisem; bez połączenia – później).
+    if not tylko_do_odczytu():
+        magazyn.uzupelnij_id(nazwa)
+    wersja, df = wspolne_ramki.pobierz(nazwa)
+    st.session_state.setdefault("wersje_ramek", {})[nazwa] = wersja
+    return df
 
-    try:
-        sh = client.open("Wesele_Baza")
-    except Exception:
-        st.error("⚠️ Nie znaleziono arkusza 'Wesele_Baza'.")
-        st.stop()
+def zapisz_nowe_wiersze(nazwa, wiersze):
+    # Wiersze z formularzy w kolejności kolumn z schemat.py
+    return zapisz_nowa_ramke(nazwa, pd.DataFrame(wiersze, columns=KOLUMNY_ARKUSZY[nazwa][:len(wiersze[0])]))
 
-    arkusze = {}
-    try:
-        arkusze["Goscie"] = sh.worksheet("Goscie")
-    except WorksheetNotFound:
-        st.error("⚠️ Brak zakładki 'Goscie'. Utwórz ją z nagłówkami: Imie_Nazwisko, Imie_Osoby_Tow, RSVP, Zaproszenie_Wyslane.")
-        st.stop()
-    try:
-        arkusze["Obsluga"] = sh.worksheet("Obsluga")
-    except WorksheetNotFound:
-        st.error("⚠️ Brak zakładki 'Obsluga'. Utwórz ją z nagłówkami: Kategoria, Rola, Informacje, Koszt, Czy_Oplacone, Zaliczka, Czy_Zaliczka_Oplacona.")
-        st.stop()
-    try:
-        arkusze["Zadania"] = sh.worksheet("Zadania")
-    except WorksheetNotFound:
-        arkusze["Zadania"] = None
-        st.warning("⚠️ Brak zakładki 'Zadania' – lista zadań nie będzie działać.")
-    try:
-        arkusze["Stoly"] = sh.worksheet("Stoly")
-    except WorksheetNotFound:
-        arkusze["Stoly"] = None
-        st.warning("⚠️ Brak zakładki 'Stoly' – plan stołów nie będzie działać.")
-    try:
-        arkusze["Harmonogram"] = sh.worksheet("Harmonogram")
-    except WorksheetNotFound:
-        arkusze["Harmonogram"] = None
-        st.warning("⚠️ Brak zakładki 'Harmonogram' – harmonogram dnia nie będzie dostępny.")
-    try:
-        arkusze["Ustawienia"] = sh.worksheet("Ustawienia")
-    except WorksheetNotFound:
-        arkusze["Ustawienia"] = None
-        st.warning("⚠️ Brak zakładki 'Ustawienia' – data ślubu nie będzie trwale zapisywana.")
-    return arkusze
-
-arkusze = pobierz_arkusze()
-worksheet_goscie  = arkusze["Goscie"]
-worksheet_obsluga = arkusze["Obsluga"]
-worksheet_zadania = arkusze["Zadania"]
-worksheet_stoly   = arkusze["Stoly"]
-worksheet_harmonogram = arkusze.get("Harmonogram")
-worksheet_ustawienia = arkusze.get("Ustawienia")
+def zapisz_nowa_ramke(nazwa, df):
+    # Nowe rekordy dostają ID i trafiają do arkusza jedną paczką; zwracamy je jako ramkę do dopisania w sesji
+    df = nadaj_id(df)
+    magazyn.zapisz_rekordy(nazwa, ZmianyRekordow(dopisane=koduj(nazwa, df).to_dict("records")))
+    return df
 
-# --- FUNKCJE POMOCNICZE ---
-def pobierz_dane(_worksheet):
-    return pd.DataFrame(_worksheet.get_all_records())
+def dopisz_w_sesji(klucz_stanu, df):
+    st.session_state[klucz_stanu] = pd.concat([st.session_state[klucz_stanu], df], ignore_index=True)
 
-def zapisz_nowy_wiersz(worksheet, lista_wartosci):
-    worksheet.append_row(lista_wartosci)
-    st.cache_data.clear()
+def aktualizuj_caly_arkusz(nazwa, df):
+    magazyn.nadpisz(nazwa, [df.columns.values.tolist()] + df.values.tolist())
+
+def synchronizuj_arkusz(nazwa, klucz_stanu, nowy_stan):
+    # Wysyła do arkusza tylko różnice względem stanu sesji (jedno batch_update, wiersze wyszukane po ID);
+    # gdy arkusz nie ma którejś z kolumn, przepisujemy go w całości
+    stan = st.session_state[klucz_stanu]
+    nowy_stan = nadaj_id(nowy_stan)
+    nowe = koduj(nazwa, nowy_stan)
+    if magazyn.indeks(nazwa).ma_kolumny(nowe.columns):
+        magazyn.zapisz_rekordy(nazwa, oblicz_zmiany(koduj(nazwa, nadaj_id(stan)), nowe))
+    else:
+        aktualizuj_caly_arkusz(nazwa, nowe)
+    nowy_stan = nowy_stan.reset_index(drop=True)
+    st.session_state[klucz_stanu] = nowy_stan
+    return nowy_stan
+
+def zapisz_edycje(nazwa, klucz_stanu, pokazane, edytowane):
+    stan = st.session_state[klucz_stanu]
+    edytowane = dekoduj(nazwa, edytowane)[list(edytowane.columns)]
+    return synchronizuj_arkusz(nazwa, klucz_stanu, scal_edycje(stan, pokazane, edytowane))
+
+# Edytory i formularze działają jako fragmenty (@st.fragment): interakcja z nimi przelicza tylko sam fragment.
+# Fragment dostaje ramkę, z którą została narysowana strona; gdy podmieni ramkę w sesji (zapis, nowy wiersz),
+# przeliczamy całą stronę, żeby listy, statystyki i wykresy pokazały nową wersję.
+def odswiez_po_zmianie(klucz_stanu, narysowana):
+    if st.session_state[klucz_stanu] is not narysowana:
+        st.rerun()
 
-def aktualizuj_caly_arkusz(worksheet, df):
-    worksheet.clear()
-    worksheet.update([df.columns.values.tolist()] + df.values.tolist())
-    st.cache_data.clear()
+# Callback przycisku we fragmencie nie powinien niczego wyświetlać – komunikat pokazuje dopiero treść fragmentu
+def komunikat(tekst, rodzaj="toast"):
+    st.session_state["komunikat"] = (rodzaj, tekst)
 
-# --- FUNKCJE ŁADUJĄCE DANE (tylko raz) ---
+def pokaz_komunikat():
+    rodzaj, tekst = st.session_state.pop("komunikat", (None, None))
+    if rodzaj == "toast":
+        st.toast(tekst)
+    elif rodzaj == "warning":
+        st.warning(tekst)
+
+# --- FUNKCJE ŁADUJĄCE DANE (raz na wersję zakładki) ---
+# Typy kolumn i konwersje są opisane w schemat.py; dekodowanie odbywa się raz, we wspólnej ramce.
 def load_goscie():
-    if worksheet_goscie is None:
-        return pd.DataFrame(columns=KOLUMNY_GOSCIE)
-    df = pobierz_dane(worksheet_goscie)
-    if df.empty:
-        df = pd.DataFrame(columns=KOLUMNY_GOSCIE)
-    if "Dieta" not in df.columns:
-        df["Dieta"] = ""
-    df["RSVP"] = df["RSVP"].apply(lambda x: str(x).lower() in ["tak", "true", "1", "yes"])
-    df["Zaproszenie_Wyslane"] = df["Zaproszenie_Wyslane"].apply(lambda x: str(x).lower() in ["tak", "true", "1", "yes"])
-    df = df.fillna("")
-    return df
+    if not magazyn.istnieje("Goscie"):
+        return pusta_ramka("Goscie")
+    return pobierz_dane("Goscie")
 
 def load_obsluga():
-    if worksheet_obsluga is None:
-        return pd.DataFrame(columns=KOLUMNY_OBSLUGA)
-    df = pobierz_dane(worksheet_obsluga)
-    if 'ID' in df.columns:
-        df = df.drop(columns=['ID'])
-    if df.empty:
-        df = pd.DataFrame(columns=KOLUMNY_OBSLUGA)
-    df["Koszt"] = pd.to_numeric(df["Koszt"], errors='coerce').fillna(0.0)
-    df["Zaliczka"] = pd.to_numeric(df["Zaliczka"], errors='coerce').fillna(0.0)
-    df["Czy_Oplacone"] = df["Czy_Oplacone"].apply(lambda x: str(x).lower() in ["tak", "true", "1", "yes"])
-    df["Czy_Zaliczka_Oplacona"] = df["Czy_Zaliczka_Oplacona"].apply(lambda x: str(x).lower() in ["tak", "true", "1", "yes"])
-    df = df.fillna("")
-    return df
+    if not magazyn.istnieje("Obsluga"):
+        return pusta_ramka("Obsluga")
+    return pobierz_dane("Obsluga")
 
 def load_zadania():
-    if worksheet_zadania is None:
-        return pd.DataFrame(columns=KOLUMNY_ZADANIA)
-    df = pobierz_dane(worksheet_zadania)
-    if df.empty:
-        df = pd.DataFrame(columns=KOLUMNY_ZADANIA)
-    df["Termin"] = pd.to_datetime(df["Termin"], errors='coerce').dt.date
-    df["Czy_Zrobione"] = df["Czy_Zrobione"].apply(lambda x: str(x).lower() in ["tak", "true", "1", "yes"])
-    df = df.fillna("")
-    return df
+    if not magazyn.istnieje("Zadania"):
+        return pusta_ramka("Zadania")
+    return pobierz_dane("Zadania")
 
 def load_stoly():
-    if worksheet_stoly is None:
-        return pd.DataFrame(columns=KOLUMNY_STOLY)
-    df = pobierz_dane(worksheet_stoly)
+    if not magazyn.istnieje("Stoly"):
+        return pusta_ramka("Stoly")
+    return pobierz_dane("Stoly")
+
+def load_miejsca():
+    # Zakładka "Miejsca": jeden wiersz = jedno zajęte miejsce (Stol, Miejsce, Gosc_ID – ID gościa).
+    # Bez tej zakładki odtwarzamy rekordy ze starej kolumny Goscie_Lista.
+    if not magazyn.istnieje("Miejsca"):
+        rekordy = rekordy_z_list(st.session_state["df_stoly"], st.session_state["df_goscie"])
+        return dopisz_rekordy(pusta_ramka("Miejsca"), rekordy)
+    df = pobierz_dane("Miejsca")
+    if "Gosc" in df.columns:
+        # Starsza zakładka trzymała imiona gości – jednorazowo przepisujemy ją z ID (bez połączenia tylko pokazujemy)
+        df = miejsca_z_imion(df, st.session_state["df_goscie"])
+        if not tylko_do_odczytu():
+            aktualizuj_caly_arkusz("Miejsca", koduj("Miejsca", df[KOLUMNY_ARKUSZY["Miejsca"]]))
     if df.empty:
-        df = pd.DataFrame(columns=KOLUMNY_STOLY)
-    df["Numer"] = df["Numer"].astype(str)
-    df["Liczba_Miejsc"] = pd.to_numeric(df["Liczba_Miejsc"], errors='coerce').fillna(0).astype(int)
-    df = df.fillna("")
-    return df
+        # Jednorazowe przeniesienie układu z Goscie_Lista do zakładki "Miejsca" (bez połączenia tylko pokazujemy)
+        rekordy = rekordy_z_list(st.session_state["df_stoly"], st.session_state["df_goscie"])
+        if rekordy and tylko_do_odczytu():
+            df = dopisz_rekordy(df, rekordy)
+        elif rekordy:
+            df = nadaj_id(dopisz_rekordy(df, rekordy))
+            magazyn.zapisz_rekordy("Miejsca", ZmianyRekordow(dopisane=koduj("Miejsca", df).to_dict("records")))
+            stoly = st.session_state["df_stoly"].copy()
+            stoly["Goscie_Lista"] = ""
+            synchronizuj_arkusz("Stoly", "df_stoly", stoly)
+    return df.reset_index(drop=True)
+
+def aktualny_plan():
+    # Indeksy planu przebudowujemy tylko wtedy, gdy zmieniła się ramka rekordów albo lista gości (imiona)
+    df, df_goscie = st.session_state["df_miejsca"], st.session_state["df_goscie"]
+    zapis = st.session_state.get("plan_miejsc")
+    if zapis is None or zapis[0] is not df or zapis[1] is not df_goscie:
+        zapis = (df, df_goscie, PlanMiejsc(df, df_goscie))
+        st.session_state["plan_miejsc"] = zapis
+    return zapis[2]
+
+def aktualny_indeks_gosci():
+    # Indeks doganiamy do listy gości z sesji przyrostowo – tylko nowe, zmienione i usunięte nazwiska
+    df = st.session_state["df_goscie"]
+    indeks_gosci.zsynchronizuj(df["ID"], df["Imie_Nazwisko"], zrodlo=df)
+    return indeks_gosci
+
+def aktualny_budzet():
+    # Sumy i agregaty budżetu liczymy raz na każdą wersję danych (nowa ramka w sesji = nowa wersja)
+    df = st.session_state["df_obsluga"]
+    zapis = st.session_state.get("budzet")
+    if zapis is None or zapis[0] is not df:
+        zapis = (df, PodsumowanieBudzetu(df))
+        st.session_state["budzet"] = zapis
+    return zapis[1]
 
 def load_harmonogram():
-    if worksheet_harmonogram is None:
-        return pd.DataFrame(columns=KOLUMNY_HARMONOGRAM)
-    df = pobierz_dane(worksheet_harmonogram)
-    if 'ID' in df.columns:
-        df = df.drop(columns=['ID'])
-    if df.empty:
-        df = pd.DataFrame(columns=KOLUMNY_HARMONOGRAM)
-    for col in KOLUMNY_HARMONOGRAM:
-        if col not in df.columns:
-            df[col] = ""
-    df = df.fillna("")
-    df["Godzina"] = df["Godzina"].astype(str)
-    return df
+    if not magazyn.istnieje("Harmonogram"):
+        return pusta_ramka("Harmonogram")
+    return pobierz_dane("Harmonogram")
+
+# Ramka sesji i funkcja ładująca dla każdej zakładki; Stoly przed Miejsca – load_miejsca korzysta ze stołów
+RAMKI = {
+    "Goscie": ("df_goscie", load_goscie),
+    "Obsluga": ("df_obsluga", load_obsluga),
+    "Zadania": ("df_zadania", load_zadania),
+    "Stoly": ("df_stoly", load_stoly),
+    "Miejsca": ("df_miejsca", load_miejsca),
+    "Harmonogram": ("df_harmonogram", load_harmonogram),
+}
+
+def nieaktualne(nazwy):
+    # Zakładki, które ktoś (ta albo inna sesja) zapisał od czasu wczytania ich do tej sesji
+    wersje = st.session_state.get("wersje_ramek", {})
+    wynik = [n for n in nazwy if n in wersje and wersje[n] != magazyn.wersja(n)]
+    if "Stoly" in wynik and "Miejsca" in nazwy and not magazyn.istnieje("Miejsca"):
+        wynik.append("Miejsca")    # bez zakładki Miejsca układ pochodzi z kolumny Goscie_Lista
+    return wynik
+
+def wczytaj(*nazwy):
+    # Wczytuje do sesji brakujące i nieaktualne ramki podanych zakładek; surowe dane dociągamy jednym zapytaniem
+    for nazwa in nieaktualne(nazwy):
+        st.session_state.pop(RAMKI[nazwa][0], None)
+    brakujace = [n for n in RAMKI if n in nazwy and RAMKI[n][0] not in st.session_state]
+    pobierz_surowe(brakujace)
+    for nazwa in brakujace:
+        klucz, zaladuj = RAMKI[nazwa]
+        with mierz(zaladuj.__name__):
+            st.session_state[klucz] = zaladuj()
 
-# --- FUNKCJA GENERUJĄCA PDF ---
-def generuj_pdf(goscie_df, stoly_df, harmonogram_df):
-    import os
-    import unicodedata
-    from io import BytesIO
+# --- UI APLIKACJI ---
+sekcja = st.segmented_control(
+    "Sekcja", list(SEKCJE), default=SEKCJA_STARTOWA, required=True, key="sekcja", label_visibility="collapsed"
+)
+wczytaj(*SEKCJE[sekcja])
+
+# --- ZMIANY Z INNYCH SESJI ---
+# Co [magazyn] odswiezanie sekund (domyślnie 10, 0 = wyłączone) sprawdzamy wersje zakładek widocznej sekcji.
+# Gdy ktoś inny coś zapisał, przeliczamy stronę – wczytane zostaną ponownie tylko zmienione zakładki.
+odswiezanie = float(wczytaj_sekrety().get("magazyn", {}).get("odswiezanie", 10))
+
+@st.fragment(run_every=odswiezanie or None)
+def obserwuj_zmiany(nazwy):
+    if nieaktualne(nazwy):
+        st.toast("🔄 Dane zostały zmienione w innej sesji – odświeżam.")
+        st.rerun()
 
-    def usun_polskie_znaki(tekst):
-        return ''.join(
-            c for c in unicodedata.normalize('NFD', tekst)
-            if unicodedata.category(c) != 'Mn'
-        )
+obserwuj_zmiany(SEKCJE[sekcja])
 
-    pdf = FPDF()
-    
-    czcionka_ok = os.path.exists("fonts/DejaVuSans.ttf")
-    if czcionka_ok:
-        pdf.add_font("DejaVu", "", "fonts/DejaVuSans.ttf")
-        pdf.set_font("DejaVu", size=12)
-        font_family = "DejaVu"
-        clean_text = lambda x: x
-    else:
-        pdf.set_font("helvetica", size=12)
-        font_family = "helvetica"
-        clean_text = usun_polskie_znaki
-        st.warning("Używam domyślnej czcionki – polskie znaki mogą być niepoprawne.")
-
-    pdf.add_page()
-
-    # Tytuł
-    pdf.set_font(font_family, size=16)
-    pdf.cell(200, 10, txt=clean_text("Podsumowanie wesela"), ln=1, align='C')
-    pdf.ln(10)
-
-    # --- Lista gości ---
-    pdf.set_font(font_family, size=14)
-    pdf.cell(200, 10, txt=clean_text("Lista gości"), ln=1)
-    pdf.set_font(font_family, size=10)
-    if not goscie_df.empty:
-        for _, row in goscie_df.iterrows():
-            pdf.cell(200, 8, txt=clean_text(row['Imie_Nazwisko']), ln=1)
-    else:
-        pdf.cell(200, 8, txt=clean_text("Brak gości"), ln=1)
-    pdf.ln(5)
-
-    # --- Podsumowanie diet (tylko potwierdzeni goście) ---
-    if not goscie_df.empty and 'Dieta' in goscie_df.columns:
-        potwierdzeni = goscie_df[goscie_df['RSVP'] == True]
-        if not potwierdzeni.empty:
-            dieta_counts = potwierdzeni['Dieta'].value_counts().reset_index()
-            dieta_counts.columns = ['Opcja', 'Liczba']
-            # Filtrujemy puste diety (jeśli ktoś nie wybrał)
-            dieta_counts = dieta_counts[dieta_counts['Opcja'] != ""]
-            
-            if not dieta_counts.empty:
-                pdf.set_font(font_family, size=14)
-                pdf.cell(200, 10, txt=clean_text("Podsumowanie diet"), ln=1)
-                pdf.set_font(font_family, size=10)
-                for _, row in dieta_counts.iterrows():
-                    linia = f"{row['Opcja']}: {row['Liczba']}"
-                    pdf.cell(200, 8, txt=clean_text(linia), ln=1)
-                pdf.ln(5)
-        else:
-            pdf.set_font(font_family, size=12)
-            pdf.cell(200, 8, txt=clean_text("Brak potwierdzonych gości – brak danych o dietach"), ln=1)
-            pdf.ln(5)
-    else:
-        pdf.set_font(font_family, size=12)
-        pdf.cell(200, 8, txt=clean_text("Brak danych o dietach"), ln=1)
-        pdf.ln(5)
-
-    # --- Rozsadzenie przy stołach ---
-    pdf.set_font(font_family, size=14)
-    pdf.cell(200, 10, txt=clean_text("Rozsadzenie przy stołach"), ln=1)
-    pdf.set_font(font_family, size=10)
-    if not stoly_df.empty:
-        for _, row in stoly_df.iterrows():
-            linia = f"Stół {row['Numer']} ({row['Ksztalt']}, {row['Liczba_Miejsc']} miejsc):"
-            pdf.cell(200, 8, txt=clean_text(linia), ln=1)
-            goscie_przy_stole = row['Goscie_Lista'].split(';') if row['Goscie_Lista'] else []
-            goscie_przy_stole = [g for g in goscie_przy_stole if g.strip()]
-            if goscie_przy_stole:
-                for gosc in goscie_przy_stole:
-                    pdf.cell(200, 6, txt=clean_text(f"   - {gosc}"), ln=1)
-            else:
-                pdf.cell(200, 6, txt=clean_text("   (brak gości)"), ln=1)
-    else:
-        pdf.cell(200, 8, txt=clean_text("Brak danych o stołach"), ln=1)
-    pdf.ln(5)
-
-    # --- Harmonogram dnia ---
-    pdf.set_font(font_family, size=14)
-    pdf.cell(200, 10, txt=clean_text("Harmonogram dnia"), ln=1)
-    pdf.set_font(font_family, size=10)
-    if not harmonogram_df.empty:
-        harm_sorted = harmonogram_df.copy()
+# --- POBIERZ WSZYSTKO (wszystkie zakładki w jednym pliku) ---
+with st.sidebar:
+    st.write("---")
+    st.subheader("📦 Pobierz wszystko")
+    format_eksportu = st.radio("Format", list(FORMATY), key="format_eksportu", horizontal=True)
+    if st.button("Przygotuj plik", key="btn_eksport"):
+        wczytaj(*RAMKI)
+        ramki = {nazwa: st.session_state[klucz] for nazwa, (klucz, _) in RAMKI.items()}
+        rozszerzenie, mime = FORMATY[format_eksportu]
+        klucz = f"{skrot_danych(*ramki.values())}-{format_eksportu}-v{WERSJA_EKSPORTU}"
         try:
-            harm_sorted['czas'] = pd.to_datetime(harm_sorted['Godzina'], format='%H:%M', errors='coerce')
-            harm_sorted = harm_sorted.sort_values('czas').drop(columns=['czas'])
-        except:
-            harm_sorted = harm_sorted.sort_values('Godzina')
-        for _, row in harm_sorted.iterrows():
-            txt = f"{row['Godzina']} - {row['Czynność']}"
-            if row['Uwagi']:
-                txt += f" ({row['Uwagi']})"
-            pdf.cell(200, 8, txt=clean_text(txt), ln=1)
-    else:
-        pdf.cell(200, 8, txt=clean_text("Brak harmonogramu"), ln=1)
-
-    # Generowanie PDF
-    pdf_bytes = pdf.output()
-    if isinstance(pdf_bytes, str):
-        pdf_bytes = pdf_bytes.encode('utf-8')
-    return BytesIO(pdf_bytes)
-    
-# --- UI APLIKACJI ---
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["👥 Lista Gości", "🎧 Organizacja", "✅ Lista Zadań", "🍽️ Rozplanowanie Stołów", "⏰ Harmonogram Dnia", "🍽️ Diety"])
+            plik = pamiec_eksportow.pobierz(rozszerzenie, klucz, lambda: eksportuj(ramki, format_eksportu))
+        except ImportError as e:
+            st.error(f"Ten format wymaga dodatkowego pakietu: {e.name}")
+        else:
+            st.download_button(
+                label=f"📥 Pobierz ({len(plik) / 1024:.0f} kB)",
+                data=plik,
+                file_name=f"wesele_{date.today():%Y-%m-%d}.{rozszerzenie}",
+                mime=mime,
+            )
 
 # ==========================
 # ZAKŁADKA 1: GOŚCIE
 # ==========================
-with tab1:
+if sekcja == "👥 Lista Gości":
     st.header("👥 Zarządzanie Gośćmi")
     
-    if "df_goscie" not in st.session_state:
-        st.session_state["df_goscie"] = load_goscie()
     df_goscie = st.session_state["df_goscie"]
 
-    def obsluga_dodawania():
-        imie_glowne = st.session_state.get("input_imie", "")
-        imie_partnera = st.session_state.get("input_partner", "")
-        czy_rsvp = st.session_state.get("check_rsvp", False)
-        czy_z_osoba = st.session_state.get("check_plusone", False)
-        czy_zaproszenie = st.session_state.get("check_invite", False)
-
-        if imie_glowne:
-            nowe_wiersze = []
-            nowe_wiersze.append([imie_glowne, "", czy_rsvp, czy_zaproszenie, ""])  # pusta dieta
-            if czy_z_osoba and imie_partnera:
-                nowe_wiersze.append([imie_partnera, f"(Osoba tow. dla: {imie_glowne})", czy_rsvp, czy_zaproszenie, ""])
-
-            df = st.session_state["df_goscie"].copy()
-            for w in nowe_wiersze:
-                nowy = dict(zip(KOLUMNY_GOSCIE, w))
-                df = pd.concat([df, pd.DataFrame([nowy])], ignore_index=True)
-            st.session_state["df_goscie"] = df
-
-            for w in nowe_wiersze:
-                w_arkusz = w.copy()
-                w_arkusz[2] = "Tak" if w_arkusz[2] else "Nie"
-                w_arkusz[3] = "Tak" if w_arkusz[3] else "Nie"
-                zapisz_nowy_wiersz(worksheet_goscie, w_arkusz)
-
-            st.toast(f"✅ Dodano: {imie_glowne}")
-            st.session_state["input_imie"] = ""
-            st.session_state["input_partner"] = ""
-            st.session_state["check_rsvp"] = False
-            st.session_state["check_plusone"] = False
-            st.session_state["check_invite"] = False
-        else:
-            st.warning("Musisz wpisać imię głównego gościa!")
-
-    with st.expander("➕ Szybkie dodawanie (Formularz)", expanded=False):
-        czy_z_osoba = st.checkbox("Chcę dodać też osobę towarzyszącą (+1)", key="check_plusone")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.text_input("Imię i Nazwisko Gościa", key="input_imie")
-        with c2:
-            if czy_z_osoba:
-                st.text_input("Imię Osoby Towarzyszącej", key="input_partner")
-        k1, k2 = st.columns(2)
-        with k1:
-            st.checkbox("✉️ Zaproszenie wysłane?", key="check_invite")
-        with k2:
-            st.checkbox("✅ Potwierdzenie Przybycia", key="check_rsvp")
-        st.button("Dodaj do listy", on_click=obsluga_dodawania, key="btn_goscie")
+    @st.fragment
+    def dodawanie_gosci(df_goscie):
+        def obsluga_dodawania():
+            imie_glowne = st.session_state.get("input_imie", "")
+            imie_partnera = st.session_state.get("input_partner", "")
+            czy_rsvp = st.session_state.get("check_rsvp", False)
+            czy_z_osoba = st.session_state.get("check_plusone", False)
+            czy_zaproszenie = st.session_state.get("check_invite", False)
+
+            if imie_glowne:
+                nowe_wiersze = []
+                nowe_wiersze.append([imie_glowne, "", czy_rsvp, czy_zaproszenie, ""])  # pusta dieta
+                if czy_z_osoba and imie_partnera:
+                    nowe_wiersze.append([imie_partnera, f"(Osoba tow. dla: {imie_glowne})", czy_rsvp, czy_zaproszenie, ""])
+
+                with zapis_lub_ostrzezenie(w_callbacku=True):
+                    dopisz_w_sesji("df_goscie", zapisz_nowe_wiersze("Goscie", nowe_wiersze))
+
+                    komunikat(f"✅ Dodano: {imie_glowne}")
+                    st.session_state["input_imie"] = ""
+                    st.session_state["input_partner"] = ""
+                    st.session_state["check_rsvp"] = False
+                    st.session_state["check_plusone"] = False
+                    st.session_state["check_invite"] = False
+            else:
+                komunikat("Musisz wpisać imię głównego gościa!", "warning")
+
+        with st.expander("➕ Szybkie dodawanie (Formularz)", expanded=False):
+            czy_z_osoba = st.checkbox("Chcę dodać też osobę towarzyszącą (+1)", key="check_plusone")
+            c1, c2 = st.columns(2)
+            with c1:
+                st.text_input("Imię i Nazwisko Gościa", key="input_imie")
+            with c2:
+                if czy_z_osoba:
+                    st.text_input("Imię Osoby Towarzyszącej", key="input_partner")
+            k1, k2 = st.columns(2)
+            with k1:
+                st.checkbox("✉️ Zaproszenie wysłane?", key="check_invite")
+            with k2:
+                st.checkbox("✅ Potwierdzenie Przybycia", key="check_rsvp")
+            st.button("Dodaj do listy", on_click=obsluga_dodawania, key="btn_goscie", disabled=tylko_do_odczytu())
+
+        pokaz_komunikat()
+        odswiez_po_zmianie("df_goscie", df_goscie)
+
+    dodawanie_gosci(df_goscie)
+
+    @st.fragment
+    def import_gosci(df_goscie):
+        # Lista gości z pliku: czytamy paczkami, każda paczka przyjętych gości to jeden zapis do arkusza
+        with st.expander("📥 Import gości z pliku (CSV / XLSX)", expanded=False):
+            st.caption(
+                "Kolumny: Imie_Nazwisko (albo Imię i Nazwisko), opcjonalnie Osoba_Towarzyszaca, RSVP, "
+                "Zaproszenie_Wyslane, Dieta. Goście, którzy już są na liście, zostaną pominięci."
+            )
+            plik = st.file_uploader("Plik z listą gości", type=["csv", "xlsx"], key="import_plik")
+            if plik is not None and st.button("📥 Importuj", key="btn_import", disabled=tylko_do_odczytu()):
+                pasek = st.progress(0.0, text="Import...")
+                rozmiar = max(plik.size, 1)
+                def postep(przeczytane, przyjete):
+                    pasek.progress(min(plik.tell() / rozmiar, 1.0), text=f"Przeczytano {przeczytane} wierszy, przyjęto {przyjete}")
+                try:
+                    wynik = importuj(
+                        plik, plik.name, st.session_state["df_goscie"]["Imie_Nazwisko"],
+                        lambda df: dopisz_w_sesji("df_goscie", zapisz_nowa_ramke("Goscie", df)), postep=postep,
+                    )
+                except TylkoDoOdczytu:
+                    st.warning(TEKST_TYLKO_ODCZYT)
+                except ImportError:
+                    st.error("Import plików XLSX wymaga pakietu openpyxl.")
+                except (ValueError, UnicodeDecodeError) as e:
+                    # Paczki zapisane przed błędem zostają na liście – odświeżenie niżej je pokaże
+                    st.error(f"Nie udało się wczytać pliku: {e}")
+                else:
+                    pasek.progress(1.0, text=f"Zaimportowano {wynik.przyjete} gości.")
+                    st.session_state["raport_importu"] = (wynik.przyjete, wynik.odrzucone)
+            if st.session_state.get("raport_importu"):
+                przyjete, odrzucone = st.session_state["raport_importu"]
+                st.success(f"✅ Zaimportowano gości: {przyjete}")
+                if odrzucone:
+                    st.warning(f"Pominięto wierszy: {len(odrzucone)}")
+                    st.dataframe(pd.DataFrame(odrzucone, columns=["Wiersz", "Gość", "Powód"]), hide_index=True, use_container_width=True)
+
+        odswiez_po_zmianie("df_goscie", df_goscie)
+
+    import_gosci(df_goscie)
 
     st.write("---")
     st.subheader(f"📋 Lista Gości ({len(df_goscie)} pozycji)")
 
-    df_display = df_goscie.copy()
-    df_display["Imie_Nazwisko"] = df_display["Imie_Nazwisko"].astype(str).replace("nan", "")
-    df_display["Imie_Osoby_Tow"] = df_display["Imie_Osoby_Tow"].astype(str).replace("nan", "")
-
-    col_sort1, col_sort2 = st.columns([1, 3])
-    with col_sort1:
-        st.write("**Sortuj wg:**")
-    with col_sort2:
-        tryb_sortowania = st.radio(
-            "Wybierz tryb sortowania",
-            options=["Domyślnie", "✉️ Wysłane zaproszenia", "✉️ Brak zaproszenia", "✅ Potwierdzone Przybycie", "🔤 Nazwisko (A-Z)"],
-            label_visibility="collapsed",
-            horizontal=True,
-            key="sort_goscie_radio"
-        )
-
-    if tryb_sortowania == "✉️ Wysłane zaproszenia":
-        df_display = df_display.sort_values(by="Zaproszenie_Wyslane", ascending=False)
-    elif tryb_sortowania == "✉️ Brak zaproszenia":
-        df_display = df_display.sort_values(by="Zaproszenie_Wyslane", ascending=True)
-    elif tryb_sortowania == "✅ Potwierdzone Przybycie":
-        df_display = df_display.sort_values(by="RSVP", ascending=False)
-    elif tryb_sortowania == "🔤 Nazwisko (A-Z)":
-        df_display = df_display.sort_values(by="Imie_Nazwisko", ascending=True)
-
-    edytowane_goscie = st.data_editor(
-        df_display,
-        num_rows="dynamic",
-        column_config={
-            "Imie_Nazwisko": st.column_config.TextColumn("Imię i Nazwisko", required=True),
-            "Imie_Osoby_Tow": st.column_config.TextColumn("Info (+1) / Powiązanie", width="large"),
-            "Zaproszenie_Wyslane": st.column_config.CheckboxColumn("✉️ Wysłane Zaproszenie", default=False),
-            "RSVP": st.column_config.CheckboxColumn("✅ Potwierdzone Przybycie", default=False),
-            "Dieta": st.column_config.SelectboxColumn("Dieta", options=["", "Mięsna", "Wegetariańska", "Wegańska", "Bezglutenowa", "Inna"], required=False)
-        },
-        use_container_width=True,
-        hide_index=True,
-        key="editor_goscie"
-    )
+    @st.fragment
+    def lista_gosci(df_goscie):
+        df_display = df_goscie.copy()
+
+        szukane = st.text_input("🔍 Szukaj gościa", key="szukaj_gosci", placeholder="np. lukasz kowal")
+        if szukane.strip():
+            # Trafienia od najlepiej pasujących; etykiety wierszy zostają, więc zapis działa jak przy filtrze
+            trafienia = [k for k, _ in aktualny_indeks_gosci().szukaj(szukane, limit=50)]
+            pozycje = pd.Index(df_display["ID"]).get_indexer(trafienia)
+            df_display = df_display.iloc[pozycje[pozycje >= 0]]
+
+        col_sort1, col_sort2 = st.columns([1, 3])
+        with col_sort1:
+            st.write("**Sortuj wg:**")
+        with col_sort2:
+            tryb_sortowania = st.radio(
+                "Wybierz tryb sortowania",
+                options=["Domyślnie", "✉️ Wysłane zaproszenia", "✉️ Brak zaproszenia", "✅ Potwierdzone Przybycie", "🔤 Nazwisko (A-Z)"],
+                label_visibility="collapsed",
+                horizontal=True,
+                key="sort_goscie_radio"
+            )
 
-    if st.button("💾 Zapisz zmiany", key="save_goscie"):
-        df_to_save = edytowane_goscie.copy()
-        df_to_save = df_to_save[df_to_save["Imie_Nazwisko"].str.strip() != ""]
+        if tryb_sortowania == "✉️ Wysłane zaproszenia":
+            df_display = df_display.sort_values(by="Zaproszenie_Wyslane", ascending=False)
+        elif tryb_sortowania == "✉️ Brak zaproszenia":
+            df_display = df_display.sort_values(by="Zaproszenie_Wyslane", ascending=True)
+        elif tryb_sortowania == "✅ Potwierdzone Przybycie":
+            df_display = df_display.sort_values(by="RSVP", ascending=False)
+        elif tryb_sortowania == "🔤 Nazwisko (A-Z)":
+            df_display = df_display.sort_values(by="Imie_Nazwisko", ascending=True)
+
+        edytowane_goscie = st.data_editor(
+            df_display,
+            num_rows="dynamic",
+            column_config={
+                "Imie_Nazwisko": st.column_config.TextColumn("Imię i Nazwisko", required=True),
+                "Imie_Osoby_Tow": st.column_config.TextColumn("Info (+1) / Powiązanie", width="large"),
+                "Zaproszenie_Wyslane": st.column_config.CheckboxColumn("✉️ Wysłane Zaproszenie", default=False),
+                "RSVP": st.column_config.CheckboxColumn("✅ Potwierdzone Przybycie", default=False),
+                "Dieta": st.column_config.SelectboxColumn("Dieta", options=["", "Mięsna", "Wegetariańska", "Wegańska", "Bezglutenowa", "Inna"], required=False),
+                "ID": None,
+            },
+            use_container_width=True,
+            hide_index=True,
+            key="editor_goscie"
+        )
 
-        df_arkusz = df_to_save.copy()
-        df_arkusz["RSVP"] = df_arkusz["RSVP"].apply(lambda x: "Tak" if x else "Nie")
-        df_arkusz["Zaproszenie_Wyslane"] = df_arkusz["Zaproszenie_Wyslane"].apply(lambda x: "Tak" if x else "Nie")
-        df_arkusz = df_arkusz.fillna("")
-        aktualizuj_caly_arkusz(worksheet_goscie, df_arkusz)
+        if st.button("💾 Zapisz zmiany", key="save_goscie", disabled=tylko_do_odczytu()):
+            df_to_save = edytowane_goscie.copy()
+            df_to_save = df_to_save[df_to_save["Imie_Nazwisko"].str.strip() != ""]
+            with zapis_lub_ostrzezenie():
+                zapisz_edycje("Goscie", "df_goscie", df_display, df_to_save)
+                st.success("Zapisano zmiany!")
+                st.rerun()
 
-        st.session_state["df_goscie"] = df_to_save
-        st.success("Zapisano zmiany!")
-        st.rerun()
+    lista_gosci(df_goscie)
 
     # Statystyki
     if not df_goscie.empty:
@@ -523,11 +668,18 @@ with tab1:
     st.write("---")
     st.subheader("📄 Eksport do PDF")
     if st.button("Generuj PDF"):
-        goscie_df = st.session_state.get("df_goscie", pd.DataFrame())
-        stoly_df = st.session_state.get("df_stoly", pd.DataFrame())
-        harmonogram_df = st.session_state.get("df_harmonogram", pd.DataFrame())
+        # PDF obejmuje też stoły i harmonogram – wczytujemy je dopiero tutaj
+        wczytaj("Stoly", "Miejsca", "Harmonogram")
+        goscie_df = st.session_state["df_goscie"]
+        stoly_df = listy_stolow(st.session_state["df_stoly"], aktualny_plan())
+        harmonogram_df = st.session_state["df_harmonogram"]
         
-        pdf_buffer = generuj_pdf(goscie_df, stoly_df, harmonogram_df)
+        if not czcionka_dostepna():
+            st.warning("Używam domyślnej czcionki – polskie znaki mogą być niepoprawne.")
+        klucz = f"{skrot_danych(goscie_df, stoly_df, harmonogram_df)}-v{WERSJA_PDF}"
+        pdf_buffer = pamiec_eksportow.pobierz(
+            "pdf", klucz, lambda: generuj_pdf(goscie_df, stoly_df, harmonogram_df)
+        )
         
         st.download_button(
             label="📥 Pobierz PDF",
@@ -539,11 +691,9 @@ with tab1:
 # ==========================
 # ZAKŁADKA 2: ORGANIZACJA
 # ==========================
-with tab2:
+if sekcja == "🎧 Organizacja":
     st.header("🎧 Organizacja i Budżet")
     
-    if "df_obsluga" not in st.session_state:
-        st.session_state["df_obsluga"] = load_obsluga()
     df_obsluga = st.session_state["df_obsluga"]
 
     base_cats = ["Inne"]
@@ -554,274 +704,301 @@ with tab2:
         all_cats = sorted(base_cats)
     select_opts = all_cats + ["➕ Stwórz nową..."]
 
-    def dodaj_usluge():
-        sel = st.session_state.get("org_k_sel")
-        inp = st.session_state.get("org_k_inp", "")
-        fin_cat = inp.strip() if sel == "➕ Stwórz nową..." else sel
-        r = st.session_state.get("org_rola", "")
-        i = st.session_state.get("org_info", "")
-        k = st.session_state.get("org_koszt", 0.0)
-        op = st.session_state.get("org_op", False)
-        z = st.session_state.get("org_zal", 0.0)
-        z_op = st.session_state.get("org_z_op", False)
-
-        if r and fin_cat:
-            nowy_wiersz = [fin_cat, r, i, k, op, z, z_op]
-            df = st.session_state["df_obsluga"].copy()
-            nowy = dict(zip(KOLUMNY_OBSLUGA, nowy_wiersz))
-            df = pd.concat([df, pd.DataFrame([nowy])], ignore_index=True)
-            st.session_state["df_obsluga"] = df
-
-            w_arkusz = nowy_wiersz.copy()
-            w_arkusz[4] = "Tak" if w_arkusz[4] else "Nie"
-            w_arkusz[6] = "Tak" if w_arkusz[6] else "Nie"
-            zapisz_nowy_wiersz(worksheet_obsluga, w_arkusz)
-
-            st.toast(f"💰 Dodano: {r}")
-            st.session_state["org_rola"] = ""
-            st.session_state["org_info"] = ""
-            st.session_state["org_koszt"] = 0.0
-            st.session_state["org_op"] = False
-            st.session_state["org_zal"] = 0.0
-            st.session_state["org_z_op"] = False
-            st.session_state["org_k_inp"] = ""
-        else:
-            st.warning("Wpisz Rolę i Kategorię")
-
-    with st.expander("➕ Dodaj koszt", expanded=False):
-        c_select, c_input = st.columns(2)
-        with c_select:
-            sel = st.selectbox("Kategoria", select_opts, key="org_k_sel")
-        with c_input:
-            if sel == "➕ Stwórz nową...":
-                st.text_input("Nowa nazwa:", key="org_k_inp")
-        st.text_input("Rola", key="org_rola", placeholder="np. DJ, Florystka")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.number_input("Koszt Całkowity (zł)", step=100.0, key="org_koszt")
-            st.checkbox("Całość opłacona?", key="org_op")
-        with c2:
-            st.number_input("Zaliczka (zł)", step=100.0, key="org_zal")
-            st.checkbox("Zaliczka opłacona?", key="org_z_op")
-        st.text_input("Informacje dodatkowe", key="org_info", placeholder="Kontakt, termin płatności...")
-        st.button("Dodaj", on_click=dodaj_usluge, key="btn_org")
+    @st.fragment
+    def dodawanie_kosztu(df_obsluga):
+        def dodaj_usluge():
+            sel = st.session_state.get("org_k_sel")
+            inp = st.session_state.get("org_k_inp", "")
+            fin_cat = inp.strip() if sel == "➕ Stwórz nową..." else sel
+            r = st.session_state.get("org_rola", "")
+            i = st.session_state.get("org_info", "")
+            k = st.session_state.get("org_koszt", 0.0)
+            op = st.session_state.get("org_op", False)
+            z = st.session_state.get("org_zal", 0.0)
+            z_op = st.session_state.get("org_z_op", False)
+
+            if r and fin_cat:
+                nowy_wiersz = [fin_cat, r, i, k, op, z, z_op]
+                with zapis_lub_ostrzezenie(w_callbacku=True):
+                    dopisz_w_sesji("df_obsluga", zapisz_nowe_wiersze("Obsluga", [nowy_wiersz]))
+
+                    komunikat(f"💰 Dodano: {r}")
+                    st.session_state["org_rola"] = ""
+                    st.session_state["org_info"] = ""
+                    st.session_state["org_koszt"] = 0.0
+                    st.session_state["org_op"] = False
+                    st.session_state["org_zal"] = 0.0
+                    st.session_state["org_z_op"] = False
+                    st.session_state["org_k_inp"] = ""
+            else:
+                komunikat("Wpisz Rolę i Kategorię", "warning")
+
+        with st.expander("➕ Dodaj koszt", expanded=False):
+            c_select, c_input = st.columns(2)
+            with c_select:
+                sel = st.selectbox("Kategoria", select_opts, key="org_k_sel")
+            with c_input:
+                if sel == "➕ Stwórz nową...":
+                    st.text_input("Nowa nazwa:", key="org_k_inp")
+            st.text_input("Rola", key="org_rola", placeholder="np. DJ, Florystka")
+            c1, c2 = st.columns(2)
+            with c1:
+                st.number_input("Koszt Całkowity (zł)", step=100.0, key="org_koszt")
+                st.checkbox("Całość opłacona?", key="org_op")
+            with c2:
+                st.number_input("Zaliczka (zł)", step=100.0, key="org_zal")
+                st.checkbox("Zaliczka opłacona?", key="org_z_op")
+            st.text_input("Informacje dodatkowe", key="org_info", placeholder="Kontakt, termin płatności...")
+            st.button("Dodaj", on_click=dodaj_usluge, key="btn_org", disabled=tylko_do_odczytu())
+
+        pokaz_komunikat()
+        odswiez_po_zmianie("df_obsluga", df_obsluga)
+
+    dodawanie_kosztu(df_obsluga)
 
     st.write("---")
     st.subheader(f"💸 Wydatki ({len(df_obsluga)})")
 
-    fil = st.multiselect("🔍 Filtruj:", all_cats)
-    df_disp = df_obsluga.copy()
-    if fil:
-        df_disp = df_disp[df_disp["Kategoria"].isin(fil)]
-
-    c1, c2 = st.columns([1,3])
-    with c1:
-        st.write("Sortuj:")
-    with c2:
-        s = st.radio("S", ["Domyślnie", "💰 Najdroższe", "❌ Nieopłacone", "✅ Opłacone"], horizontal=True, label_visibility="collapsed", key="sort_org")
-    if s == "💰 Najdroższe":
-        df_disp = df_disp.sort_values("Koszt", ascending=False)
-    elif s == "❌ Nieopłacone":
-        df_disp = df_disp.sort_values("Czy_Oplacone", ascending=True)
-    elif s == "✅ Opłacone":
-        df_disp = df_disp.sort_values("Czy_Oplacone", ascending=False)
-
-    edited_org = st.data_editor(
-        df_disp,
-        num_rows="dynamic",
-        use_container_width=True,
-        hide_index=True,
-        key="ed_org",
-        column_config={
-            "Kategoria": st.column_config.SelectboxColumn("Kategoria", options=all_cats, required=True),
-            "Rola": st.column_config.TextColumn("Rola", required=True),
-            "Informacje": st.column_config.TextColumn("Info", width="large"),
-            "Koszt": st.column_config.NumberColumn("Koszt (zł)", format="%.0f zł", min_value=0, step=100),
-            "Czy_Oplacone": st.column_config.CheckboxColumn("✅ Opłacone?"),
-            "Zaliczka": st.column_config.NumberColumn("Zaliczka (zł)", format="%.0f zł", min_value=0, step=100),
-            "Czy_Zaliczka_Oplacona": st.column_config.CheckboxColumn("✅ Zaliczka?")
-        }
-    )
+    @st.fragment
+    def lista_kosztow(df_obsluga):
+        fil = st.multiselect("🔍 Filtruj:", all_cats)
+        df_disp = df_obsluga.copy()
+        if fil:
+            df_disp = df_disp[df_disp["Kategoria"].isin(fil)]
 
-    if st.button("💾 Zapisz (Budżet)", key="sav_org"):
-        to_save = edited_org.copy()
-        to_save = to_save[to_save["Rola"].str.strip() != ""]
-        to_save = to_save.fillna("")
-        
-        df_arkusz = to_save.copy()
-        df_arkusz["Czy_Oplacone"] = df_arkusz["Czy_Oplacone"].apply(lambda x: "Tak" if x else "Nie")
-        df_arkusz["Czy_Zaliczka_Oplacona"] = df_arkusz["Czy_Zaliczka_Oplacona"].apply(lambda x: "Tak" if x else "Nie")
-        
-        aktualizuj_caly_arkusz(worksheet_obsluga, df_arkusz)
-        
-        to_save["Czy_Oplacone"] = to_save["Czy_Oplacone"].apply(lambda x: x == True)
-        to_save["Czy_Zaliczka_Oplacona"] = to_save["Czy_Zaliczka_Oplacona"].apply(lambda x: x == True)
-        to_save["Koszt"] = pd.to_numeric(to_save["Koszt"], errors='coerce').fillna(0.0)
-        to_save["Zaliczka"] = pd.to_numeric(to_save["Zaliczka"], errors='coerce').fillna(0.0)
-        st.session_state["df_obsluga"] = to_save
-        
-        st.success("Zapisano!")
-        st.rerun()
+        c1, c2 = st.columns([1,3])
+        with c1:
+            st.write("Sortuj:")
+        with c2:
+            s = st.radio("S", ["Domyślnie", "💰 Najdroższe", "❌ Nieopłacone", "✅ Opłacone"], horizontal=True, label_visibility="collapsed", key="sort_org")
+        if s == "💰 Najdroższe":
+            df_disp = df_disp.sort_values("Koszt", ascending=False)
+        elif s == "❌ Nieopłacone":
+            df_disp = df_disp.sort_values("Czy_Oplacone", ascending=True)
+        elif s == "✅ Opłacone":
+            df_disp = df_disp.sort_values("Czy_Oplacone", ascending=False)
+
+        edited_org = st.data_editor(
+            df_disp,
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="ed_org",
+            column_config={
+                "Kategoria": st.column_config.SelectboxColumn("Kategoria", options=all_cats, required=True),
+                "Rola": st.column_config.TextColumn("Rola", required=True),
+                "Informacje": st.column_config.TextColumn("Info", width="large"),
+                "Koszt": st.column_config.NumberColumn("Koszt (zł)", format="%.0f zł", min_value=0, step=100),
+                "Czy_Oplacone": st.column_config.CheckboxColumn("✅ Opłacone?"),
+                "Zaliczka": st.column_config.NumberColumn("Zaliczka (zł)", format="%.0f zł", min_value=0, step=100),
+                "Czy_Zaliczka_Oplacona": st.column_config.CheckboxColumn("✅ Zaliczka?"),
+                "ID": None,
+            }
+        )
+
+        if st.button("💾 Zapisz (Budżet)", key="sav_org", disabled=tylko_do_odczytu()):
+            to_save = edited_org.copy()
+            to_save = to_save[to_save["Rola"].str.strip() != ""]
+            with zapis_lub_ostrzezenie():
+                zapisz_edycje("Obsluga", "df_obsluga", df_disp, to_save)
+
+                st.success("Zapisano!")
+                st.rerun()
+
+    lista_kosztow(df_obsluga)
 
     if not df_obsluga.empty:
-        calc = df_obsluga.copy()
-        calc["Koszt"] = pd.to_numeric(calc["Koszt"], errors='coerce').fillna(0.0)
-        calc["Zaliczka"] = pd.to_numeric(calc["Zaliczka"], errors='coerce').fillna(0.0)
-        total = calc["Koszt"].sum()
-        paid = 0.0
-        for i, r in calc.iterrows():
-            if r["Czy_Oplacone"]:
-                paid += r["Koszt"]
-            elif r["Czy_Zaliczka_Oplacona"]:
-                paid += r["Zaliczka"]
-        to_pay = total - paid
+        budzet = aktualny_budzet()
+        total, paid, to_pay = budzet.lacznie, budzet.zaplacono, budzet.do_zaplaty
 
         st.write("---")
         card_style = "background-color: #262730; border: 1px solid #444; padding: 15px; border-radius: 10px; box-shadow: 2px 2px 10px rgba(0,0,0,0.5); text-align: left; margin-bottom: 10px;"
         c1, c2, c3 = st.columns(3)
         c1.markdown(f'<div style="{card_style}"><div style="color: #F5F5DC; font-size: 14px; margin-bottom: 5px;">Łącznie</div><div style="color: #4CAF50; font-size: 30px; font-weight: 700;">{total:,.0f} zł</div></div>', unsafe_allow_html=True)
-        c2.markdown(f'<div style="{card_style}"><div style="color: #F5F5DC; font-size: 14px; margin-bottom: 5px;">Zapłacono</div><div style="color: #4CAF50; font-size: 30px; font-weight: 700;">{paid:,.0f} zł</div></div>', unsafe_allow_html=True)
+        c2.markdown(f'<div style="{card_style}"><div style="color: #F5F5DC; font-size: 14px; margin-bottom: 5px;">Zapłacono</div><div style="color: #4CAF50; font-size: 30px; font-weight: 700;">{paid:,.0f} zł</div><div style="color: #F5F5DC; font-size: 14px;">w tym zaliczki: {budzet.zaliczki:,.0f} zł</div></div>', unsafe_allow_html=True)
         c3.markdown(f'<div style="{card_style}"><div style="color: #F5F5DC; font-size: 14px; margin-bottom: 5px;">Do zapłaty</div><div style="color: #ff4b4b; font-size: 30px; font-weight: 700;">{to_pay:,.0f} zł</div><div style="color: #ff4b4b; font-size: 14px;">▼ -{to_pay:,.0f}</div></div>', unsafe_allow_html=True)
 
         st.write("---")
         st.subheader("📊 Struktura Wydatków")
         
-        grp_cat = calc.groupby("Kategoria")["Koszt"].sum().reset_index().sort_values("Koszt", ascending=False)
-        grp_cat = grp_cat[grp_cat["Koszt"] > 0]
+        grp_cat = budzet.kategorie
         if not grp_cat.empty:
             st.write("**Ile wydajemy na poszczególne kategorie?**")
-            chart_bar = alt.Chart(grp_cat).mark_bar().encode(
-                x=alt.X('Koszt', title='Kwota (zł)'),
-                y=alt.Y('Kategoria', sort='-x', title='Kategoria'),
-                color=alt.Color('Kategoria', legend=None),
-                tooltip=['Kategoria', alt.Tooltip('Koszt', format=',.0f')]
-            ).properties(height=300).interactive()
-            st.altair_chart(chart_bar, use_container_width=True)
+            with mierz("altair: wydatki wg kategorii"):
+                chart_bar = alt.Chart(grp_cat).mark_bar().encode(
+                    x=alt.X('Koszt', title='Kwota (zł)'),
+                    y=alt.Y('Kategoria', sort='-x', title='Kategoria'),
+                    color=alt.Color('Kategoria', legend=None),
+                    tooltip=['Kategoria', alt.Tooltip('Koszt', format=',.0f')]
+                ).properties(height=300).interactive()
+                st.altair_chart(chart_bar, use_container_width=True)
 
         st.write("---")
         st.write("**Wydatki według roli**")
-        grp_role = calc.groupby("Rola")["Koszt"].sum().reset_index().sort_values("Koszt", ascending=False)
-        grp_role = grp_role[grp_role["Koszt"] > 0]
+        grp_role = budzet.role
         if not grp_role.empty:
-            chart_pie_role = alt.Chart(grp_role).mark_arc(innerRadius=50).encode(
-                theta=alt.Theta(field="Koszt", type="quantitative"),
-                color=alt.Color(field="Rola", type="nominal", legend=alt.Legend(title="Rola")),
-                tooltip=[
-                    alt.Tooltip("Rola:N", title="Rola"),
-                    alt.Tooltip("Koszt:Q", title="Koszt", format=",.0f")
-                ]
-            ).properties(width=400, height=400).interactive()
-            st.altair_chart(chart_pie_role, use_container_width=True)
+            with mierz("altair: wydatki wg roli"):
+                chart_pie_role = alt.Chart(grp_role).mark_arc(innerRadius=50).encode(
+                    theta=alt.Theta(field="Koszt", type="quantitative"),
+                    color=alt.Color(field="Rola", type="nominal", legend=alt.Legend(title="Rola")),
+                    tooltip=[
+                        alt.Tooltip("Rola:N", title="Rola"),
+                        alt.Tooltip("Koszt:Q", title="Koszt", format=",.0f")
+                    ]
+                ).properties(width=400, height=400).interactive()
+                st.altair_chart(chart_pie_role, use_container_width=True)
         else:
             st.info("Brak danych do wyświetlenia wykresu dla ról.")
 
         if not grp_cat.empty:
             st.write("---")
             st.write("**Udział procentowy kategorii**")
-            chart_pie_cat = alt.Chart(grp_cat).mark_arc(innerRadius=50).encode(
-                theta=alt.Theta(field="Koszt", type="quantitative"),
-                color=alt.Color(field="Kategoria", type="nominal", legend=alt.Legend(title="Kategoria")),
-                tooltip=[
-                    alt.Tooltip("Kategoria:N", title="Kategoria"),
-                    alt.Tooltip("Koszt:Q", title="Koszt", format=",.0f")
-                ]
-            ).properties(width=400, height=400).interactive()
-            st.altair_chart(chart_pie_cat, use_container_width=True)
+            with mierz("altair: udział kategorii"):
+                chart_pie_cat = alt.Chart(grp_cat).mark_arc(innerRadius=50).encode(
+                    theta=alt.Theta(field="Koszt", type="quantitative"),
+                    color=alt.Color(field="Kategoria", type="nominal", legend=alt.Legend(title="Kategoria")),
+                    tooltip=[
+                        alt.Tooltip("Kategoria:N", title="Kategoria"),
+                        alt.Tooltip("Koszt:Q", title="Koszt", format=",.0f")
+                    ]
+                ).properties(width=400, height=400).interactive()
+                st.altair_chart(chart_pie_cat, use_container_width=True)
+
+        # --- SYMULATOR SCENARIUSZY ---
+        # Alternatywni dostawcy żyją tylko w sesji – to "co jeśli", nie zmiana arkusza
+        st.write("---")
+        @st.fragment
+        def symulator_scenariuszy(df_obsluga):
+            with st.expander("🧮 Symulator scenariuszy (co jeśli?)"):
+                st.caption("Podaj alternatywne oferty dla kategorii (koszt całej kategorii). Symulator porówna wszystkie kombinacje ofert, liczby gości i wpłat zaliczek.")
+                if "df_warianty" not in st.session_state:
+                    st.session_state["df_warianty"] = pd.DataFrame({"Kategoria": pd.Series(dtype=str), "Wariant": pd.Series(dtype=str), "Koszt": pd.Series(dtype=float)})
+                kategorie_budzetu = sorted(df_obsluga["Kategoria"].dropna().astype(str).unique().tolist())
+                edited_warianty = st.data_editor(
+                    st.session_state["df_warianty"], num_rows="dynamic", use_container_width=True, key="editor_warianty",
+                    column_config={
+                        "Kategoria": st.column_config.SelectboxColumn("Kategoria", options=kategorie_budzetu, required=True),
+                        "Wariant": st.column_config.TextColumn("Wariant (np. nazwa dostawcy)"),
+                        "Koszt": st.column_config.NumberColumn("Koszt (zł)", min_value=0, step=100, format="%d zł"),
+                    }
+                )
+                sc1, sc2 = st.columns(2)
+                na_osobe = sc1.multiselect("Kategorie liczone od osoby", kategorie_budzetu, key="sym_na_osobe")
+                obecni = len(st.session_state["df_goscie"])
+                liczba_gosci = sc2.number_input("Obecna liczba gości", min_value=0, value=obecni, step=1, key="sym_liczba_gosci")
+                sc3, sc4 = st.columns(2)
+                tekst_gosci = sc3.text_input("Warianty liczby gości (po przecinku)", placeholder="np. 100, 120, 150", key="sym_goscie")
+                zaliczki_proc = sc4.multiselect("Wpłacamy teraz pozostałe zaliczki (%)", [0, 25, 50, 75, 100], default=[0], key="sym_zaliczki")
+                ile_pokazac = st.slider("Ile najtańszych scenariuszy pokazać", 5, 100, 20, key="sym_limit")
+
+                warianty = edited_warianty.dropna(subset=["Kategoria", "Koszt"])
+                warianty = [(k, w if isinstance(w, str) and w.strip() else f"Wariant {i + 1}", c)
+                            for i, (k, w, c) in enumerate(zip(warianty["Kategoria"], warianty["Wariant"], warianty["Koszt"]))]
+                liczby_gosci = [int(g) for g in tekst_gosci.replace(" ", "").split(",") if g.isdigit()] or [None]
+                symulator = SymulatorScenariuszy(df_obsluga, warianty, na_osobe, liczba_gosci)
+                try:
+                    wynik_sym = symulator.oblicz(liczby_gosci, [p / 100 for p in zaliczki_proc] or [0.0], limit=ile_pokazac)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    st.write(f"Porównano **{symulator.liczba_scenariuszy(liczby_gosci, zaliczki_proc or [0])}** scenariuszy. Najtańsze:")
+                    st.dataframe(
+                        wynik_sym, use_container_width=True, hide_index=True,
+                        column_config={k: st.column_config.NumberColumn(k, format="%.0f zł") for k in ["Łącznie", "Zapłacono", "Do zapłaty"]}
+                    )
+
+        symulator_scenariuszy(df_obsluga)
     else:
         st.info("Dodaj koszty, aby zobaczyć podsumowanie i wykresy.")
 
 # ==========================
 # ZAKŁADKA 3: LISTA ZADAŃ
 # ==========================
-with tab3:
+if sekcja == "✅ Lista Zadań":
     st.header("✅ Co trzeba zrobić?")
 
-    if "df_zadania" not in st.session_state:
-        st.session_state["df_zadania"] = load_zadania()
     df_zadania = st.session_state["df_zadania"]
 
-    def dodaj_zadanie():
-        tresc = st.session_state.get("todo_tresc", "")
-        termin = st.session_state.get("todo_data", date.today())
-        if tresc:
-            termin_str = termin.strftime("%Y-%m-%d")
-            nowy_wiersz = [tresc, termin_str, False]
-            df = st.session_state["df_zadania"].copy()
-            nowy = dict(zip(KOLUMNY_ZADANIA, nowy_wiersz))
-            df = pd.concat([df, pd.DataFrame([nowy])], ignore_index=True)
-            st.session_state["df_zadania"] = df
-
-            w_arkusz = nowy_wiersz.copy()
-            w_arkusz[2] = "Tak" if w_arkusz[2] else "Nie"
-            zapisz_nowy_wiersz(worksheet_zadania, w_arkusz)
-
-            st.toast(f"📅 Dodano zadanie: {tresc}")
-            st.session_state["todo_tresc"] = ""
-        else:
-            st.warning("Wpisz treść zadania!")
+    @st.fragment
+    def dodawanie_zadania(df_zadania):
+        def dodaj_zadanie():
+            tresc = st.session_state.get("todo_tresc", "")
+            termin = st.session_state.get("todo_data", date.today())
+            if tresc:
+                nowy_wiersz = [tresc, termin, False]
+                with zapis_lub_ostrzezenie(w_callbacku=True):
+                    dopisz_w_sesji("df_zadania", zapisz_nowe_wiersze("Zadania", [nowy_wiersz]))
+
+                    komunikat(f"📅 Dodano zadanie: {tresc}")
+                    st.session_state["todo_tresc"] = ""
+            else:
+                komunikat("Wpisz treść zadania!", "warning")
 
-    with st.expander("➕ Dodaj nowe zadanie", expanded=False):
-        c1, c2 = st.columns([2, 1])
-        with c1:
-            st.text_input("Co trzeba zrobić?", key="todo_tresc", placeholder="np. Kupić winietki")
-        with c2:
-            st.date_input("Termin wykonania", value=date.today(), key="todo_data")
-        st.button("Dodaj do listy", on_click=dodaj_zadanie, key="btn_zadania")
+        with st.expander("➕ Dodaj nowe zadanie", expanded=False):
+            c1, c2 = st.columns([2, 1])
+            with c1:
+                st.text_input("Co trzeba zrobić?", key="todo_tresc", placeholder="np. Kupić winietki")
+            with c2:
+                st.date_input("Termin wykonania", value=date.today(), key="todo_data")
+            st.button("Dodaj do listy", on_click=dodaj_zadanie, key="btn_zadania", disabled=tylko_do_odczytu())
+
+        pokaz_komunikat()
+        odswiez_po_zmianie("df_zadania", df_zadania)
+
+    dodawanie_zadania(df_zadania)
 
     st.write("---")
     st.subheader(f"Lista Zadań ({len(df_zadania)})")
 
-    df_todo_display = df_zadania.copy()
-    df_todo_display["Zadanie"] = df_todo_display["Zadanie"].astype(str).replace("nan", "")
-    df_todo_display["Termin"] = pd.to_datetime(df_todo_display["Termin"], errors='coerce').dt.date
-
-    col_sort1, col_sort2 = st.columns([1, 3])
-    with col_sort1:
-        st.write("**Filtruj / Sortuj:**")
-    with col_sort2:
-        tryb_todo = st.radio(
-            "Sortowanie Zadań",
-            options=["📅 Najpilniejsze (Data)", "❌ Do zrobienia", "✅ Zrobione", "🔤 Nazwa (A-Z)"],
-            label_visibility="collapsed",
-            horizontal=True,
-            key="sort_todo"
+    @st.fragment
+    def lista_zadan(df_zadania):
+        df_todo_display = df_zadania.copy()
+        df_todo_display["Termin"] = pd.to_datetime(df_todo_display["Termin"], errors='coerce').dt.date
+
+        col_sort1, col_sort2 = st.columns([1, 3])
+        with col_sort1:
+            st.write("**Filtruj / Sortuj:**")
+        with col_sort2:
+            tryb_todo = st.radio(
+                "Sortowanie Zadań",
+                options=["📅 Najpilniejsze (Data)", "❌ Do zrobienia", "✅ Zrobione", "🔤 Nazwa (A-Z)"],
+                label_visibility="collapsed",
+                horizontal=True,
+                key="sort_todo"
+            )
+
+        if tryb_todo == "📅 Najpilniejsze (Data)":
+            df_todo_display = df_todo_display.sort_values(by="Termin", ascending=True)
+        elif tryb_todo == "❌ Do zrobienia":
+            df_todo_display = df_todo_display.sort_values(by="Czy_Zrobione", ascending=True)
+        elif tryb_todo == "✅ Zrobione":
+            df_todo_display = df_todo_display.sort_values(by="Czy_Zrobione", ascending=False)
+        elif tryb_todo == "🔤 Nazwa (A-Z)":
+            df_todo_display = df_todo_display.sort_values(by="Zadanie", ascending=True)
+
+        edytowane_zadania = st.data_editor(
+            df_todo_display,
+            num_rows="dynamic",
+            column_config={
+                "Zadanie": st.column_config.TextColumn("Treść zadania", required=True, width="large"),
+                "Termin": st.column_config.DateColumn("Termin", format="DD.MM.YYYY", step=1),
+                "Czy_Zrobione": st.column_config.CheckboxColumn("Zrobione?", width="small"),
+                "ID": None,
+            },
+            use_container_width=True,
+            hide_index=True,
+            key="editor_zadania"
         )
 
-    if tryb_todo == "📅 Najpilniejsze (Data)":
-        df_todo_display = df_todo_display.sort_values(by="Termin", ascending=True)
-    elif tryb_todo == "❌ Do zrobienia":
-        df_todo_display = df_todo_display.sort_values(by="Czy_Zrobione", ascending=True)
-    elif tryb_todo == "✅ Zrobione":
-        df_todo_display = df_todo_display.sort_values(by="Czy_Zrobione", ascending=False)
-    elif tryb_todo == "🔤 Nazwa (A-Z)":
-        df_todo_display = df_todo_display.sort_values(by="Zadanie", ascending=True)
-
-    edytowane_zadania = st.data_editor(
-        df_todo_display,
-        num_rows="dynamic",
-        column_config={
-            "Zadanie": st.column_config.TextColumn("Treść zadania", required=True, width="large"),
-            "Termin": st.column_config.DateColumn("Termin", format="DD.MM.YYYY", step=1),
-            "Czy_Zrobione": st.column_config.CheckboxColumn("Zrobione?", width="small")
-        },
-        use_container_width=True,
-        hide_index=True,
-        key="editor_zadania"
-    )
+        if st.button("💾 Zapisz zmiany", key="save_zadania", disabled=tylko_do_odczytu()):
+            df_to_save_todo = edytowane_zadania.copy()
+            df_to_save_todo = df_to_save_todo[df_to_save_todo["Zadanie"].str.strip() != ""]
+            with zapis_lub_ostrzezenie():
+                zapisz_edycje("Zadania", "df_zadania", df_todo_display, df_to_save_todo)
+                st.success("Zaktualizowano listę zadań!")
+                st.rerun()
 
-    if st.button("💾 Zapisz zmiany", key="save_zadania"):
-        df_to_save_todo = edytowane_zadania.copy()
-        df_to_save_todo = df_to_save_todo[df_to_save_todo["Zadanie"].str.strip() != ""]
-        df_to_save_todo["Termin"] = pd.to_datetime(df_to_save_todo["Termin"]).dt.strftime("%Y-%m-%d")
-        df_arkusz = df_to_save_todo.copy()
-        df_arkusz["Czy_Zrobione"] = df_arkusz["Czy_Zrobione"].apply(lambda x: "Tak" if x else "Nie")
-        df_arkusz = df_arkusz.fillna("")
-        aktualizuj_caly_arkusz(worksheet_zadania, df_arkusz)
-
-        df_to_save_todo["Czy_Zrobione"] = df_to_save_todo["Czy_Zrobione"].apply(lambda x: x == True)
-        st.session_state["df_zadania"] = df_to_save_todo
-        st.success("Zaktualizowano listę zadań!")
-        st.rerun()
+    lista_zadan(df_zadania)
 
     if not df_zadania.empty:
         total = len(df_zadania)
@@ -835,33 +1012,69 @@ with tab3:
 # ==========================
 # ZAKŁADKA 4: STOŁY
 # ==========================
-with tab4:
+if sekcja == "🍽️ Rozplanowanie Stołów":
     st.header("🍽️ Rozsadzanie Gości przy Stołach")
 
-    if "df_stoly" not in st.session_state:
-        st.session_state["df_stoly"] = load_stoly()
     df_stoly = st.session_state["df_stoly"]
+    plan = aktualny_plan()
+
+    duplikaty = plan.duplikaty()
+    if duplikaty:
+        opis = "; ".join(f"{gosc} ({', '.join(f'{s} m.{m}' for s, m in miejsca)})" for gosc, miejsca in duplikaty)
+        st.warning(f"⚠️ Goście posadzeni więcej niż raz: {opis}")
+
+    with st.expander("🤖 Auto-rozsadź potwierdzonych gości"):
+        st.caption("Osoby towarzyszące zawsze siadają obok swojej pary. Obecny układ wszystkich stołów zostanie zastąpiony.")
+        tekst_grup = st.text_area("Grupy, które powinny siedzieć razem (jedna grupa w linii, imiona po przecinku)", key="auto_grupy")
+        tekst_nie_razem = st.text_area("Osoby, które nie mogą siedzieć przy jednym stole (jedna para w linii)", key="auto_nie_razem")
+        if st.button("🤖 Auto-rozsadź", disabled=df_stoly.empty or tylko_do_odczytu()):
+            wynik = rozsadz(
+                st.session_state["df_goscie"], df_stoly,
+                grupy=wczytaj_grupy(tekst_grup), nie_razem=wczytaj_grupy(tekst_nie_razem),
+            )
+            df_miejsca = st.session_state["df_miejsca"]
+            for stol, lista in wynik.listy(df_stoly).items():
+                df_miejsca = uklad_po_zmianie(df_miejsca, plan, stol, lista)
+            with zapis_lub_ostrzezenie():
+                if magazyn.istnieje("Miejsca"):
+                    synchronizuj_arkusz("Miejsca", "df_miejsca", df_miejsca)
+                else:
+                    synchronizuj_arkusz("Stoly", "df_stoly", listy_stolow(df_stoly, PlanMiejsc(df_miejsca, st.session_state["df_goscie"])))
+                    st.session_state["df_miejsca"] = df_miejsca
+                if wynik.nieposadzeni:
+                    st.session_state["komunikat_rozsadzania"] = f"Zabrakło miejsc dla {len(wynik.nieposadzeni)} gości."
+                elif wynik.konflikty or wynik.rozbite:
+                    st.session_state["komunikat_rozsadzania"] = (
+                        f"Nie udało się spełnić wszystkich życzeń: konflikty {wynik.konflikty}, osoby poza swoją grupą {wynik.rozbite}."
+                    )
+                else:
+                    st.session_state["komunikat_rozsadzania"] = None
+                st.rerun()
+        if st.session_state.get("komunikat_rozsadzania"):
+            st.warning(st.session_state["komunikat_rozsadzania"])
 
     col_left, col_right = st.columns([1, 2])
 
     with col_left:
-        st.subheader("➕ Dodaj Stół")
-        with st.form("dodaj_stol_form"):
-            nr_stolu = st.text_input("Numer/Nazwa Stołu", placeholder="np. Stół 1 lub Wiejski")
-            ksztalt = st.selectbox("Kształt", ["Okrągły", "Prostokątny"])
-            miejsca = st.number_input("Liczba Miejsc", min_value=1, max_value=24, value=8)
-            submitted = st.form_submit_button("Dodaj Stół")
-
-            if submitted and nr_stolu:
-                pusta_lista = ";".join(["" for _ in range(miejsca)])
-                nowy_wiersz = [nr_stolu, ksztalt, miejsca, pusta_lista]
-                df = st.session_state["df_stoly"].copy()
-                nowy = dict(zip(KOLUMNY_STOLY, nowy_wiersz))
-                df = pd.concat([df, pd.DataFrame([nowy])], ignore_index=True)
-                st.session_state["df_stoly"] = df
-
-                zapisz_nowy_wiersz(worksheet_stoly, nowy_wiersz)
-                st.toast(f"Dodano stół: {nr_stolu}")
+        @st.fragment
+        def dodawanie_stolu(df_stoly):
+            st.subheader("➕ Dodaj Stół")
+            with st.form("dodaj_stol_form"):
+                nr_stolu = st.text_input("Numer/Nazwa Stołu", placeholder="np. Stół 1 lub Wiejski")
+                ksztalt = st.selectbox("Kształt", ["Okrągły", "Prostokątny"])
+                miejsca = st.number_input("Liczba Miejsc", min_value=1, max_value=24, value=8)
+                submitted = st.form_submit_button("Dodaj Stół", disabled=tylko_do_odczytu())
+
+                if submitted and nr_stolu:
+                    pusta_lista = ";".join(["" for _ in range(miejsca)])
+                    nowy_wiersz = [nr_stolu, ksztalt, miejsca, pusta_lista]
+                    with zapis_lub_ostrzezenie():
+                        dopisz_w_sesji("df_stoly", zapisz_nowe_wiersze("Stoly", [nowy_wiersz]))
+                        st.toast(f"Dodano stół: {nr_stolu}")
+
+            odswiez_po_zmianie("df_stoly", df_stoly)
+
+        dodawanie_stolu(df_stoly)
 
         st.write("---")
         st.subheader("📋 Lista Stołów")
@@ -872,6 +1085,13 @@ with tab4:
             wybrany_stol_id = None
             st.info("Brak stołów. Dodaj pierwszy!")
 
+        nieposadzeni = plan.nieposadzeni()
+        with st.expander(f"🪑 Potwierdzeni bez miejsca ({len(nieposadzeni)})"):
+            if nieposadzeni:
+                st.write("\n".join(f"- {g}" for g in nieposadzeni))
+            else:
+                st.caption("Wszyscy potwierdzeni goście mają miejsca.")
+
     with col_right:
         if wybrany_stol_id:
             st.subheader(f"Edycja: {wybrany_stol_id}")
@@ -879,190 +1099,185 @@ with tab4:
             row = df_stoly[df_stoly["Numer"] == wybrany_stol_id].iloc[0]
             max_miejsc = int(row["Liczba_Miejsc"])
             ksztalt_stolu = row["Ksztalt"]
-
-            obecni_goscie_str = str(row["Goscie_Lista"])
-            if ";" in obecni_goscie_str:
-                lista_gosci = obecni_goscie_str.split(";")
-            else:
-                lista_gosci = [""] * max_miejsc
-
-            if len(lista_gosci) < max_miejsc:
-                lista_gosci += [""] * (max_miejsc - len(lista_gosci))
-            lista_gosci = lista_gosci[:max_miejsc]
-
-            with st.expander("📝 Przypisz gości do miejsc", expanded=True):
-                nowa_lista_gosci = []
-                c_a, c_b = st.columns(2)
-                for i in range(max_miejsc):
-                    col_to_use = c_a if i % 2 == 0 else c_b
-                    with col_to_use:
-                        val = st.text_input(f"Miejsce {i+1}", value=lista_gosci[i], key=f"seat_{wybrany_stol_id}_{i}")
-                        nowa_lista_gosci.append(val)
-
-                if st.button("💾 Zapisz układ stołu"):
-                    zapis_string = ";".join(nowa_lista_gosci)
-                    idx = int(df_stoly[df_stoly["Numer"] == wybrany_stol_id].index[0] + 2)
-                    worksheet_stoly.update_cell(idx, 4, zapis_string)
-                    st.cache_data.clear()
-                    df = st.session_state["df_stoly"].copy()
-                    mask = df["Numer"] == wybrany_stol_id
-                    df.loc[mask, "Goscie_Lista"] = zapis_string
-                    st.session_state["df_stoly"] = df
-                    st.success("Zapisano!")
-                    st.rerun()
+            id_stolu = row["ID"]
+
+            def ustaw_miejsce(klucz, nazwa):
+                st.session_state[klucz] = nazwa
+
+            def podpowiedzi_miejsca(klucz, wpisane):
+                # Wpisanego imienia nie ma na liście gości – podpowiadamy najbliższe nazwiska z indeksu
+                podpowiedzi = aktualny_indeks_gosci().szukaj(wpisane, limit=3)
+                if not podpowiedzi:
+                    st.caption(f"⚠️ „{wpisane}” nie ma na liście gości.")
+                    return
+                st.caption(f"⚠️ „{wpisane}” nie ma na liście gości. Czy chodziło o:")
+                for kolumna, (id_goscia, nazwa) in zip(st.columns(len(podpowiedzi)), podpowiedzi):
+                    kolumna.button(nazwa, key=f"podp_{klucz}_{id_goscia}", on_click=ustaw_miejsce, args=(klucz, nazwa))
+
+            @st.fragment
+            def edytor_stolu(stol, id_stolu, ksztalt_stolu, max_miejsc):
+                # Pola miejsc i podgląd przeliczają się same; zapis przebudowuje całą stronę (plan sali, nieposadzeni)
+                plan = aktualny_plan()
+                lista_gosci = plan.przy_stole(stol, max_miejsc)
+
+                with st.expander("📝 Przypisz gości do miejsc", expanded=True):
+                    nowa_lista_gosci = []
+                    c_a, c_b = st.columns(2)
+                    for i in range(max_miejsc):
+                        col_to_use = c_a if i % 2 == 0 else c_b
+                        with col_to_use:
+                            val = st.text_input(f"Miejsce {i+1}", value=lista_gosci[i], key=f"seat_{stol}_{i}")
+                            nowa_lista_gosci.append(val)
+                            if val.strip() and not plan.znajdz(val):
+                                podpowiedzi_miejsca(f"seat_{stol}_{i}", val)
+
+                    # Miejsca wskazują gości po ID – imienia spoza listy gości nie da się zapisać
+                    ids, nieznane = plan.id_z_pol(stol, nowa_lista_gosci)
+                    if nieznane:
+                        st.caption("Popraw imiona spoza listy gości, żeby zapisać układ.")
+                    if st.button("💾 Zapisz układ stołu", disabled=tylko_do_odczytu() or bool(nieznane)):
+                        df_miejsca = uklad_po_zmianie(st.session_state["df_miejsca"], plan, stol, ids)
+                        with zapis_lub_ostrzezenie():
+                            if magazyn.istnieje("Miejsca"):
+                                # Zmienione miejsca = zmienione rekordy, reszta arkusza zostaje nietknięta
+                                synchronizuj_arkusz("Miejsca", "df_miejsca", df_miejsca)
+                            else:
+                                zapis_string = ";".join(nowa_lista_gosci)
+                                magazyn.aktualizuj_rekord("Stoly", id_stolu, {"Goscie_Lista": zapis_string})
+                                df = st.session_state["df_stoly"].copy()
+                                df.loc[df["ID"] == id_stolu, "Goscie_Lista"] = zapis_string
+                                st.session_state["df_stoly"] = df
+                                st.session_state["df_miejsca"] = df_miejsca
+                            st.success("Zapisano!")
+                            st.rerun()
+
+                st.write("---")
+                st.write(f"**Podgląd: {ksztalt_stolu} ({max_miejsc} os.)**")
+                st.image(obraz_stolu(stol, ksztalt_stolu, nowa_lista_gosci), use_container_width=True)
+
+            edytor_stolu(wybrany_stol_id, id_stolu, ksztalt_stolu, max_miejsc)
 
             st.write("---")
-            st.write(f"**Podgląd: {ksztalt_stolu} ({max_miejsc} os.)**")
-            fig, ax = plt.subplots(figsize=(20, 16))
-            fig.patch.set_alpha(0)
-            ax.patch.set_alpha(0)
-            ax.set_aspect('equal')
-            ax.axis('off')
-            table_color = '#9D5B03'
-            seat_color = '#1B4D3E'
-            text_color = 'white'
-            edge_color = '#7B3F00'
-            if ksztalt_stolu == "Okrągły":
-                R_STOL = 1.1; R_KRZESLO_SRODEK = 1.4; R_TEKST = 1.65
-                circle = plt.Circle((0, 0), R_STOL, color=table_color, ec=edge_color, lw=4); ax.add_artist(circle)
-                ax.text(0, 0, wybrany_stol_id, ha='center', va='center', fontsize=24, fontweight='bold', color='white')
-                for i in range(max_miejsc):
-                    angle = 2 * np.pi * i / max_miejsc
-                    cx = R_KRZESLO_SRODEK * np.cos(angle); cy = R_KRZESLO_SRODEK * np.sin(angle)
-                    seat = plt.Circle((cx, cy), 0.21, color=seat_color, alpha=1.0); ax.add_artist(seat)
-                    guest_name = nowa_lista_gosci[i]
-                    tx = R_TEKST * np.cos(angle); ty = R_TEKST * np.sin(angle)
-                    rot_deg = np.degrees(angle)
-                    if 90 < rot_deg < 270: rot_deg += 180; ha = 'right'
-                    else: ha = 'left'
-                    if guest_name:
-                        ax.text(tx, ty, guest_name, ha=ha, va='center', rotation=rot_deg, rotation_mode='anchor', fontsize=16, color=text_color, fontweight='bold')
+            if st.button("🗑️ Usuń ten stół", disabled=tylko_do_odczytu()):
+                with zapis_lub_ostrzezenie():
+                    magazyn.usun_rekord("Stoly", id_stolu)
+                    df = st.session_state["df_stoly"]
+                    df = df[df["ID"] != id_stolu]
+                    st.session_state["df_stoly"] = df.reset_index(drop=True)
+                    df_miejsca = bez_stolu(st.session_state["df_miejsca"], wybrany_stol_id)
+                    if magazyn.istnieje("Miejsca"):
+                        synchronizuj_arkusz("Miejsca", "df_miejsca", df_miejsca)
                     else:
-                        ax.text(cx, cy, str(i+1), ha='center', va='center', fontsize=16, color='white')
-                ax.set_xlim(-2.2, 2.2); ax.set_ylim(-2.2, 2.2)
-            else:
-                W_STOL = 2.0; H_STOL = 4.0
-                rect = plt.Rectangle((-W_STOL/2, -H_STOL/2), W_STOL, H_STOL, color=table_color, ec=edge_color, lw=4); ax.add_artist(rect)
-                ax.text(0, 0, wybrany_stol_id, ha='center', va='center', rotation=90, fontsize=24, fontweight='bold', color='white')
-                side_count = (max_miejsc + 1) // 2
-                DIST_X = 1.3
-                for i in range(max_miejsc):
-                    guest_name = nowa_lista_gosci[i]
-                    if i < side_count:
-                        x_pos = -DIST_X; y_pos = np.linspace(-H_STOL/2 + 0.4, H_STOL/2 - 0.4, side_count)[i]; ha = 'right'; text_offset_x = -0.25
-                    else:
-                        x_pos = DIST_X; y_pos = np.linspace(-H_STOL/2 + 0.4, H_STOL/2 - 0.4, max_miejsc - side_count)[i - side_count]; ha = 'left'; text_offset_x = 0.25
-                    seat = plt.Circle((x_pos, y_pos), 0.21, color=seat_color, alpha=1.0); ax.add_artist(seat)
-                    if guest_name:
-                        ax.text(x_pos + text_offset_x, y_pos, guest_name, ha=ha, va='center', fontsize=16, color=text_color, fontweight='bold')
-                    else:
-                        ax.text(x_pos, y_pos, str(i+1), ha='center', va='center', fontsize=16, color='white')
-                ax.set_xlim(-2.8, 2.8); ax.set_ylim(-2.8, 2.8)
-            st.pyplot(fig, use_container_width=True)
+                        st.session_state["df_miejsca"] = df_miejsca
+                    st.warning("Usunięto stół!")
+                    st.rerun()
 
-            st.write("---")
-            if st.button("🗑️ Usuń ten stół"):
-                idx = int(df_stoly[df_stoly["Numer"] == wybrany_stol_id].index[0] + 2)
-                worksheet_stoly.delete_rows(idx)
-                df = st.session_state["df_stoly"].copy()
-                df = df[df["Numer"] != wybrany_stol_id]
-                st.session_state["df_stoly"] = df
-                st.cache_data.clear()
-                st.warning("Usunięto stół!")
-                st.rerun()
+    # --- PLAN CAŁEJ SALI ---
+    st.write("---")
+    if not df_stoly.empty and st.toggle("🗺️ Pokaż plan całej sali", key="plan_sali"):
+        stoly_sali = [
+            (numer, ksztalt, plan.przy_stole(numer, int(n)))
+            for numer, ksztalt, n in zip(df_stoly["Numer"], df_stoly["Ksztalt"].astype(str), df_stoly["Liczba_Miejsc"])
+        ]
+        st.image(obraz_sali(stoly_sali), use_container_width=True)
+        if st.toggle("Przygotuj obraz w wysokiej rozdzielczości do wydruku", key="plan_sali_druk"):
+            st.download_button(
+                label="📥 Pobierz plan sali (PNG)",
+                data=obraz_sali(stoly_sali, dpi=300),
+                file_name="plan_sali.png",
+                mime="image/png"
+            )
 
 # ==========================
 # ZAKŁADKA 5: HARMONOGRAM DNIA
 # ==========================
-with tab5:
+if sekcja == "⏰ Harmonogram Dnia":
     st.header("⏰ Harmonogram Dnia Ślubu (minuta po minucie)")
 
-    if "df_harmonogram" not in st.session_state:
-        st.session_state["df_harmonogram"] = load_harmonogram()
     df_harm = st.session_state["df_harmonogram"]
 
-    def dodaj_wydarzenie():
-        godz = st.session_state.get("harm_godz", "")
-        czyn = st.session_state.get("harm_czyn", "")
-        uwagi = st.session_state.get("harm_uwagi", "")
-        if godz and czyn:
-            nowy = [godz, czyn, uwagi]
-            df = st.session_state["df_harmonogram"].copy()
-            nowy_dict = dict(zip(KOLUMNY_HARMONOGRAM, nowy))
-            df = pd.concat([df, pd.DataFrame([nowy_dict])], ignore_index=True)
-            st.session_state["df_harmonogram"] = df
-
-            w_arkusz = nowy.copy()
-            zapisz_nowy_wiersz(worksheet_harmonogram, w_arkusz)
-
-            st.toast(f"✅ Dodano: {godz} – {czyn}")
-            st.session_state["harm_godz"] = ""
-            st.session_state["harm_czyn"] = ""
-            st.session_state["harm_uwagi"] = ""
-        else:
-            st.warning("Wpisz godzinę i czynność!")
+    @st.fragment
+    def dodawanie_wydarzenia(df_harm):
+        def dodaj_wydarzenie():
+            godz = st.session_state.get("harm_godz", "")
+            czyn = st.session_state.get("harm_czyn", "")
+            uwagi = st.session_state.get("harm_uwagi", "")
+            if godz and czyn:
+                nowy = [godz, czyn, uwagi]
+                with zapis_lub_ostrzezenie(w_callbacku=True):
+                    dopisz_w_sesji("df_harmonogram", zapisz_nowe_wiersze("Harmonogram", [nowy]))
+
+                    komunikat(f"✅ Dodano: {godz} – {czyn}")
+                    st.session_state["harm_godz"] = ""
+                    st.session_state["harm_czyn"] = ""
+                    st.session_state["harm_uwagi"] = ""
+            else:
+                komunikat("Wpisz godzinę i czynność!", "warning")
 
-    with st.expander("➕ Dodaj nowe wydarzenie", expanded=False):
-        c1, c2, c3 = st.columns([1,2,2])
-        with c1:
-            st.text_input("Godzina (np. 16:30)", key="harm_godz", placeholder="HH:MM")
-        with c2:
-            st.text_input("Czynność", key="harm_czyn", placeholder="np. Pierwszy taniec")
-        with c3:
-            st.text_input("Uwagi (opcjonalnie)", key="harm_uwagi", placeholder="dla kogo, gdzie...")
-        st.button("Dodaj do harmonogramu", on_click=dodaj_wydarzenie, key="btn_harm")
+        with st.expander("➕ Dodaj nowe wydarzenie", expanded=False):
+            c1, c2, c3 = st.columns([1,2,2])
+            with c1:
+                st.text_input("Godzina (np. 16:30)", key="harm_godz", placeholder="HH:MM")
+            with c2:
+                st.text_input("Czynność", key="harm_czyn", placeholder="np. Pierwszy taniec")
+            with c3:
+                st.text_input("Uwagi (opcjonalnie)", key="harm_uwagi", placeholder="dla kogo, gdzie...")
+            st.button("Dodaj do harmonogramu", on_click=dodaj_wydarzenie, key="btn_harm", disabled=tylko_do_odczytu())
+
+        pokaz_komunikat()
+        odswiez_po_zmianie("df_harmonogram", df_harm)
+
+    dodawanie_wydarzenia(df_harm)
 
     st.write("---")
     st.subheader(f"📅 Harmonogram ({len(df_harm)} pozycji)")
 
-    df_disp_harm = df_harm.copy()
-    # Usuń ewentualną kolumnę ID
-    if 'ID' in df_disp_harm.columns:
-        df_disp_harm = df_disp_harm.drop(columns=['ID'])
+    @st.fragment
+    def lista_wydarzen(df_harm):
+        df_disp_harm = df_harm.copy()
 
-    # Sortowanie po godzinie
-    try:
-        df_disp_harm["czas_sort"] = pd.to_datetime(df_disp_harm["Godzina"], format="%H:%M", errors='coerce')
-        df_disp_harm = df_disp_harm.sort_values("czas_sort").drop(columns=["czas_sort"])
-    except:
-        df_disp_harm = df_disp_harm.sort_values("Godzina")
-
-    # Konwersja wszystkich kolumn na string – zapobiega błędom typów w data_editor
-    df_disp_harm = df_disp_harm.fillna("").astype(str)
-
-    edited_harm = st.data_editor(
-        df_disp_harm,
-        num_rows="dynamic",
-        column_config={
-            "Godzina": st.column_config.TextColumn("Godzina", required=True, width="small"),
-            "Czynność": st.column_config.TextColumn("Czynność", required=True, width="large"),
-            "Uwagi": st.column_config.TextColumn("Uwagi", width="large")
-        },
-        use_container_width=True,
-        hide_index=True,
-        key="editor_harm"
-    )
+        # Sortowanie po godzinie
+        try:
+            df_disp_harm["czas_sort"] = pd.to_datetime(df_disp_harm["Godzina"], format="%H:%M", errors='coerce')
+            df_disp_harm = df_disp_harm.sort_values("czas_sort").drop(columns=["czas_sort"])
+        except:
+            df_disp_harm = df_disp_harm.sort_values("Godzina")
 
-    if st.button("💾 Zapisz harmonogram", key="save_harm"):
-        to_save = edited_harm.copy()
-        to_save = to_save[to_save["Godzina"].str.strip() != ""]
-        to_save = to_save[to_save["Czynność"].str.strip() != ""]
-        to_save = to_save.fillna("")
-        if 'ID' in to_save.columns:
-            to_save = to_save.drop(columns=['ID'])
-        aktualizuj_caly_arkusz(worksheet_harmonogram, to_save)
-        st.session_state["df_harmonogram"] = to_save
-        st.success("Zapisano harmonogram!")
-        st.rerun()
+        # Konwersja wszystkich kolumn na string – zapobiega błędom typów w data_editor
+        df_disp_harm = df_disp_harm.fillna("").astype(str)
+
+        edited_harm = st.data_editor(
+            df_disp_harm,
+            num_rows="dynamic",
+            column_config={
+                "Godzina": st.column_config.TextColumn("Godzina", required=True, width="small"),
+                "Czynność": st.column_config.TextColumn("Czynność", required=True, width="large"),
+                "Uwagi": st.column_config.TextColumn("Uwagi", width="large"),
+                "ID": None,
+            },
+            use_container_width=True,
+            hide_index=True,
+            key="editor_harm"
+        )
+
+        if st.button("💾 Zapisz harmonogram", key="save_harm", disabled=tylko_do_odczytu()):
+            to_save = edited_harm.copy()
+            to_save = to_save[to_save["Godzina"].str.strip() != ""]
+            to_save = to_save[to_save["Czynność"].str.strip() != ""]
+            to_save = to_save.fillna("")
+            with zapis_lub_ostrzezenie():
+                zapisz_edycje("Harmonogram", "df_harmonogram", df_disp_harm, to_save)
+                st.success("Zapisano harmonogram!")
+                st.rerun()
+
+    lista_wydarzen(df_harm)
 
 # ==========================
 # ZAKŁADKA 6: MENU I DIETY
 # ==========================
-with tab6:
+if sekcja == "🍽️ Diety":
     st.header("🍽️ Zarządzanie dietami")
 
-    if "df_goscie" not in st.session_state:
-        st.session_state["df_goscie"] = load_goscie()
     df_goscie = st.session_state["df_goscie"]
 
     # Filtruj tylko gości z potwierdzonym przybyciem (opcjonalnie)
@@ -1072,70 +1287,101 @@ with tab6:
     else:
         st.write(f"**Liczba potwierdzonych gości:** {len(potwierdzeni)}")
 
-        # Edytor diet
-        edited_diety = st.data_editor(
-            potwierdzeni[["Imie_Nazwisko", "Dieta"]],
-            num_rows="fixed",
-            use_container_width=True,
-            hide_index=True,
-            key="editor_diety",
-            column_config={
-                "Imie_Nazwisko": st.column_config.TextColumn("Gość", disabled=True),
-                "Dieta": st.column_config.SelectboxColumn(
-                    "Opcja diety",
-                    options=["", "Mięsna", "Wegetariańska", "Wegańska", "Bezglutenowa", "Inna"],
-                    required=False
+        @st.fragment
+        def edytor_diet(potwierdzeni):
+            # Edytor diet
+            edited_diety = st.data_editor(
+                potwierdzeni[["Imie_Nazwisko", "Dieta", "ID"]],
+                num_rows="fixed",
+                use_container_width=True,
+                hide_index=True,
+                key="editor_diety",
+                column_config={
+                    "Imie_Nazwisko": st.column_config.TextColumn("Gość", disabled=True),
+                    "ID": None,
+                    "Dieta": st.column_config.SelectboxColumn(
+                        "Opcja diety",
+                        options=["", "Mięsna", "Wegetariańska", "Wegańska", "Bezglutenowa", "Inna"],
+                        required=False
+                    )
+                }
+            )
+
+            # Przycisk zapisu zmian do arkusza
+            if st.button("💾 Zapisz diety", key="save_diety", disabled=tylko_do_odczytu()):
+                # Diety nanosimy po ID jednym mapowaniem; do arkusza idą tylko zmienione komórki Dieta (jedna paczka)
+                df_all, zmiany = scal_kolumne("Goscie", st.session_state["df_goscie"], edited_diety, "Dieta")
+                with zapis_lub_ostrzezenie():
+                    magazyn.zapisz_rekordy("Goscie", zmiany)
+                    st.session_state["df_goscie"] = df_all
+
+                    st.success("Diety zapisane!")
+                    st.rerun()
+
+            # Podsumowanie dla cateringu
+            st.write("---")
+            st.subheader("📊 Podsumowanie diet (potwierdzeni goście)")
+
+            dieta_counts = edited_diety["Dieta"].value_counts().reset_index()
+            dieta_counts.columns = ["Opcja", "Liczba"]
+
+            # Wyświetl w ładnej tabelce
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                st.dataframe(dieta_counts, hide_index=True, use_container_width=True)
+            with col2:
+                # Prosty wykres kołowy Altair
+                if not dieta_counts.empty:
+                    with mierz("altair: diety"):
+                        chart = alt.Chart(dieta_counts).mark_arc(innerRadius=30).encode(
+                            theta=alt.Theta(field="Liczba", type="quantitative"),
+                            color=alt.Color(field="Opcja", type="nominal"),
+                            tooltip=["Opcja", "Liczba"]
+                        ).properties(width=250, height=250).interactive()
+                        st.altair_chart(chart, use_container_width=True)
+
+            # Eksport do pliku dla kuchni
+            st.write("---")
+            if st.button("📄 Pobierz listę diet (CSV)"):
+                csv = pamiec_eksportow.pobierz(
+                    "csv", skrot_danych(dieta_counts), lambda: dieta_counts.to_csv(index=False).encode('utf-8')
+                )
+                st.download_button(
+                    label="📥 Pobierz CSV",
+                    data=csv,
+                    file_name="podsumowanie_diet.csv",
+                    mime="text/csv"
                 )
-            }
-        )
 
-        # Przycisk zapisu zmian do arkusza
-        if st.button("💾 Zapisz diety", key="save_diety"):
-            # Zaktualizuj oryginalny DataFrame
-            df_all = st.session_state["df_goscie"].copy()
-            for index, row in edited_diety.iterrows():
-                mask = df_all["Imie_Nazwisko"] == row["Imie_Nazwisko"]
-                df_all.loc[mask, "Dieta"] = row["Dieta"]
-            st.session_state["df_goscie"] = df_all
-
-            # Zapisz do arkusza (całość)
-            df_arkusz = df_all.copy()
-            df_arkusz["RSVP"] = df_arkusz["RSVP"].apply(lambda x: "Tak" if x else "Nie")
-            df_arkusz["Zaproszenie_Wyslane"] = df_arkusz["Zaproszenie_Wyslane"].apply(lambda x: "Tak" if x else "Nie")
-            df_arkusz = df_arkusz.fillna("")
-            aktualizuj_caly_arkusz(worksheet_goscie, df_arkusz)
-
-            st.success("Diety zapisane!")
-            st.rerun()
-
-        # Podsumowanie dla cateringu
-        st.write("---")
-        st.subheader("📊 Podsumowanie diet (potwierdzeni goście)")
-
-        dieta_counts = edited_diety["Dieta"].value_counts().reset_index()
-        dieta_counts.columns = ["Opcja", "Liczba"]
-
-        # Wyświetl w ładnej tabelce
-        col1, col2 = st.columns([2, 1])
-        with col1:
-            st.dataframe(dieta_counts, hide_index=True, use_container_width=True)
-        with col2:
-            # Prosty wykres kołowy Altair
-            if not dieta_counts.empty:
-                chart = alt.Chart(dieta_counts).mark_arc(innerRadius=30).encode(
-                    theta=alt.Theta(field="Liczba", type="quantitative"),
-                    color=alt.Color(field="Opcja", type="nominal"),
-                    tooltip=["Opcja", "Liczba"]
-                ).properties(width=250, height=250).interactive()
-                st.altair_chart(chart, use_container_width=True)
-
-        # Eksport do pliku dla kuchni
-        st.write("---")
-        if st.button("📄 Pobierz listę diet (CSV)"):
-            csv = dieta_counts.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📥 Pobierz CSV",
-                data=csv,
-                file_name="podsumowanie_diet.csv",
-                mime="text/csv"
-            )
+        edytor_diet(potwierdzeni)
+
+
+# ==========================================================
+# PROFIL PRZEBIEGU (pasek boczny)
+# ==========================================================
+def pokaz_profil(przebieg):
+    # Ten przebieg (ms) obok percentyli z ostatnich pomiarów wszystkich sesji
+    percentyle = profil.percentyle()
+    calosc = percentyle["przebieg"]
+    st.caption(f"Przebieg skryptu: {przebieg.czas * 1000:.0f} ms (p50 {calosc['p50']:.0f} ms, p90 {calosc['p90']:.0f} ms)")
+    odcinki = pd.DataFrame([
+        {"Odcinek": nazwa, "ms": round(czas * 1000, 1), "×": ile, **{p: percentyle[nazwa][p] for p in ("p50", "p90", "p99")}}
+        for nazwa, (czas, ile) in sorted(przebieg.zsumowane().items(), key=lambda o: -o[1][0])
+    ], columns=["Odcinek", "ms", "×", "p50", "p90", "p99"])
+    st.dataframe(odcinki, hide_index=True, use_container_width=True)
+    with profil.blokada:
+        lacznie = {arkusz: list(licznik) for arkusz, licznik in profil.api.items()}
+    if lacznie:
+        st.caption("Google Sheets: wywołania i dane (ten przebieg / od startu)")
+        st.dataframe(pd.DataFrame([
+            {"Arkusz": arkusz, "Wywołania": f"{przebieg.api.get(arkusz, [0, 0])[0]} / {w}",
+             "kB": f"{przebieg.api.get(arkusz, [0, 0])[1] / 1024:.1f} / {b / 1024:.1f}"}
+            for arkusz, (w, b) in sorted(lacznie.items())
+        ]), hide_index=True, use_container_width=True)
+
+przebieg = profil.zakoncz(sekcja=sekcja)
+with st.sidebar:
+    st.write("---")
+    st.toggle("⏱ Profil", key="profil", help="Czasy wczytywania, wykresów, PDF i wywołań Google Sheets w tym przebiegu.")
+    if przebieg is not None and st.session_state.get("profil"):
+        pokaz_profil(przebieg)
@@ -0,0 +1,349 @@
+import sys
+import time
+
+import pandas as pd
+
+# ==========================================================
+# BENCHMARKI (uruchamianie: python benchmarki.py [nazwa ...])
+# ==========================================================
+# Każdy benchmark zwraca czas w sekundach (wypisywany w ms); przekroczenie limitu kończy skrypt kodem 1.
+BENCHMARKI = {}
+
+
+def benchmark(nazwa, limit):
+    def dekorator(funkcja):
+        BENCHMARKI[nazwa] = (funkcja, limit)
+        return funkcja
+    return dekorator
+
+
+def zmierz(funkcja, *args, **kwargs):
+    start = time.perf_counter()
+    wynik = funkcja(*args, **kwargs)
+    return wynik, time.perf_counter() - start
+
+
+# --- DANE TESTOWE ---
+def przykladowi_goscie(liczba_glownych, co_ktory_z_osoba=3):
+    wiersze = []
+    for i in range(liczba_glownych):
+        wiersze.append([f"Gość {i}", "", True, True, ""])
+        if i % co_ktory_z_osoba == 0:
+            wiersze.append([f"Partner {i}", f"(Osoba tow. dla: Gość {i})", True, True, ""])
+    return pd.DataFrame(wiersze, columns=["Imie_Nazwisko", "Imie_Osoby_Tow", "RSVP", "Zaproszenie_Wyslane", "Dieta"])
+
+
+def przykladowe_stoly(liczba, liczba_miejsc=10):
+    return pd.DataFrame({
+        "Numer": [f"Stół {i + 1}" for i in range(liczba)],
+        "Ksztalt": ["Okrągły" if i % 2 else "Prostokątny" for i in range(liczba)],
+        "Liczba_Miejsc": [liczba_miejsc] * liczba,
+        "Goscie_Lista": [""] * liczba,
+    })
+
+
+# --- ROZSADZANIE ---
+@benchmark("rozsadzanie", limit=2.0)
+def benchmark_rozsadzania():
+    from rozsadzanie import rozsadz
+    from schemat import nadaj_id
+
+    df_goscie = nadaj_id(przykladowi_goscie(420))
+    df_stoly = przykladowe_stoly(60)
+    grupy = [[f"Gość {i}" for i in range(p, p + 8)] for p in range(0, 400, 10)]
+    nie_razem = [[f"Gość {i}", f"Gość {i + 1}"] for i in range(1, 300, 7)]
+
+    wynik, czas = zmierz(rozsadz, df_goscie, df_stoly, grupy, nie_razem, limit_czasu=1.0)
+    print(f"  gości: {len(df_goscie)}, stołów: {len(df_stoly)} -> {wynik}")
+    return czas
+
+
+# --- PODGLĄD STOŁU ---
+@benchmark("podglad_stolu", limit=0.001)
+def benchmark_podgladu_stolu():
+    # Pierwsze rysowanie jest kosztowne; liczy się ponowne wyświetlenie niezmienionego stołu
+    from wykresy import obraz_stolu
+
+    goscie = [f"Gość {i}" for i in range(10)]
+    _, pierwszy = zmierz(obraz_stolu, "Stół 1", "Okrągły", goscie)
+    powtorzen = 1000
+    _, czas = zmierz(lambda: [obraz_stolu("Stół 1", "Okrągły", goscie) for _ in range(powtorzen)])
+    print(f"  pierwsze rysowanie: {pierwszy * 1000:.0f} ms, z pamięci średnio z {powtorzen} wywołań:")
+    return czas / powtorzen
+
+
+# --- PLAN SALI ---
+@benchmark("plan_sali", limit=3.0)
+def benchmark_planu_sali():
+    from wykresy import obraz_sali
+
+    stoly = [
+        (f"Stół {s}", "Okrągły" if s % 2 else "Prostokątny", [f"Gość {s}-{m}" if m % 4 else "" for m in range(10)])
+        for s in range(60)
+    ]
+    _, czas = zmierz(obraz_sali, stoly)
+    _, z_pamieci = zmierz(obraz_sali, stoly)
+    print(f"  stołów: {len(stoly)}, miejsc: {sum(len(g) for _, _, g in stoly)}, z pamięci: {z_pamieci * 1000:.3f} ms")
+    return czas
+
+
+# --- EKSPORT PDF ---
+@benchmark("pdf", limit=1.0)
+def benchmark_pdf():
+    from eksport_pdf import generuj_pdf
+
+    df_goscie = przykladowi_goscie(3750)
+    df_goscie["Dieta"] = ["Wegetariańska" if i % 7 == 0 else "" for i in range(len(df_goscie))]
+    df_stoly = przykladowe_stoly(500)
+    df_stoly["Goscie_Lista"] = [";".join(f"Gość {s * 10 + m}" for m in range(10)) for s in range(500)]
+    df_harm = pd.DataFrame({"Godzina": [f"{h:02d}:00" for h in range(24)], "Czynność": ["Punkt programu"] * 24, "Uwagi": [""] * 24})
+
+    generuj_pdf(df_goscie.head(10), df_stoly.head(2), df_harm)   # rozgrzewka: pierwsze wczytanie metryk czcionki
+    pdf, czas = zmierz(generuj_pdf, df_goscie, df_stoly, df_harm)
+    print(f"  gości: {len(df_goscie)}, stołów: {len(df_stoly)}, rozmiar: {len(pdf.getvalue()) // 1024} KB")
+    return czas
+
+
+@benchmark("pdf_z_pamieci", limit=0.05)
+def benchmark_pdf_z_pamieci():
+    # Ponowne pobranie niezmienionego PDF: skrót danych + wyszukanie w pamięci eksportów
+    from eksport_pdf import generuj_pdf
+    from pamiec_eksportow import PamiecEksportow, skrot_danych
+
+    df_goscie = przykladowi_goscie(3750)
+    df_stoly = przykladowe_stoly(500)
+    df_harm = pd.DataFrame({"Godzina": ["16:00"], "Czynność": ["Ślub"], "Uwagi": [""]})
+    pamiec = PamiecEksportow()
+    def pobierz():
+        klucz = skrot_danych(df_goscie, df_stoly, df_harm)
+        return pamiec.pobierz("pdf", klucz, lambda: generuj_pdf(df_goscie, df_stoly, df_harm))
+    _, pierwszy = zmierz(pobierz)
+    _, czas = zmierz(pobierz)
+    print(f"  pierwsze wygenerowanie: {pierwszy * 1000:.0f} ms")
+    return czas
+
+
+# --- BUDŻET ---
+@benchmark("budzet", limit=0.1)
+def benchmark_budzetu():
+    import numpy as np
+    from budzet import PodsumowanieBudzetu
+
+    n = 10000
+    los = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Kategoria": los.choice(["Sala", "Muzyka", "Foto", "Kwiaty", "Inne"], n),
+        "Rola": [f"Rola {i % 300}" for i in range(n)],
+        "Koszt": los.uniform(0, 5000, n).round(),
+        "Czy_Oplacone": los.random(n) < 0.4,
+        "Zaliczka": los.uniform(0, 1000, n).round(),
+        "Czy_Zaliczka_Oplacona": los.random(n) < 0.5,
+    })
+    budzet, czas = zmierz(PodsumowanieBudzetu, df)
+    print(f"  pozycji: {n}, łącznie: {budzet.lacznie:,.0f} zł, zapłacono: {budzet.zaplacono:,.0f} zł")
+    return czas
+
+
+@benchmark("scenariusze", limit=0.1)
+def benchmark_scenariuszy():
+    from budzet import SymulatorScenariuszy
+
+    df = pd.DataFrame({
+        "Kategoria": ["Sala", "Muzyka", "Foto", "Kwiaty", "Auto", "Tort"] * 5,
+        "Rola": [f"Rola {i}" for i in range(30)],
+        "Koszt": [1000.0 * (i + 1) for i in range(30)],
+        "Czy_Oplacone": [i % 3 == 0 for i in range(30)],
+        "Zaliczka": [200.0] * 30,
+        "Czy_Zaliczka_Oplacona": [i % 2 == 0 for i in range(30)],
+    })
+    warianty = [(k, f"Dostawca {j}", 5000.0 * j) for k in ["Sala", "Muzyka", "Foto", "Kwiaty"] for j in range(1, 4)]
+    symulator = SymulatorScenariuszy(df, warianty, na_osobe=["Sala"], liczba_gosci=120)
+    wynik, czas = zmierz(symulator.oblicz, [100, 120, 150], [0.0, 0.5, 1.0], limit=50)
+    print(f"  scenariuszy: {symulator.liczba_scenariuszy([100, 120, 150], [0.0, 0.5, 1.0])}, najtańszy: {wynik['Łącznie'].iloc[0]:,.0f} zł")
+    return czas
+
+
+# --- ZAPIS DIET ---
+@benchmark("diety", limit=0.05)
+def benchmark_diet():
+    # Naniesienie diet z edytora (1000 potwierdzonych gości) na listę gości po ID
+    from schemat import nadaj_id
+    from synchronizacja import scal_kolumne
+
+    df_goscie = nadaj_id(przykladowi_goscie(1500))
+    df_goscie["RSVP"] = [i % 2 == 0 for i in range(len(df_goscie))]
+    potwierdzeni = df_goscie[df_goscie["RSVP"]].head(1000)[["Imie_Nazwisko", "Dieta", "ID"]].copy()
+    potwierdzeni["Dieta"] = ["Wegetariańska" if i % 3 == 0 else "" for i in range(len(potwierdzeni))]
+    (_, zmiany), czas = zmierz(scal_kolumne, "Goscie", df_goscie, potwierdzeni, "Dieta")
+    print(f"  gości: {len(df_goscie)}, w edytorze: {len(potwierdzeni)}, zmienionych komórek: {len(zmiany.zmienione)}")
+    return czas
+
+
+# --- WYSZUKIWANIE GOŚCI ---
+@benchmark("wyszukiwanie", limit=0.001)
+def benchmark_wyszukiwania():
+    import random
+    from wyszukiwanie import IndeksNazwisk
+
+    los = random.Random(0)
+    imiona = ["Łukasz", "Anna", "Zofia", "Paweł", "Małgorzata", "Jan", "Katarzyna", "Piotr", "Agnieszka", "Michał"]
+    nazwiska = ["Kowalski", "Nowak", "Wiśniewski", "Wójcik", "Kamiński", "Lewandowski", "Zieliński", "Woźniak", "Dąbrowski", "Kozłowski"]
+    nazwy = [f"{los.choice(imiona)} {los.choice(nazwiska)} {i}" for i in range(10000)]
+    indeks = IndeksNazwisk()
+    _, budowa = zmierz(indeks.zsynchronizuj, range(len(nazwy)), nazwy)
+    _, dodanie = zmierz(indeks.dodaj, len(nazwy), "Żaneta Grabowska")
+    zapytania = ["lukasz", "kowal", "malgorzata wozniak", "wisniewsky", "zaneta grab", "an"]
+    powtorzen = 200
+    wynik, czas = zmierz(lambda: [indeks.szukaj(z, limit=5) for z in zapytania * powtorzen])
+    print(f"  nazwisk: {len(indeks)}, budowa: {budowa * 1000:.0f} ms, dodanie jednego: {dodanie * 1000:.3f} ms, "
+          f"'zaneta grab' -> {wynik[4][0][1]}; średnio na zapytanie:")
+    return czas / (len(zapytania) * powtorzen)
+
+
+# --- IMPORT GOŚCI ---
+@benchmark("import_gosci", limit=1.0)
+def benchmark_importu_gosci():
+    # 2000 gości z CSV (co trzeci z osobą towarzyszącą); liczymy też zapisy do arkusza
+    import io
+    from import_gosci import importuj
+
+    linie = ["Imie_Nazwisko;Osoba_Towarzyszaca;RSVP;Dieta"]
+    linie += [f"Gość {i};{f'Partner {i}' if i % 3 == 0 else ''};{'Tak' if i % 2 else 'Nie'};" for i in range(2000)]
+    plik = io.BytesIO("\n".join(linie).encode("utf-8"))
+    zapisy = []
+    wynik, czas = zmierz(importuj, plik, "goscie.csv", [f"Gość {i}" for i in range(0, 2000, 100)], zapisy.append)
+    print(f"  przyjętych: {wynik.przyjete}, pominiętych: {len(wynik.odrzucone)}, zapisów do arkusza: {len(zapisy)}")
+    return czas
+
+
+# --- POBIERZ WSZYSTKO ---
+@benchmark("eksport_danych", limit=3.0)
+def benchmark_eksportu_danych():
+    # Wszystkie zakładki dla dużego wesela (~2700 gości) w każdym z formatów
+    from eksport_danych import FORMATY, eksportuj
+    from schemat import dekoduj, nadaj_id, pusta_ramka
+
+    ramki = {
+        "Goscie": nadaj_id(dekoduj("Goscie", przykladowi_goscie(2000))),
+        "Obsluga": pusta_ramka("Obsluga"),
+        "Zadania": pusta_ramka("Zadania"),
+        "Stoly": nadaj_id(dekoduj("Stoly", przykladowe_stoly(270))),
+        "Harmonogram": pusta_ramka("Harmonogram"),
+    }
+    razem = 0.0
+    for format in FORMATY:
+        plik, czas = zmierz(eksportuj, ramki, format)
+        print(f"  {format}: {len(plik.getvalue()) / 1024:.0f} kB, {czas * 1000:.1f} ms")
+        razem += czas
+    return razem
+
+
+# --- ZIMNY START Z MIGAWEK ---
+@benchmark("migawki", limit=0.02)
+def benchmark_migawek():
+    # Odczyt wszystkich zakładek z migawek na dysku (~2700 gości) – tyle trwa start bez Google Sheets
+    import tempfile
+    from magazyn import ARKUSZE, MagazynSQLite
+    from migawki import MagazynZMigawka
+    from schemat import KOLUMNY_ARKUSZY, koduj, nadaj_id
+
+    with tempfile.TemporaryDirectory() as katalog:
+        zrodlo = MagazynSQLite(":memory:")
+        zrodlo.zaloz_arkusze(KOLUMNY_ARKUSZY)
+        goscie = koduj("Goscie", nadaj_id(przykladowi_goscie(2000)))
+        zrodlo.dopisz_wiersze("Goscie", goscie.values.tolist())
+        MagazynZMigawka(lambda: zrodlo, katalog).pobierz_wiele(ARKUSZE)
+
+        migawka = MagazynZMigawka(lambda: None, katalog)    # bez uruchom(): nigdy się nie połączy
+        wynik, czas = zmierz(migawka.pobierz_wiele, ARKUSZE)
+    print(f"  zakładek: {len(wynik)}, wierszy gości: {len(wynik['Goscie']) - 1}")
+    return czas
+
+
+# --- NARZUT PROFILU ---
+@benchmark("profil_wylaczony", limit=0.1)
+def benchmark_profilu_wylaczonego():
+    # 100 tys. przejść przez odcinek, dekorator i licznik API przy wyłączonym profilu, minus ta sama pętla
+    # z pustym kontekstem i zwykłą funkcją – zostaje sam narzut profilu na gorącej ścieżce
+    from contextlib import nullcontext
+    from profil import Profil
+
+    profil = Profil()
+    opakowana = profil.mierzone("funkcja")(lambda x: x)
+    zwykla = lambda x: x
+    pusty = nullcontext()
+
+    def z_profilem():
+        for i in range(100_000):
+            with profil.mierz("odcinek"):
+                opakowana(i)
+            profil.wywolanie_api("Goscie", i)
+
+    def bez_profilu():
+        for i in range(100_000):
+            with pusty:
+                zwykla(i)
+            zwykla(i)
+
+    _, czas = zmierz(z_profilem)
+    _, czas_bazowy = zmierz(bez_profilu)
+    narzut = max(czas - czas_bazowy, 0.0)
+    print(f"  narzut: {narzut / 100_000 * 1e9:.0f} ns na przejście (odcinek + dekorator + licznik API)")
+    return narzut
+
+
+# --- PRZEBIEG SKRYPTU APLIKACJI ---
+@benchmark("przebieg_sekcji", limit=1.0)
+def benchmark_przebiegu_sekcji():
+    # Czas ponownego przebiegu app.py (np. po kliknięciu checkboxa) w każdej sekcji, na lokalnej bazie SQLite
+    import os
+    import tempfile
+    from streamlit.testing.v1 import AppTest
+    from magazyn import MagazynSQLite
+    from schemat import KOLUMNY_ARKUSZY, koduj
+
+    katalog = tempfile.mkdtemp()
+    baza = MagazynSQLite(os.path.join(katalog, "wesele.db"))
+    baza.zaloz_arkusze(KOLUMNY_ARKUSZY)
+    df_goscie = przykladowi_goscie(300)
+    df_stoly = przykladowe_stoly(40)
+    df_obsluga = pd.DataFrame({
+        "Kategoria": ["Sala", "Muzyka", "Foto", "Inne"] * 10, "Rola": [f"Rola {i}" for i in range(40)],
+        "Informacje": [""] * 40, "Koszt": [1000.0] * 40, "Czy_Oplacone": [False] * 40,
+        "Zaliczka": [0.0] * 40, "Czy_Zaliczka_Oplacona": [False] * 40,
+    })
+    for nazwa, df in [("Goscie", df_goscie), ("Stoly", df_stoly), ("Obsluga", df_obsluga)]:
+        df = koduj(nazwa, df)
+        baza.nadpisz(nazwa, [df.columns.tolist()] + df.values.tolist())
+    os.environ["WESELE_MAGAZYN"] = "lokalny"
+    os.environ["WESELE_BAZA"] = baza.sciezka
+
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), default_timeout=60)
+    at.run()
+    najdluzszy = 0.0
+    for sekcja in ["👥 Lista Gości", "🎧 Organizacja", "✅ Lista Zadań", "🍽️ Rozplanowanie Stołów", "⏰ Harmonogram Dnia", "🍽️ Diety"]:
+        at.segmented_control(key="sekcja").set_value(sekcja).run()
+        _, czas = zmierz(at.run)
+        print(f"  {sekcja}: {czas * 1000:.0f} ms")
+        najdluzszy = max(najdluzszy, czas)
+    return najdluzszy
+
+
+def main(nazwy):
+    nazwy = nazwy or list(BENCHMARKI)
+    przekroczone = []
+    for nazwa in nazwy:
+        funkcja, limit = BENCHMARKI[nazwa]
+        print(f"{nazwa}:")
+        czas = funkcja()
+        print(f"  czas: {czas * 1000:.3f} ms (limit {limit * 1000:.0f} ms)")
+        if czas > limit:
+            przekroczone.append(nazwa)
+    if przekroczone:
+        print("Przekroczone limity:", ", ".join(przekroczone))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
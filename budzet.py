@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+
+# ==========================================================
+# PODSUMOWANIE BUDŻETU (zakładka Organizacja)
+# ==========================================================
+# Wszystko liczymy wektorowo na kolumnach: opłacona pozycja wlicza się całym kosztem,
+# nieopłacona z opłaconą zaliczką – kwotą zaliczki. Agregaty dla wykresów liczymy jednym groupby
+# na kolumnę i zapisujemy razem z sumami, więc wykresy i karty tylko je odczytują.
+class PodsumowanieBudzetu:
+    def __init__(self, df):
+        koszt = pd.to_numeric(df["Koszt"], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        zaliczka = pd.to_numeric(df["Zaliczka"], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        oplacone = (df["Czy_Oplacone"] == True).to_numpy()
+        zaliczka_oplacona = (df["Czy_Zaliczka_Oplacona"] == True).to_numpy() & ~oplacone
+
+        self.lacznie = float(koszt.sum())
+        self.zaliczki = float(zaliczka[zaliczka_oplacona].sum())
+        self.zaplacono = float(koszt[oplacone].sum()) + self.zaliczki
+        self.do_zaplaty = self.lacznie - self.zaplacono
+
+        self.kategorie = _suma_wg(df["Kategoria"], koszt, "Kategoria")
+        self.role = _suma_wg(df["Rola"], koszt, "Rola")
+
+
+def _suma_wg(klucze, koszt, nazwa):
+    # Suma kosztów wg klucza, malejąco, tylko dodatnie – gotowa ramka dla Altair
+    kody, unikalne = pd.factorize(klucze.astype(str), sort=False)
+    sumy = np.bincount(kody[kody >= 0], weights=koszt[kody >= 0], minlength=len(unikalne))
+    wynik = pd.DataFrame({nazwa: unikalne, "Koszt": sumy})
+    wynik = wynik[wynik["Koszt"] > 0]
+    return wynik.sort_values("Koszt", ascending=False, kind="stable").reset_index(drop=True)
+
+
+# ==========================================================
+# SYMULATOR SCENARIUSZY ("co jeśli")
+# ==========================================================
+# Scenariusz = wybór wariantu dla każdej kategorii (obecny albo inny dostawca z podaną ceną)
+# × liczba gości (koszty kategorii "na osobę" skalują się proporcjonalnie)
+# × część niezapłaconych jeszcze zaliczek, którą wpłacamy teraz.
+# Wszystkie kombinacje to jedna macierz indeksów (scenariusze × wymiary); sumy liczymy na tablicach NumPy
+# bez kopiowania DataFrame'u dla każdego scenariusza.
+OBECNY_WARIANT = "obecny"
+MAKS_SCENARIUSZY = 500000
+
+
+class SymulatorScenariuszy:
+    def __init__(self, df, warianty=(), na_osobe=(), liczba_gosci=0):
+        # warianty – [(kategoria, nazwa wariantu, koszt całej kategorii), ...]
+        koszt = pd.to_numeric(df["Koszt"], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        zaliczka = pd.to_numeric(df["Zaliczka"], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        oplacone = (df["Czy_Oplacone"] == True).to_numpy()
+        zaliczka_oplacona = (df["Czy_Zaliczka_Oplacona"] == True).to_numpy() & ~oplacone
+
+        kategorie = [str(k) for k in df["Kategoria"]]
+        for kat, _, _ in warianty:
+            if str(kat) not in kategorie:
+                kategorie.append(str(kat))
+        kody, self.kategorie = pd.factorize(pd.Series(kategorie, dtype=object), sort=True)
+        kody = kody[:len(df)]
+        liczba_kat = len(self.kategorie)
+
+        # Warianty każdej kategorii: [obecny, alternatywa 1, ...] -> macierz cen (kategorie × warianty)
+        self.nazwy_wariantow = [[OBECNY_WARIANT] for _ in range(liczba_kat)]
+        ceny = [[float(s)] for s in np.bincount(kody, weights=koszt, minlength=liczba_kat)]
+        pozycja = {k: i for i, k in enumerate(self.kategorie)}
+        for kat, nazwa, cena in warianty:
+            i = pozycja[str(kat)]
+            self.nazwy_wariantow[i].append(str(nazwa))
+            ceny[i].append(float(pd.to_numeric(cena, errors='coerce') or 0.0))
+        self.liczby_wariantow = np.array([len(c) for c in ceny])
+        self.ceny = np.zeros((liczba_kat, int(self.liczby_wariantow.max(initial=1))))
+        for i, c in enumerate(ceny):
+            self.ceny[i, :len(c)] = c
+
+        self.na_osobe = np.isin(self.kategorie, [str(k) for k in na_osobe])
+        self.liczba_gosci = liczba_gosci
+        self.zaplacono = float(koszt[oplacone].sum() + zaliczka[zaliczka_oplacona].sum())
+        self.zaliczki_do_wplaty = float(zaliczka[~oplacone & ~zaliczka_oplacona].sum())
+
+    def liczba_scenariuszy(self, liczby_gosci=(None,), zaliczki=(0.0,)):
+        return int(np.prod(self.liczby_wariantow)) * len(liczby_gosci) * len(zaliczki)
+
+    def oblicz(self, liczby_gosci=(None,), zaliczki=(0.0,), limit=None):
+        # liczby_gosci – warianty liczby gości (None = obecna); zaliczki – ułamki niezapłaconych zaliczek;
+        # limit – ile najtańszych scenariuszy zwrócić (ramkę budujemy tylko dla nich)
+        wymiary = tuple(self.liczby_wariantow) + (len(liczby_gosci), len(zaliczki))
+        if int(np.prod(wymiary)) > MAKS_SCENARIUSZY:
+            raise ValueError(f"Za dużo scenariuszy ({int(np.prod(wymiary))}), limit to {MAKS_SCENARIUSZY}.")
+        indeksy = np.indices(wymiary).reshape(len(wymiary), -1).T     # scenariusze × wymiary
+        liczba_kat = len(self.kategorie)
+        wybor = indeksy[:, :liczba_kat]
+
+        goscie = np.array([self.liczba_gosci if g is None else g for g in liczby_gosci], dtype=float)
+        skala = goscie / self.liczba_gosci if self.liczba_gosci else np.ones_like(goscie)
+        mnoznik = np.where(self.na_osobe[None, :], skala[indeksy[:, liczba_kat]][:, None], 1.0)
+
+        koszty = self.ceny[np.arange(liczba_kat)[None, :], wybor] * mnoznik      # scenariusze × kategorie
+        lacznie = koszty.sum(axis=1)
+        ulamki = np.asarray(zaliczki, dtype=float)[indeksy[:, liczba_kat + 1]]
+        zaplacono = self.zaplacono + ulamki * self.zaliczki_do_wplaty
+
+        kolejnosc = np.argsort(lacznie, kind="stable")[:limit]
+        wybor, indeksy = wybor[kolejnosc], indeksy[kolejnosc]
+        wynik = {str(k): np.asarray(self.nazwy_wariantow[i], dtype=object)[wybor[:, i]]
+                 for i, k in enumerate(self.kategorie) if self.liczby_wariantow[i] > 1}
+        wynik["Goście"] = goscie[indeksy[:, liczba_kat]].astype(int)
+        wynik["Zaliczki teraz (%)"] = (ulamki[kolejnosc] * 100).round().astype(int)
+        wynik["Łącznie"] = lacznie[kolejnosc]
+        wynik["Zapłacono"] = zaplacono[kolejnosc]
+        wynik["Do zapłaty"] = lacznie[kolejnosc] - zaplacono[kolejnosc]
+        return pd.DataFrame(wynik)
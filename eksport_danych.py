@@ -0,0 +1,85 @@
+import io
+import zipfile
+
+from schemat import TYPY_KOLUMN, koduj
+
+WERSJA_EKSPORTU = 1      # zmiana układu plików = nowa wersja (klucz w pamięci eksportów)
+ROZMIAR_PACZKI = 10000   # tyle wierszy naraz trafia do pliku Parquet (jedna grupa wierszy)
+
+# Format -> (rozszerzenie pobieranego pliku, typ MIME)
+FORMATY = {
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet (ZIP)": ("zip", "application/zip"),
+    "CSV (ZIP)": ("zip", "application/zip"),
+}
+
+
+# ==========================================================
+# EKSPORT WSZYSTKICH ZAKŁADEK DO JEDNEGO PLIKU
+# ==========================================================
+# ramki: {nazwa zakładki: zdekodowana ramka}. Każda ramka jest zapisywana raz, prosto do bufora wyniku:
+# CSV i Parquet strumieniem do osobnego wpisu archiwum ZIP, XLSX przez openpyxl w trybie write_only
+# (wiersze nie są trzymane w modelu skoroszytu). Zwracamy bufor BytesIO.
+def eksportuj(ramki, format):
+    bufor = io.BytesIO()
+    if format == "XLSX":
+        _zapisz_xlsx(ramki, bufor)
+    elif format == "Parquet (ZIP)":
+        # Parquet jest już skompresowany – w archiwum tylko go przechowujemy
+        with zipfile.ZipFile(bufor, "w", zipfile.ZIP_STORED) as archiwum:
+            for nazwa, df in ramki.items():
+                _zapisz_parquet(archiwum, nazwa, df)
+    else:
+        with zipfile.ZipFile(bufor, "w", zipfile.ZIP_DEFLATED) as archiwum:
+            for nazwa, df in ramki.items():
+                _zapisz_csv(archiwum, nazwa, df)
+    bufor.seek(0)
+    return bufor
+
+
+# --- CSV ---
+def _zapisz_csv(archiwum, nazwa, df):
+    # Wartości jak w arkuszu (Tak/Nie, daty RRRR-MM-DD); BOM, żeby Excel poprawnie czytał polskie znaki
+    with archiwum.open(f"{nazwa}.csv", "w", force_zip64=True) as wpis:
+        tekst = io.TextIOWrapper(wpis, encoding="utf-8-sig", newline="")
+        koduj(nazwa, df).to_csv(tekst, index=False)
+        tekst.flush()
+        tekst.detach()
+
+
+# --- PARQUET ---
+def _do_arrow(nazwa, df):
+    # Puste daty ("") zamieniamy na brak wartości – kolumna dat ma wtedy jeden typ (date32)
+    df = df.copy()
+    for kol, typ in TYPY_KOLUMN[nazwa].items():
+        if typ == "data" and kol in df.columns:
+            df[kol] = df[kol].where(df[kol] != "", None)
+    return df
+
+
+def _zapisz_parquet(archiwum, nazwa, df):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = _do_arrow(nazwa, df)
+    schemat = pa.Schema.from_pandas(df, preserve_index=False)
+    with archiwum.open(f"{nazwa}.parquet", "w", force_zip64=True) as wpis:
+        with pq.ParquetWriter(wpis, schemat) as plik:
+            for start in range(0, len(df), ROZMIAR_PACZKI):
+                paczka = df.iloc[start:start + ROZMIAR_PACZKI]
+                plik.write_table(pa.Table.from_pandas(paczka, schema=schemat, preserve_index=False))
+            if df.empty:
+                plik.write_table(schemat.empty_table())
+
+
+# --- XLSX ---
+def _zapisz_xlsx(ramki, bufor):
+    from openpyxl import Workbook
+
+    skoroszyt = Workbook(write_only=True)
+    for nazwa, df in ramki.items():
+        arkusz = skoroszyt.create_sheet(nazwa)
+        arkusz.append(list(map(str, df.columns)))
+        for wiersz in df.itertuples(index=False, name=None):
+            arkusz.append(wiersz)
+    skoroszyt.save(bufor)
@@ -0,0 +1,246 @@
+import os
+import unicodedata
+from io import BytesIO
+
+import pandas as pd
+from fpdf import FPDF
+
+from profil import mierzone
+
+KATALOG_CZCIONEK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+CZCIONKA = os.path.join(KATALOG_CZCIONEK, "DejaVuSans.ttf")
+CZCIONKA_POGRUBIONA = os.path.join(KATALOG_CZCIONEK, "DejaVuSans-Bold.ttf")
+
+MARGINES = 10            # mm
+WYSOKOSC_WIERSZA = 5     # mm
+ROZMIAR_TEKSTU = 8       # pt
+PT_NA_MM = 25.4 / 72
+WERSJA_PDF = 1           # zmiana układu dokumentu = nowa wersja (klucz w pamięci eksportów)
+
+
+def czcionka_dostepna():
+    return os.path.exists(CZCIONKA)
+
+
+def usun_polskie_znaki(tekst):
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', tekst)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+# ==========================================================
+# METRYKI CZCIONKI (wczytywane raz na proces)
+# ==========================================================
+# fpdf2 parsuje plik TTF przy każdym add_font, a podzbiór glifów i tak jest liczony osobno dla każdego
+# dokumentu. Szerokości znaków zapamiętujemy jednak raz – dzięki temu przycinanie tekstu do szerokości
+# kolumny nie woła pdf.get_string_width dla każdej komórki.
+_szerokosci = {}
+
+
+def _szerokosci_znakow(pdf, styl):
+    klucz = styl
+    if klucz not in _szerokosci:
+        font = pdf.fonts[f"dejavu{styl}"]
+        _szerokosci[klucz] = (dict(font.cw), font.desc.missing_width)
+    return _szerokosci[klucz]
+
+
+class DokumentPDF:
+    def __init__(self):
+        self.pdf = FPDF()
+        self.pdf.set_auto_page_break(False)
+        self.unicode = czcionka_dostepna()
+        if self.unicode:
+            self.pdf.add_font("DejaVu", "", CZCIONKA)
+            styl_pogrubiony = "B" if os.path.exists(CZCIONKA_POGRUBIONA) else ""
+            if styl_pogrubiony:
+                self.pdf.add_font("DejaVu", "B", CZCIONKA_POGRUBIONA)
+            self.rodzina = "DejaVu"
+            self.pogrubiona = styl_pogrubiony
+            self.metryki = {"": _szerokosci_znakow(self.pdf, ""), "B": _szerokosci_znakow(self.pdf, styl_pogrubiony)}
+        else:
+            self.rodzina = "helvetica"
+            self.pogrubiona = "B"
+            self.metryki = None
+        self.szerokosc = self.pdf.w - 2 * MARGINES
+        self.dol = self.pdf.h - MARGINES
+        self.styl = ""
+        self.rozmiar = ROZMIAR_TEKSTU
+        self.pdf.add_page()
+        self.y = MARGINES
+
+    # --- TEKST ---
+    def czcionka(self, pogrubiona=False, rozmiar=ROZMIAR_TEKSTU):
+        self.styl = self.pogrubiona if pogrubiona else ""
+        self.rozmiar = rozmiar
+        self.pdf.set_font(self.rodzina, self.styl, rozmiar)
+
+    def tekst(self, tekst):
+        return tekst if self.unicode else usun_polskie_znaki(tekst)
+
+    def przytnij(self, tekst, szerokosc_mm):
+        # Przycina tekst do szerokości kolumny (z wielokropkiem), licząc szerokości znaków z metryk
+        if self.metryki is None:
+            if self.pdf.get_string_width(tekst) <= szerokosc_mm:
+                return tekst
+            while tekst and self.pdf.get_string_width(tekst + "...") > szerokosc_mm:
+                tekst = tekst[:-1]
+            return tekst + "..."
+        szerokosci, domyslna = self.metryki["B" if self.styl else ""]
+        limit = szerokosc_mm / (self.rozmiar * PT_NA_MM) * 1000
+        # Przycięty tekst musi zmieścić się razem z wielokropkiem – miejsce cięcia to ostatni znak,
+        # po którym starcza jeszcze miejsca na "…"
+        limit_ciecia = limit - szerokosci.get(ord("…"), domyslna)
+        suma = 0
+        ciecie = 0
+        for i, znak in enumerate(tekst):
+            suma += szerokosci.get(ord(znak), domyslna)
+            if suma <= limit_ciecia:
+                ciecie = i + 1
+            if suma > limit:
+                return tekst[:ciecie] + "…"
+        return tekst
+
+    # --- UKŁAD STRONY ---
+    def miejsce(self, wysokosc):
+        # Nowa strona, jeśli zostało za mało miejsca; zwraca True, gdy strona została dodana
+        if self.y + wysokosc <= self.dol:
+            return False
+        self.pdf.add_page()
+        self.y = MARGINES
+        return True
+
+    def tytul(self, tekst, rozmiar=14):
+        self.miejsce(12)
+        self.czcionka(pogrubiona=True, rozmiar=rozmiar)
+        self.pdf.text(MARGINES, self.y + rozmiar * PT_NA_MM, self.tekst(tekst))
+        self.y += rozmiar * PT_NA_MM + 4
+
+    def akapit(self, tekst):
+        self.miejsce(WYSOKOSC_WIERSZA)
+        self.czcionka()
+        self.pdf.text(MARGINES, self.y + 3.6, self.tekst(tekst))
+        self.y += WYSOKOSC_WIERSZA + 2
+
+    def tabela(self, naglowki, szerokosci, kolumny):
+        # kolumny – listy napisów, po jednej na kolumnę tabeli (dane pobrane kolumnami z DataFrame'u)
+        szerokosci = [s * self.szerokosc / sum(szerokosci) for s in szerokosci]
+        x = [MARGINES + sum(szerokosci[:i]) for i in range(len(szerokosci))]
+        if not self.unicode:
+            kolumny = [[usun_polskie_znaki(v) for v in k] for k in kolumny]
+
+        def naglowek():
+            self.czcionka(pogrubiona=True)
+            for xi, s, n in zip(x, szerokosci, naglowki):
+                self.pdf.text(xi + 1, self.y + 3.6, self.przytnij(self.tekst(n), s - 2))
+            self.y += WYSOKOSC_WIERSZA
+            self.pdf.line(MARGINES, self.y, MARGINES + self.szerokosc, self.y)
+            self.y += 0.5
+            self.czcionka()
+
+        self.miejsce(3 * WYSOKOSC_WIERSZA)
+        naglowek()
+        for wiersz in zip(*kolumny):
+            if self.miejsce(WYSOKOSC_WIERSZA):
+                naglowek()
+            for xi, s, v in zip(x, szerokosci, wiersz):
+                if v:
+                    self.pdf.text(xi + 1, self.y + 3.6, self.przytnij(v, s - 2))
+            self.y += WYSOKOSC_WIERSZA
+        self.y += 4
+
+    def bloki(self, bloki, w_wierszu=3):
+        # Bloki (nagłówek + lista linii) układane obok siebie, np. stoły z listą miejsc
+        szerokosc = self.szerokosc / w_wierszu
+        for start in range(0, len(bloki), w_wierszu):
+            rzad = bloki[start:start + w_wierszu]
+            wysokosc = (1 + max(len(linie) for _, linie in rzad)) * WYSOKOSC_WIERSZA + 3
+            self.miejsce(wysokosc)
+            for k, (naglowek, linie) in enumerate(rzad):
+                x = MARGINES + k * szerokosc
+                self.czcionka(pogrubiona=True)
+                self.pdf.text(x + 1, self.y + 3.6, self.przytnij(self.tekst(naglowek), szerokosc - 3))
+                self.czcionka()
+                for n, linia in enumerate(linie, start=1):
+                    self.pdf.text(x + 3, self.y + 3.6 + n * WYSOKOSC_WIERSZA, self.przytnij(self.tekst(linia), szerokosc - 5))
+            self.y += wysokosc
+        self.y += 2
+
+    def wynik(self):
+        return BytesIO(bytes(self.pdf.output()))
+
+
+def _tekst(df, kolumna):
+    if kolumna not in df.columns:
+        return [""] * len(df)
+    return df[kolumna].fillna("").astype(str).tolist()
+
+
+def _tak(df, kolumna):
+    if kolumna not in df.columns:
+        return [""] * len(df)
+    return ["Tak" if v else "" for v in (df[kolumna] == True).tolist()]
+
+
+# ==========================================================
+# PODSUMOWANIE WESELA
+# ==========================================================
+@mierzone("generuj_pdf")
+def generuj_pdf(goscie_df, stoly_df, harmonogram_df):
+    dok = DokumentPDF()
+    dok.tytul("Podsumowanie wesela", rozmiar=16)
+
+    # --- Lista gości ---
+    dok.tytul(f"Lista gości ({len(goscie_df)})")
+    if not goscie_df.empty:
+        lp = [str(i) for i in range(1, len(goscie_df) + 1)]
+        dok.tabela(
+            ["Lp.", "Imię i nazwisko", "Osoba towarzysząca", "Zaproszenie", "RSVP", "Dieta"],
+            [7, 45, 45, 16, 10, 25],
+            [lp, _tekst(goscie_df, "Imie_Nazwisko"), _tekst(goscie_df, "Imie_Osoby_Tow"),
+             _tak(goscie_df, "Zaproszenie_Wyslane"), _tak(goscie_df, "RSVP"), _tekst(goscie_df, "Dieta")],
+        )
+    else:
+        dok.akapit("Brak gości")
+
+    # --- Podsumowanie diet (tylko potwierdzeni goście) ---
+    dok.tytul("Podsumowanie diet")
+    if not goscie_df.empty and 'Dieta' in goscie_df.columns:
+        potwierdzeni = goscie_df[goscie_df['RSVP'] == True]
+        diety = potwierdzeni['Dieta'].fillna("").astype(str).str.strip()
+        liczby = diety[diety != ""].value_counts()
+        if potwierdzeni.empty:
+            dok.akapit("Brak potwierdzonych gości – brak danych o dietach")
+        elif liczby.empty:
+            dok.akapit("Potwierdzeni goście nie mają wybranych diet")
+        else:
+            dok.tabela(["Dieta", "Liczba osób"], [3, 1], [liczby.index.tolist(), [str(n) for n in liczby.tolist()]])
+    else:
+        dok.akapit("Brak danych o dietach")
+
+    # --- Rozsadzenie przy stołach ---
+    dok.tytul("Rozsadzenie przy stołach")
+    if not stoly_df.empty:
+        bloki = []
+        for numer, ksztalt, miejsca, lista in zip(
+            _tekst(stoly_df, "Numer"), _tekst(stoly_df, "Ksztalt"),
+            _tekst(stoly_df, "Liczba_Miejsc"), _tekst(stoly_df, "Goscie_Lista"),
+        ):
+            linie = [f"{i}. {g.strip()}" for i, g in enumerate(lista.split(";"), start=1) if g.strip()]
+            bloki.append((f"{numer} ({ksztalt}, {miejsca} miejsc)", linie or ["(brak gości)"]))
+        dok.bloki(bloki)
+    else:
+        dok.akapit("Brak danych o stołach")
+
+    # --- Harmonogram dnia ---
+    dok.tytul("Harmonogram dnia")
+    if not harmonogram_df.empty:
+        czas = pd.to_datetime(harmonogram_df['Godzina'].astype(str), format='%H:%M', errors='coerce')
+        harm = harmonogram_df.assign(_czas=czas).sort_values(['_czas', 'Godzina'], na_position='last')
+        dok.tabela(["Godzina", "Czynność", "Uwagi"], [1, 4, 4],
+                   [_tekst(harm, "Godzina"), _tekst(harm, "Czynność"), _tekst(harm, "Uwagi")])
+    else:
+        dok.akapit("Brak harmonogramu")
+
+    return dok.wynik()
@@ -0,0 +1,174 @@
+import csv
+import io
+
+import pandas as pd
+
+from miejsca import klucz_goscia
+from rozsadzanie import WZOR_TOWARZYSZA
+from schemat import KOLUMNY_GOSCIE, dekoduj
+from wyszukiwanie import zloz_tekst
+
+ROZMIAR_PACZKI = 500       # tyle wierszy czytamy naraz i tyle gości idzie w jednym zapisie do arkusza
+ROZMIAR_PROBKI = 64 * 1024  # z tylu początkowych znaków CSV wykrywamy separator
+
+# Nagłówki pliku (po zloz_tekst, "_" jak spacja) -> kolumny aplikacji.
+# "Osoba_Towarzyszaca" to imię osoby towarzyszącej – z niej powstaje osobny wiersz gościa;
+# osobne kolumny "Imię" i "Nazwisko" łączymy w Imie_Nazwisko.
+NAGLOWKI_IMPORTU = {
+    "imie nazwisko": "Imie_Nazwisko", "imie i nazwisko": "Imie_Nazwisko", "gosc": "Imie_Nazwisko",
+    "name": "Imie_Nazwisko", "imie": "Imie", "nazwisko": "Nazwisko",
+    "imie osoby tow": "Imie_Osoby_Tow", "info (+1) / powiazanie": "Imie_Osoby_Tow",
+    "osoba towarzyszaca": "Osoba_Towarzyszaca", "osoba tow": "Osoba_Towarzyszaca", "partner": "Osoba_Towarzyszaca",
+    "+1": "Osoba_Towarzyszaca",
+    "rsvp": "RSVP", "potwierdzenie": "RSVP", "potwierdzone przybycie": "RSVP",
+    "zaproszenie wyslane": "Zaproszenie_Wyslane", "zaproszenie": "Zaproszenie_Wyslane",
+    "wyslane zaproszenie": "Zaproszenie_Wyslane",
+    "dieta": "Dieta",
+}
+
+
+def kolumna_importu(naglowek):
+    return NAGLOWKI_IMPORTU.get(" ".join(zloz_tekst(naglowek).replace("_", " ").split()))
+
+
+# ==========================================================
+# CZYTANIE PLIKU PACZKAMI (CSV albo XLSX)
+# ==========================================================
+def czytaj_paczki(plik, nazwa_pliku, rozmiar_paczki=ROZMIAR_PACZKI):
+    # Kolejne ramki po rozmiar_paczki wierszy (same napisy); cały plik nie jest nigdy zamieniany w jedną ramkę
+    if str(nazwa_pliku).lower().endswith((".xlsx", ".xlsm")):
+        yield from _paczki_xlsx(plik, rozmiar_paczki)
+        return
+    tekst = io.TextIOWrapper(plik, encoding="utf-8-sig", newline="")
+    try:
+        sep = _separator(tekst.read(ROZMIAR_PROBKI))
+        tekst.seek(0)
+        yield from pd.read_csv(tekst, sep=sep, dtype=str, keep_default_na=False,
+                               chunksize=rozmiar_paczki, skipinitialspace=True)
+    except pd.errors.EmptyDataError:
+        raise ValueError("plik jest pusty")
+    finally:
+        tekst.detach()    # zamknięcie nakładki nie może zamknąć przesłanego pliku
+
+
+def _separator(probka):
+    # Separator (",", ";" albo tabulator) wykrywamy z pełnych wierszy początku pliku – Excel po polsku zapisuje
+    # CSV ze średnikami. Plik z jedną kolumną nie ma separatora (a nagłówek może mieć spacje), więc gdy
+    # sniffer żadnego z nich nie znajdzie, czytamy plik jako zwykły CSV z przecinkami.
+    if not probka.strip():
+        raise ValueError("plik jest pusty")
+    if "\n" in probka:
+        probka = probka[:probka.rindex("\n") + 1]
+    try:
+        return csv.Sniffer().sniff(probka, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+
+def _paczki_xlsx(plik, rozmiar_paczki):
+    # openpyxl w trybie read_only czyta arkusz strumieniowo, wiersz po wierszu
+    from openpyxl import load_workbook
+
+    skoroszyt = load_workbook(plik, read_only=True, data_only=True)
+    try:
+        wiersze = skoroszyt.worksheets[0].iter_rows(values_only=True)
+        naglowki = [("" if n is None else str(n)) for n in next(wiersze, ())]
+        paczka = []
+        for wiersz in wiersze:
+            paczka.append(["" if v is None else str(v) for v in wiersz[:len(naglowki)]])
+            if len(paczka) == rozmiar_paczki:
+                yield pd.DataFrame(paczka, columns=naglowki[:max(map(len, paczka))])
+                paczka = []
+        if paczka:
+            yield pd.DataFrame(paczka, columns=naglowki[:max(map(len, paczka))])
+    finally:
+        skoroszyt.close()
+
+
+# ==========================================================
+# WALIDACJA I PAROWANIE GOŚCI
+# ==========================================================
+# Każda paczka: nagłówki -> kolumny aplikacji, typy wg schematu, pomijamy wiersze bez imienia i duplikaty
+# (względem listy gości i wcześniejszych wierszy pliku, bez względu na wielkość liter i spacje).
+# Osoba towarzysząca podana w osobnej kolumnie staje się wierszem zaraz po swoim gościu. Wiersz, który sam
+# jest osobą towarzyszącą ("(Osoba tow. dla: X)"), przyjmujemy, gdy X jest już na liście albo w pliku –
+# jeśli X pojawi się dopiero dalej, czeka do końca pliku.
+class ImportGosci:
+    def __init__(self, imiona_na_liscie):
+        self.znani = {klucz_goscia(i) for i in imiona_na_liscie if str(i).strip()}
+        self.odrzucone = []       # [(nr wiersza w pliku, imię, powód)]
+        self.oczekujace = []      # osoby towarzyszące czekające na swojego gościa
+        self.przyjete = 0
+        self.wiersz = 1           # wiersz 1 to nagłówki
+        self.kolumny = None
+
+    def przetworz(self, paczka):
+        # Zwraca ramkę przyjętych gości (kolumny KOLUMNY_GOSCIE, typy jak w aplikacji)
+        if self.kolumny is None:
+            self.kolumny = {n: kolumna_importu(n) for n in paczka.columns}
+            if not ({"Imie_Nazwisko", "Imie", "Nazwisko"} & set(self.kolumny.values())):
+                raise ValueError("W pliku brakuje kolumny z imieniem i nazwiskiem gościa (np. \"Imie_Nazwisko\").")
+        paczka = paczka[[n for n, k in self.kolumny.items() if k]].rename(columns=self.kolumny)
+        paczka = paczka.loc[:, ~paczka.columns.duplicated()]
+        if "Imie_Nazwisko" not in paczka.columns:
+            czesci = [paczka[k] for k in ("Imie", "Nazwisko") if k in paczka.columns]
+            paczka = paczka.assign(Imie_Nazwisko=czesci[0].str.cat(czesci[1:], sep=" ") if len(czesci) > 1 else czesci[0])
+        numery = range(self.wiersz + 1, self.wiersz + 1 + len(paczka))
+        self.wiersz += len(paczka)
+
+        goscie = dekoduj("Goscie", paczka)
+        partnerzy = paczka["Osoba_Towarzyszaca"] if "Osoba_Towarzyszaca" in paczka.columns else [""] * len(paczka)
+        wynik = []
+        for nr, gosc, partner in zip(numery, goscie[KOLUMNY_GOSCIE].to_dict("records"), partnerzy):
+            gosc["Imie_Nazwisko"] = " ".join(str(gosc["Imie_Nazwisko"]).split())
+            towarzysz = WZOR_TOWARZYSZA.search(gosc["Imie_Osoby_Tow"])
+            if towarzysz and klucz_goscia(towarzysz.group(1)) not in self.znani:
+                self.oczekujace.append((nr, gosc, towarzysz.group(1)))
+                continue
+            # Osobę towarzyszącą dopisujemy także wtedy, gdy sam gość był już na liście
+            self._przyjmij(nr, gosc, wynik)
+            partner = " ".join(str(partner).split())
+            if partner and klucz_goscia(gosc["Imie_Nazwisko"]) in self.znani:
+                self._przyjmij(nr, dict(gosc, Imie_Nazwisko=partner, Dieta="",
+                                        Imie_Osoby_Tow=f"(Osoba tow. dla: {gosc['Imie_Nazwisko']})"), wynik)
+        return pd.DataFrame(wynik, columns=KOLUMNY_GOSCIE)
+
+    def zakoncz(self):
+        # Osoby towarzyszące, których gość pojawił się w pliku później (albo wcale)
+        wynik = []
+        for nr, gosc, glowny in self.oczekujace:
+            if klucz_goscia(glowny) in self.znani:
+                self._przyjmij(nr, gosc, wynik)
+            else:
+                self.odrzucone.append((nr, gosc["Imie_Nazwisko"], f"brak gościa „{glowny}” na liście"))
+        self.oczekujace = []
+        return pd.DataFrame(wynik, columns=KOLUMNY_GOSCIE)
+
+    def _przyjmij(self, nr, gosc, wynik):
+        klucz = klucz_goscia(gosc["Imie_Nazwisko"])
+        if not klucz:
+            self.odrzucone.append((nr, "", "brak imienia i nazwiska"))
+            return False
+        if klucz in self.znani:
+            self.odrzucone.append((nr, gosc["Imie_Nazwisko"], "już jest na liście"))
+            return False
+        self.znani.add(klucz)
+        wynik.append(gosc)
+        self.przyjete += 1
+        return True
+
+
+def importuj(plik, nazwa_pliku, imiona_na_liscie, zapisz, rozmiar_paczki=ROZMIAR_PACZKI, postep=None):
+    # zapisz(ramka) dopisuje przyjętych gości do arkusza (jedna paczka = jeden zapis);
+    # postep(liczba przeczytanych wierszy, liczba przyjętych) wołamy po każdej paczce
+    imp = ImportGosci(imiona_na_liscie)
+    for paczka in czytaj_paczki(plik, nazwa_pliku, rozmiar_paczki):
+        przyjeci = imp.przetworz(paczka)
+        if not przyjeci.empty:
+            zapisz(przyjeci)
+        if postep is not None:
+            postep(imp.wiersz - 1, imp.przyjete)
+    reszta = imp.zakoncz()
+    if not reszta.empty:
+        zapisz(reszta)
+    return imp
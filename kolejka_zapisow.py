@@ -0,0 +1,293 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+from gspread.exceptions import APIError
+
+from magazyn import IndeksRekordow, Magazyn, Zmiany, ZmianyRekordow, zastosuj_do_wartosci
+from schemat import KOLUMNA_ID
+
+KODY_PRZEJSCIOWE = {429, 500, 502, 503, 504}
+
+
+# ==========================================================
+# KOLEJKA ZAPISÓW W TLE (write-behind)
+# ==========================================================
+# Zapisy trafiają najpierw do lokalnego pliku SQLite i od razu wracają do interfejsu.
+# Wątek w tle zbiera kolejne operacje na tej samej zakładce w jedną paczkę Zmiany
+# (czyli jedno append_rows / batch_update) i wysyła je z ponawianiem i wykładniczym odstępem.
+# Niewysłane operacje zostają w pliku i są wysyłane po ponownym uruchomieniu aplikacji.
+# Zapisy rekordów trzymamy w postaci adresowanej po ID – numery wierszy wyznaczamy dopiero przy wysyłce,
+# na podstawie aktualnej zawartości zakładki, więc inne zapisy i zmiany w arkuszu ich nie przesuwają.
+# Odczyty przez kolejkę zwracają stan magazynu z naniesionymi oczekującymi operacjami – ponowne pobranie
+# (koniec TTL, unieważnienie pamięci) nie gubi zapisów, które jeszcze nie dotarły.
+# Operacja odrzucona na stałe jest odkładana (nieudana = 1) razem z późniejszymi operacjami tej zakładki
+# adresowanymi numerami wierszy (liczone przy założeniu, że odrzucona się powiodła); po_bledzie(arkusz)
+# pozwala wtedy unieważnić pamięć zakładki.
+class KolejkaZapisow(Magazyn):
+    def __init__(self, magazyn, sciezka="kolejka_zapisow.db", okno=0.3, bazowe_opoznienie=1.0,
+                 maks_opoznienie=60.0, maks_prob=5, po_zapisie=None, po_bledzie=None, uruchom=True):
+        self.magazyn = magazyn
+        self.okno = okno
+        self.bazowe_opoznienie = bazowe_opoznienie
+        self.maks_opoznienie = maks_opoznienie
+        self.maks_prob = maks_prob
+        self.po_zapisie = po_zapisie
+        self.po_bledzie = po_bledzie
+        self.ostatni_blad = None
+        self.blad_trwaly = None
+
+        self.blokada = threading.Lock()
+        self.wysylanie = threading.Lock()    # wysyłka operacji i jej usunięcie z kolejki jako jeden krok
+        self.sygnal = threading.Event()
+        self.conn = sqlite3.connect(sciezka, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS kolejka ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, operacja TEXT NOT NULL, nieudana INTEGER NOT NULL DEFAULT 0)"
+            )
+
+        self.watek = None
+        if uruchom:
+            self.watek = threading.Thread(target=self._petla, name="kolejka-zapisow", daemon=True)
+            self.watek.start()
+            # Operacje z poprzedniego uruchomienia wysyłamy od razu
+            self.sygnal.set()
+
+    # --- ODCZYTY: MAGAZYN + OCZEKUJĄCE OPERACJE ---
+    def istnieje(self, nazwa):
+        return self.magazyn.istnieje(nazwa)
+
+    def pobierz_wartosci(self, nazwa):
+        return self.pobierz_wiele([nazwa])[nazwa]
+
+    def pobierz_wiele(self, nazwy):
+        # Pod blokadą wysyłki: żadna operacja nie zniknie z kolejki między odczytem magazynu a listą oczekujących
+        with self.wysylanie:
+            wynik = self.magazyn.pobierz_wiele(nazwy)
+            oczekujace = self._oczekujace()
+        for _, operacja in oczekujace:
+            if operacja["arkusz"] in wynik:
+                wynik[operacja["arkusz"]] = nanies_operacje(wynik[operacja["arkusz"]], operacja)
+        return wynik
+
+    def pobierz_komorke(self, nazwa, wiersz, kolumna):
+        if any(op["arkusz"] == nazwa for _, op in self._oczekujace()):
+            return Magazyn.pobierz_komorke(self, nazwa, wiersz, kolumna)
+        return self.magazyn.pobierz_komorke(nazwa, wiersz, kolumna)
+
+    # --- ZAPISY TRAFIAJĄ DO KOLEJKI ---
+    def _dodaj(self, operacja):
+        with self.blokada, self.conn:
+            self.conn.execute("INSERT INTO kolejka (operacja) VALUES (?)", (json.dumps(operacja, default=str),))
+        self.sygnal.set()
+
+    def dopisz_wiersz(self, nazwa, wiersz):
+        self.dopisz_wiersze(nazwa, [wiersz])
+
+    def dopisz_wiersze(self, nazwa, wiersze):
+        self.zastosuj_zmiany(nazwa, Zmiany(dopisane=[list(w) for w in wiersze]))
+
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        self.zastosuj_zmiany(nazwa, Zmiany(komorki=[(wiersz, kolumna, wartosc)]))
+
+    def usun_wiersz(self, nazwa, wiersz):
+        self.zastosuj_zmiany(nazwa, Zmiany(usuniete=[wiersz]))
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        if zmiany.pusta():
+            return
+        self._dodaj({
+            "rodzaj": "zmiany", "arkusz": nazwa,
+            "komorki": zmiany.komorki, "usuniete": zmiany.usuniete, "dopisane": zmiany.dopisane,
+        })
+
+    def nadpisz(self, nazwa, wartosci):
+        self._dodaj({"rodzaj": "nadpisz", "arkusz": nazwa, "wartosci": wartosci})
+
+    def zastosuj_zmiany_rekordow(self, nazwa, zmiany_rekordow, zmiany):
+        # Zapamiętujemy postać po ID; numery wierszy (zmiany) wyznaczymy od nowa przy wysyłce
+        if zmiany_rekordow.pusta():
+            return
+        self._dodaj({
+            "rodzaj": "rekordy", "arkusz": nazwa, "zmienione": zmiany_rekordow.zmienione,
+            "usuniete": [str(i) for i in zmiany_rekordow.usuniete], "dopisane": zmiany_rekordow.dopisane,
+        })
+
+    # --- STAN KOLEJKI ---
+    def glebokosc(self):
+        with self.blokada:
+            (n,) = self.conn.execute("SELECT COUNT(*) FROM kolejka WHERE nieudana = 0").fetchone()
+        return n
+
+    def _oczekujace(self):
+        with self.blokada:
+            wiersze = self.conn.execute("SELECT id, operacja FROM kolejka WHERE nieudana = 0 ORDER BY id").fetchall()
+        return [(i, json.loads(o)) for i, o in wiersze]
+
+    def nieudane(self):
+        with self.blokada:
+            (n,) = self.conn.execute("SELECT COUNT(*) FROM kolejka WHERE nieudana = 1").fetchone()
+        return n
+
+    def oproznij(self, timeout=30.0):
+        # Czeka, aż wszystkie oczekujące operacje zostaną wysłane (przydatne przy zamykaniu i w benchmarkach)
+        koniec = time.monotonic() + timeout
+        while self.glebokosc() and time.monotonic() < koniec:
+            self.sygnal.set()
+            time.sleep(0.05)
+        return self.glebokosc() == 0
+
+    # --- WĄTEK WYSYŁAJĄCY ---
+    def _petla(self):
+        while True:
+            self.sygnal.wait()
+            self.sygnal.clear()
+            # Krótkie okno, żeby zebrać zapisy z tej samej akcji (np. gość + osoba towarzysząca)
+            time.sleep(self.okno)
+            self.wyslij_oczekujace()
+
+    def wyslij_oczekujace(self):
+        # Po odrzuconej operacji czytamy kolejkę od nowa – bez operacji odłożonych razem z nią
+        wyslane = False
+        while not wyslane:
+            wyslane = all(self._wyslij_z_ponawianiem(paczka) for paczka in polacz_operacje(self._oczekujace()))
+
+    def _wyslij_z_ponawianiem(self, paczka):
+        ids, operacja = paczka
+        proba = 0
+        while True:
+            try:
+                with self.wysylanie:
+                    self._wykonaj(operacja)
+                    self._usun(ids)
+                break
+            except Exception as e:
+                proba += 1
+                self.ostatni_blad = f"{operacja['arkusz']}: {e}"
+                if not czy_przejsciowy(e) and proba >= self.maks_prob:
+                    # Błąd trwały (np. zła zakładka) – odkładamy operację, żeby nie blokowała kolejki
+                    self.blad_trwaly = self.ostatni_blad
+                    self.ostatni_blad = None
+                    self._usun(ids, nieudana=True)
+                    self._po_odrzuceniu(ids, operacja)
+                    return False
+                opoznienie = min(self.maks_opoznienie, self.bazowe_opoznienie * 2 ** (proba - 1))
+                time.sleep(opoznienie * random.uniform(0.5, 1.0))
+        self.ostatni_blad = None
+        if self.po_zapisie is not None:
+            self.po_zapisie(operacja["arkusz"])
+        return True
+
+    def _po_odrzuceniu(self, ids, operacja):
+        # Późniejsze operacje tej zakładki adresowane numerami wierszy zakładały, że odrzucona się powiodła –
+        # odkładamy je razem z nią. Rekordy (po ID) i dopisywanie wierszy nie zależą od numeracji i zostają.
+        arkusz = operacja["arkusz"]
+        zalezne = [
+            i for i, op in self._oczekujace()
+            if i > max(ids) and op["arkusz"] == arkusz and op["rodzaj"] == "zmiany" and (op["komorki"] or op["usuniete"])
+        ]
+        if zalezne:
+            self._usun(zalezne, nieudana=True)
+        if self.po_bledzie is not None:
+            self.po_bledzie(arkusz)
+
+    def _wykonaj(self, operacja):
+        if operacja["rodzaj"] == "nadpisz":
+            self.magazyn.nadpisz(operacja["arkusz"], operacja["wartosci"])
+        elif operacja["rodzaj"] == "rekordy":
+            # Wiersze rekordów wyszukujemy w aktualnej zawartości zakładki (jeden odczyt na paczkę)
+            wartosci = self.magazyn.pobierz_wartosci(operacja["arkusz"])
+            self.magazyn.zastosuj_zmiany(operacja["arkusz"], zmiany_rekordow_z(operacja, wartosci))
+        else:
+            komorki = [tuple(k) for k in operacja["komorki"]]
+            self.magazyn.zastosuj_zmiany(
+                operacja["arkusz"], Zmiany(komorki, operacja["usuniete"], operacja["dopisane"])
+            )
+
+    def _usun(self, ids, nieudana=False):
+        znaki = ", ".join("?" for _ in ids)
+        with self.blokada, self.conn:
+            if nieudana:
+                self.conn.execute(f"UPDATE kolejka SET nieudana = 1 WHERE id IN ({znaki})", ids)
+            else:
+                self.conn.execute(f"DELETE FROM kolejka WHERE id IN ({znaki})", ids)
+
+
+def czy_przejsciowy(blad):
+    # Limit zapytań (429) i błędy serwera ponawiamy bez końca; błędy sieci także
+    if isinstance(blad, APIError):
+        return getattr(blad.response, "status_code", None) in KODY_PRZEJSCIOWE
+    return isinstance(blad, (OSError, ConnectionError, TimeoutError))
+
+
+def zmiany_rekordow_z(operacja, wartosci):
+    # Operacja "rekordy" z kolejki przeliczona na numery wierszy według podanej zawartości zakładki
+    zmiany_rekordow = ZmianyRekordow(operacja["zmienione"], operacja["usuniete"], operacja["dopisane"])
+    return IndeksRekordow(wartosci).zmiany(zmiany_rekordow)
+
+
+def nanies_operacje(wartosci, operacja):
+    # Wartości zakładki po wykonaniu operacji z kolejki (bez zmiany listy wejściowej)
+    if operacja["rodzaj"] == "nadpisz":
+        return [list(w) for w in operacja["wartosci"]]
+    if operacja["rodzaj"] == "rekordy":
+        return zastosuj_do_wartosci(wartosci, zmiany_rekordow_z(operacja, wartosci))
+    komorki = [tuple(k) for k in operacja["komorki"]]
+    return zastosuj_do_wartosci(wartosci, Zmiany(komorki, operacja["usuniete"], operacja["dopisane"]))
+
+
+def polacz_rekordy(ostatnia, op):
+    # Dołącza operację "rekordy" do poprzedniej tak, jakby wykonały się po kolei: zmiana usuniętego rekordu
+    # przepada, a zmiana lub usunięcie rekordu dopisanego w tej samej paczce trafia wprost do dopisywanych
+    dopisane = [dict(r) for r in ostatnia["dopisane"]]
+    nowe = {str(r[KOLUMNA_ID]): r for r in dopisane if r.get(KOLUMNA_ID)}
+    zmienione = {i: dict(w) for i, w in ostatnia["zmienione"].items()}
+    usuniete = list(ostatnia["usuniete"])
+    for id_rekordu, wartosci in op["zmienione"].items():
+        if id_rekordu in usuniete:
+            continue
+        if id_rekordu in nowe:
+            nowe[id_rekordu].update(wartosci)
+        else:
+            zmienione.setdefault(id_rekordu, {}).update(wartosci)
+    for id_rekordu in op["usuniete"]:
+        if id_rekordu in nowe:
+            usuniety = nowe.pop(id_rekordu)
+            dopisane = [r for r in dopisane if r is not usuniety]
+        elif id_rekordu not in usuniete:
+            zmienione.pop(id_rekordu, None)
+            usuniete.append(id_rekordu)
+    return {**ostatnia, "zmienione": zmienione, "usuniete": usuniete, "dopisane": dopisane + op["dopisane"]}
+
+
+def polacz_operacje(operacje):
+    # Łączy kolejne operacje "zmiany" na tej samej zakładce w jedną paczkę, o ile nie zmienia to wyniku.
+    # Paczka Zmiany wykonuje się w kolejności: komórki -> usuwanie -> dopisywanie, więc dołączamy tylko
+    # operacje z tej samej lub późniejszej fazy; usuwanie łączymy wyłącznie z samymi komórkami.
+    # Operacje "rekordy" (po ID) łączymy z poprzednimi operacjami "rekordy" tej zakładki – patrz polacz_rekordy.
+    paczki = []
+    for id_op, op in operacje:
+        if paczki and op["rodzaj"] == "rekordy":
+            ids, ostatnia = paczki[-1]
+            if ostatnia["rodzaj"] == "rekordy" and ostatnia["arkusz"] == op["arkusz"]:
+                paczki[-1] = (ids + [id_op], polacz_rekordy(ostatnia, op))
+                continue
+        if paczki and op["rodzaj"] == "zmiany":
+            ids, ostatnia = paczki[-1]
+            if ostatnia["rodzaj"] == "zmiany" and ostatnia["arkusz"] == op["arkusz"]:
+                mozna = True
+                if op["komorki"] and (ostatnia["usuniete"] or ostatnia["dopisane"]):
+                    mozna = False
+                if op["usuniete"] and (ostatnia["usuniete"] or ostatnia["dopisane"]):
+                    mozna = False
+                if mozna:
+                    ostatnia["komorki"] = ostatnia["komorki"] + op["komorki"]
+                    ostatnia["usuniete"] = ostatnia["usuniete"] + op["usuniete"]
+                    ostatnia["dopisane"] = ostatnia["dopisane"] + op["dopisane"]
+                    ids.append(id_op)
+                    continue
+        paczki.append(([id_op], dict(op)))
+    return paczki
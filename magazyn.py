@@ -0,0 +1,720 @@
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+
+import gspread
+from gspread.utils import rowcol_to_a1
+from gspread.worksheet import Worksheet
+from oauth2client.service_account import ServiceAccountCredentials
+
+from profil import profil
+from schemat import KOLUMNA_ID, nowe_id
+
+NAZWA_PLIKU = "Wesele_Baza"
+ARKUSZE = ["Goscie", "Obsluga", "Zadania", "Stoly", "Harmonogram", "Ustawienia", "Miejsca"]
+ARKUSZE_WYMAGANE = ["Goscie", "Obsluga"]
+
+
+def wartosci_na_rekordy(wartosci):
+    # Odpowiednik get_all_records(): pierwszy wiersz to nagłówki, reszta to dane
+    if not wartosci:
+        return []
+    naglowki = wartosci[0]
+    rekordy = []
+    for wiersz in wartosci[1:]:
+        wiersz = list(wiersz) + [""] * (len(naglowki) - len(wiersz))
+        rekordy.append(dict(zip(naglowki, wiersz)))
+    return rekordy
+
+
+# --- PACZKA ZMIAN DLA JEDNEGO ARKUSZA ---
+# komorki  – lista (wiersz, kolumna, wartosc) do nadpisania, numeracja sprzed usunięć
+# usuniete – numery wierszy do skasowania
+# dopisane – nowe wiersze dopisywane na końcu arkusza
+class Zmiany:
+    def __init__(self, komorki=None, usuniete=None, dopisane=None):
+        self.komorki = komorki or []
+        self.usuniete = usuniete or []
+        self.dopisane = dopisane or []
+
+    def pusta(self):
+        return not (self.komorki or self.usuniete or self.dopisane)
+
+    def __repr__(self):
+        return f"Zmiany(komorki={len(self.komorki)}, usuniete={len(self.usuniete)}, dopisane={len(self.dopisane)})"
+
+
+# --- ZMIANY ADRESOWANE PO ID REKORDU (zamieniane na Zmiany przez IndeksRekordow) ---
+# zmienione – {ID: {kolumna: wartość}}
+# usuniete  – lista ID
+# dopisane  – nowe rekordy jako słowniki {kolumna: wartość} (z ID)
+class ZmianyRekordow:
+    def __init__(self, zmienione=None, usuniete=None, dopisane=None):
+        self.zmienione = zmienione or {}
+        self.usuniete = usuniete or []
+        self.dopisane = dopisane or []
+
+    def pusta(self):
+        return not (self.zmienione or self.usuniete or self.dopisane)
+
+    def __repr__(self):
+        return (f"ZmianyRekordow(zmienione={len(self.zmienione)}, usuniete={len(self.usuniete)}, "
+                f"dopisane={len(self.dopisane)})")
+
+
+# --- INDEKS ZAKŁADKI: nagłówek -> numer kolumny, ID -> numer wiersza ---
+# Budowany z wartości zakładki (wiersz 1 = nagłówki). Wiersze bez ID i powtórzone ID trafiają do bez_id –
+# dostaną nowe identyfikatory przy migracji.
+class IndeksRekordow:
+    def __init__(self, wartosci):
+        self.naglowki = [str(n) for n in wartosci[0]] if wartosci else []
+        self.kolumny = {n: i for i, n in enumerate(self.naglowki, start=1)}
+        self.wiersze = {}
+        self.bez_id = []
+        kolumna = self.kolumny.get(KOLUMNA_ID)
+        for nr, wiersz in enumerate(wartosci[1:], start=2):
+            id_rekordu = str(wiersz[kolumna - 1]).strip() if kolumna and kolumna <= len(wiersz) else ""
+            if id_rekordu and id_rekordu not in self.wiersze:
+                self.wiersze[id_rekordu] = nr
+            else:
+                self.bez_id.append(nr)
+
+    def ma_kolumny(self, kolumny):
+        return all(k in self.kolumny for k in kolumny)
+
+    def wiersz(self, id_rekordu):
+        return self.wiersze.get(str(id_rekordu))
+
+    def zmiany(self, zmiany_rekordow):
+        # Rekordy, których nie ma już w zakładce (usunięte w innej sesji), oraz nieznane kolumny pomijamy
+        komorki = []
+        for id_rekordu, wartosci in zmiany_rekordow.zmienione.items():
+            nr = self.wiersz(id_rekordu)
+            if nr is None:
+                continue
+            for kolumna, wartosc in wartosci.items():
+                if kolumna in self.kolumny:
+                    komorki.append((nr, self.kolumny[kolumna], wartosc))
+        usuniete = sorted({self.wiersze[str(i)] for i in zmiany_rekordow.usuniete if str(i) in self.wiersze})
+        dopisane = [[r.get(n, "") for n in self.naglowki] for r in zmiany_rekordow.dopisane]
+        if dopisane and not self.naglowki:
+            # Zakładka bez nagłówków: zakładamy je z kolumn pierwszego rekordu
+            naglowki = list(zmiany_rekordow.dopisane[0])
+            dopisane = [naglowki] + [[r.get(n, "") for n in naglowki] for r in zmiany_rekordow.dopisane]
+        return Zmiany(komorki, usuniete, dopisane)
+
+    def migracja(self):
+        # Zmiany nadające ID: kolumna "ID" na końcu nagłówków (jeśli jej brak) i nowe ID dla wierszy bez niego
+        if not self.naglowki:
+            return Zmiany()
+        kolumna = self.kolumny.get(KOLUMNA_ID)
+        komorki = []
+        if kolumna is None:
+            kolumna = len(self.naglowki) + 1
+            komorki.append((1, kolumna, KOLUMNA_ID))
+        komorki += [(nr, kolumna, nowe_id()) for nr in self.bez_id]
+        return Zmiany(komorki=komorki)
+
+
+def _komorka_sheets(wartosc):
+    if isinstance(wartosc, bool):
+        return {"userEnteredValue": {"boolValue": wartosc}}
+    if isinstance(wartosc, (int, float)):
+        return {"userEnteredValue": {"numberValue": wartosc}}
+    return {"userEnteredValue": {"stringValue": "" if wartosc is None else str(wartosc)}}
+
+
+def zastosuj_do_wartosci(wartosci, zmiany):
+    # Zmiany naniesione na listę wierszy tak, jak zrobiłby to arkusz; wynik to nowa lista
+    nowe = list(wartosci)
+    for wiersz, kolumna, wartosc in zmiany.komorki:
+        while len(nowe) < wiersz:
+            nowe.append([])
+        w = list(nowe[wiersz - 1])
+        w.extend([""] * (kolumna - len(w)))
+        w[kolumna - 1] = wartosc
+        nowe[wiersz - 1] = w
+    for wiersz in sorted(zmiany.usuniete, reverse=True):
+        if wiersz <= len(nowe):
+            del nowe[wiersz - 1]
+    nowe.extend(list(w) for w in zmiany.dopisane)
+    return nowe
+
+
+# ==========================================================
+# WSPÓLNY INTERFEJS MAGAZYNU
+# ==========================================================
+# Wiersze i kolumny numerujemy od 1, tak jak w Google Sheets (wiersz 1 = nagłówki).
+# Metody abstrakcyjne musi mieć każdy magazyn – brak którejś zgłasza błąd już przy tworzeniu obiektu.
+class Magazyn(ABC):
+    @abstractmethod
+    def istnieje(self, nazwa):
+        ...
+
+    @abstractmethod
+    def pobierz_wartosci(self, nazwa):
+        ...
+
+    def pobierz_rekordy(self, nazwa):
+        return wartosci_na_rekordy(self.pobierz_wartosci(nazwa))
+
+    def pobierz_wiele(self, nazwy):
+        # Zwraca {nazwa: wartości}; magazyny, które to potrafią, robią to jednym zapytaniem
+        return {nazwa: self.pobierz_wartosci(nazwa) for nazwa in nazwy}
+
+    @abstractmethod
+    def dopisz_wiersz(self, nazwa, wiersz):
+        ...
+
+    def dopisz_wiersze(self, nazwa, wiersze):
+        # Kilka wierszy naraz – jedna paczka zamiast osobnego zapisu na każdy wiersz
+        self.zastosuj_zmiany(nazwa, Zmiany(dopisane=[list(w) for w in wiersze]))
+
+    @abstractmethod
+    def nadpisz(self, nazwa, wartosci):
+        ...
+
+    @abstractmethod
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        ...
+
+    @abstractmethod
+    def usun_wiersz(self, nazwa, wiersz):
+        ...
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        # Kolejność ma znaczenie: najpierw komórki (stara numeracja), potem usuwanie od końca, na końcu dopisywanie
+        for wiersz, kolumna, wartosc in zmiany.komorki:
+            self.aktualizuj_komorke(nazwa, wiersz, kolumna, wartosc)
+        for wiersz in sorted(zmiany.usuniete, reverse=True):
+            self.usun_wiersz(nazwa, wiersz)
+        for wiersz in zmiany.dopisane:
+            self.dopisz_wiersz(nazwa, wiersz)
+
+    def zastosuj_zmiany_rekordow(self, nazwa, zmiany_rekordow, zmiany):
+        # zmiany – te same zmiany rekordów przeliczone na numery wierszy według stanu znanego wywołującemu.
+        # Magazyn zapisujący od razu korzysta z nich wprost; kolejka zapamiętuje postać po ID (kolejka_zapisow.py).
+        self.zastosuj_zmiany(nazwa, zmiany)
+
+    def pobierz_komorke(self, nazwa, wiersz, kolumna):
+        wartosci = self.pobierz_wartosci(nazwa)
+        if wiersz <= len(wartosci) and kolumna <= len(wartosci[wiersz - 1]):
+            return wartosci[wiersz - 1][kolumna - 1]
+        return None
+
+
+# ==========================================================
+# GOOGLE SHEETS
+# ==========================================================
+# Start połączenia: autoryzacja, otwarcie pliku (po kluczu – bez wyszukiwania w Drive) i jedno zapytanie
+# o metadane, które zwraca wszystkie zakładki naraz. Czasy kroków (w sekundach) trafiają do czasy_startu.
+# Przy włączonym profilu każde wywołanie API jest odcinkiem "sheets: ..." i liczy się do zakładki (profil.py).
+class MagazynSheets(Magazyn):
+    def __init__(self, dane_logowania, nazwa_pliku=NAZWA_PLIKU, klucz=None):
+        self.czasy_startu = {}
+        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+        client = self._zmierz("autoryzacja", lambda: gspread.authorize(
+            ServiceAccountCredentials.from_json_keyfile_dict(dane_logowania, scope)
+        ))
+        self.sh = self._zmierz("otwarcie", lambda: client.open_by_key(klucz) if klucz else client.open(nazwa_pliku))
+
+        wszystkie = self._zmierz("zakladki", self.sh.worksheets)
+        po_tytule = {ws.title: ws for ws in wszystkie}
+        self.arkusze = {nazwa: po_tytule.get(nazwa) for nazwa in ARKUSZE}
+        self.nastepne_id = max([ws.id for ws in wszystkie] + [0]) + 1
+
+    def _zmierz(self, krok, funkcja):
+        start = time.perf_counter()
+        wynik = funkcja()
+        self.czasy_startu[krok] = time.perf_counter() - start
+        return wynik
+
+    def zaloz_arkusze(self, naglowki):
+        # Brakujące zakładki zakładamy razem z wierszem nagłówków – wszystko jednym batch_update
+        brakujace = [nazwa for nazwa in naglowki if not self.istnieje(nazwa)]
+        if not brakujace:
+            return
+        zadania = []
+        for nazwa in brakujace:
+            kolumny = list(naglowki[nazwa])
+            id_arkusza = self.nastepne_id
+            self.nastepne_id += 1
+            zadania.append({"addSheet": {"properties": {
+                "sheetId": id_arkusza, "title": nazwa,
+                "gridProperties": {"rowCount": 1000, "columnCount": max(len(kolumny), 26)},
+            }}})
+            zadania.append({"updateCells": {
+                "start": {"sheetId": id_arkusza, "rowIndex": 0, "columnIndex": 0},
+                "rows": [{"values": [_komorka_sheets(k) for k in kolumny]}],
+                "fields": "userEnteredValue",
+            }})
+        odpowiedz = self._zmierz("zakladanie", lambda: self.sh.batch_update({"requests": zadania}))
+        for wynik in odpowiedz.get("replies", []):
+            if "addSheet" in wynik:
+                wlasciwosci = wynik["addSheet"]["properties"]
+                self.arkusze[wlasciwosci["title"]] = Worksheet(self.sh, wlasciwosci, self.sh.id, self.sh.client)
+
+    def istnieje(self, nazwa):
+        return self.arkusze.get(nazwa) is not None
+
+    def pobierz_wartosci(self, nazwa):
+        with profil.mierz("sheets: get_all_values"):
+            wartosci = self.arkusze[nazwa].get_all_values()
+        profil.wywolanie_api(nazwa, wartosci)
+        return wartosci
+
+    def pobierz_rekordy(self, nazwa):
+        with profil.mierz("sheets: get_all_records"):
+            rekordy = self.arkusze[nazwa].get_all_records()
+        profil.wywolanie_api(nazwa, rekordy)
+        return rekordy
+
+    def pobierz_wiele(self, nazwy):
+        # Wszystkie zakładki jednym values_batch_get zamiast osobnego zapytania na każdą
+        # (w profilu to wywołanie liczy się do każdej z pobranych zakładek)
+        if not nazwy:
+            return {}
+        with profil.mierz("sheets: values_batch_get"):
+            odpowiedz = self.sh.values_batch_get([f"'{nazwa}'" for nazwa in nazwy])
+        zakresy = odpowiedz.get("valueRanges", [])
+        wynik = {nazwa: zakres.get("values", []) for nazwa, zakres in zip(nazwy, zakresy)}
+        for nazwa, wartosci in wynik.items():
+            profil.wywolanie_api(nazwa, wartosci)
+        return wynik
+
+    def dopisz_wiersz(self, nazwa, wiersz):
+        with profil.mierz("sheets: append_row"):
+            self.arkusze[nazwa].append_row(wiersz)
+        profil.wywolanie_api(nazwa, wiersz)
+
+    def nadpisz(self, nazwa, wartosci):
+        # Najpierw zapisujemy nowe dane, dopiero potem czyścimy nadmiarowe wiersze –
+        # arkusz nie jest ani przez chwilę pusty
+        ws = self.arkusze[nazwa]
+        with profil.mierz("sheets: update"):
+            ws.update(wartosci, "A1")
+        profil.wywolanie_api(nazwa, wartosci)
+        # Zakres otwarty od dołu ("A11:F" = do końca arkusza): ws.row_count pochodzi z metadanych pobranych
+        # przy otwarciu i nie uwzględnia wierszy dopisanych później przez batch_update.
+        # Szerokość: siatka ma co najmniej tyle kolumn, ile miała przy otwarciu i ile właśnie zapisaliśmy.
+        kolumny = max([ws.col_count] + [len(w) for w in wartosci])
+        ostatnia = rowcol_to_a1(1, kolumny).rstrip("0123456789")
+        with profil.mierz("sheets: batch_clear"):
+            ws.batch_clear([f"A{len(wartosci) + 1}:{ostatnia}"])
+        profil.wywolanie_api(nazwa, None)
+
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        with profil.mierz("sheets: update_cell"):
+            self.arkusze[nazwa].update_cell(wiersz, kolumna, wartosc)
+        profil.wywolanie_api(nazwa, wartosc)
+
+    def usun_wiersz(self, nazwa, wiersz):
+        with profil.mierz("sheets: delete_rows"):
+            self.arkusze[nazwa].delete_rows(wiersz)
+        profil.wywolanie_api(nazwa, None)
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        # Cała paczka idzie jednym wywołaniem batch_update
+        if zmiany.pusta():
+            return
+        id_arkusza = self.arkusze[nazwa].id
+        zadania = []
+
+        # Sąsiednie komórki w tym samym wierszu łączymy w jeden zakres
+        komorki = sorted(zmiany.komorki, key=lambda k: (k[0], k[1]))
+        i = 0
+        while i < len(komorki):
+            wiersz, kolumna, _ = komorki[i]
+            j = i + 1
+            while j < len(komorki) and komorki[j][0] == wiersz and komorki[j][1] == kolumna + (j - i):
+                j += 1
+            zadania.append({"updateCells": {
+                "range": {"sheetId": id_arkusza, "startRowIndex": wiersz - 1, "endRowIndex": wiersz,
+                          "startColumnIndex": kolumna - 1, "endColumnIndex": kolumna - 1 + (j - i)},
+                "rows": [{"values": [_komorka_sheets(k[2]) for k in komorki[i:j]]}],
+                "fields": "userEnteredValue",
+            }})
+            i = j
+
+        for wiersz in sorted(zmiany.usuniete, reverse=True):
+            zadania.append({"deleteDimension": {"range": {
+                "sheetId": id_arkusza, "dimension": "ROWS", "startIndex": wiersz - 1, "endIndex": wiersz,
+            }}})
+
+        if zmiany.dopisane:
+            zadania.append({"appendCells": {
+                "sheetId": id_arkusza,
+                "rows": [{"values": [_komorka_sheets(v) for v in w]} for w in zmiany.dopisane],
+                "fields": "userEnteredValue",
+            }})
+
+        with profil.mierz("sheets: batch_update"):
+            self.sh.batch_update({"requests": zadania})
+        profil.wywolanie_api(nazwa, zadania)
+
+    def pobierz_komorke(self, nazwa, wiersz, kolumna):
+        with profil.mierz("sheets: cell"):
+            wartosc = self.arkusze[nazwa].cell(wiersz, kolumna).value
+        profil.wywolanie_api(nazwa, wartosc)
+        return wartosc
+
+
+# ==========================================================
+# LOKALNY SQLITE (działa bez sieci)
+# ==========================================================
+# Każdy arkusz to zbiór wierszy (poz, dane), gdzie dane to lista wartości zapisana jako JSON.
+# Zakładki powstają przy pierwszym zapisie, więc lokalnie żadnej nie brakuje.
+class MagazynSQLite(Magazyn):
+    def __init__(self, sciezka="wesele.db"):
+        self.sciezka = sciezka
+        self.blokada = threading.Lock()
+        self.conn = sqlite3.connect(sciezka, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS wiersze ("
+                "arkusz TEXT NOT NULL, poz INTEGER NOT NULL, dane TEXT NOT NULL, "
+                "PRIMARY KEY (arkusz, poz))"
+            )
+
+    def zaloz_arkusze(self, naglowki):
+        # Pustym zakładkom dopisujemy wiersz nagłówków, tak jak przy ręcznym zakładaniu arkusza
+        for nazwa, kolumny in naglowki.items():
+            if self.czy_pusty(nazwa):
+                self.nadpisz(nazwa, [list(kolumny)])
+
+    def istnieje(self, nazwa):
+        return True
+
+    def czy_pusty(self, nazwa):
+        with self.blokada:
+            wynik = self.conn.execute("SELECT 1 FROM wiersze WHERE arkusz = ? LIMIT 1", (nazwa,)).fetchone()
+        return wynik is None
+
+    def pobierz_wartosci(self, nazwa):
+        with self.blokada:
+            wiersze = self.conn.execute(
+                "SELECT dane FROM wiersze WHERE arkusz = ? ORDER BY poz", (nazwa,)
+            ).fetchall()
+        return [json.loads(d) for (d,) in wiersze]
+
+    def pobierz_wiele(self, nazwy):
+        wynik = {nazwa: [] for nazwa in nazwy}
+        if not nazwy:
+            return wynik
+        znaki = ", ".join("?" for _ in nazwy)
+        with self.blokada:
+            wiersze = self.conn.execute(
+                f"SELECT arkusz, dane FROM wiersze WHERE arkusz IN ({znaki}) ORDER BY arkusz, poz", list(nazwy)
+            ).fetchall()
+        for arkusz, dane in wiersze:
+            wynik[arkusz].append(json.loads(dane))
+        return wynik
+
+    def _ostatnia_poz(self, nazwa):
+        (poz,) = self.conn.execute("SELECT COALESCE(MAX(poz), 0) FROM wiersze WHERE arkusz = ?", (nazwa,)).fetchone()
+        return poz
+
+    def dopisz_wiersz(self, nazwa, wiersz):
+        with self.blokada, self.conn:
+            poz = self._ostatnia_poz(nazwa) + 1
+            self.conn.execute(
+                "INSERT INTO wiersze (arkusz, poz, dane) VALUES (?, ?, ?)",
+                (nazwa, poz, json.dumps(list(wiersz), default=str)),
+            )
+
+    def nadpisz(self, nazwa, wartosci):
+        with self.blokada, self.conn:
+            self.conn.execute("DELETE FROM wiersze WHERE arkusz = ?", (nazwa,))
+            self.conn.executemany(
+                "INSERT INTO wiersze (arkusz, poz, dane) VALUES (?, ?, ?)",
+                [(nazwa, i + 1, json.dumps(list(w), default=str)) for i, w in enumerate(wartosci)],
+            )
+
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        with self.blokada, self.conn:
+            # Brakujące wcześniejsze wiersze uzupełniamy pustymi, żeby numeracja zgadzała się z Sheets
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO wiersze (arkusz, poz, dane) VALUES (?, ?, '[]')",
+                [(nazwa, poz) for poz in range(1, wiersz)],
+            )
+            obecny = self.conn.execute(
+                "SELECT dane FROM wiersze WHERE arkusz = ? AND poz = ?", (nazwa, wiersz)
+            ).fetchone()
+            dane = json.loads(obecny[0]) if obecny else []
+            if len(dane) < kolumna:
+                dane += [""] * (kolumna - len(dane))
+            dane[kolumna - 1] = wartosc
+            self.conn.execute(
+                "INSERT OR REPLACE INTO wiersze (arkusz, poz, dane) VALUES (?, ?, ?)",
+                (nazwa, wiersz, json.dumps(dane, default=str)),
+            )
+
+    def usun_wiersz(self, nazwa, wiersz):
+        with self.blokada, self.conn:
+            self._usun_wiersz(nazwa, wiersz)
+
+    def _usun_wiersz(self, nazwa, wiersz):
+        self.conn.execute("DELETE FROM wiersze WHERE arkusz = ? AND poz = ?", (nazwa, wiersz))
+        # Przesuwamy kolejne wiersze w górę (jak delete_rows w Sheets); przez ujemne pozycje,
+        # żeby nie naruszyć klucza głównego w trakcie aktualizacji
+        self.conn.execute("UPDATE wiersze SET poz = -(poz - 1) WHERE arkusz = ? AND poz > ?", (nazwa, wiersz))
+        self.conn.execute("UPDATE wiersze SET poz = -poz WHERE arkusz = ? AND poz < 0", (nazwa,))
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        # Cała paczka w jednej transakcji
+        if zmiany.pusta():
+            return
+        with self.blokada, self.conn:
+            wiersze = {}
+            for wiersz, kolumna, wartosc in zmiany.komorki:
+                if wiersz not in wiersze:
+                    obecny = self.conn.execute(
+                        "SELECT dane FROM wiersze WHERE arkusz = ? AND poz = ?", (nazwa, wiersz)
+                    ).fetchone()
+                    wiersze[wiersz] = json.loads(obecny[0]) if obecny else []
+                dane = wiersze[wiersz]
+                if len(dane) < kolumna:
+                    dane += [""] * (kolumna - len(dane))
+                dane[kolumna - 1] = wartosc
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO wiersze (arkusz, poz, dane) VALUES (?, ?, ?)",
+                [(nazwa, w, json.dumps(d, default=str)) for w, d in wiersze.items()],
+            )
+            for wiersz in sorted(zmiany.usuniete, reverse=True):
+                self._usun_wiersz(nazwa, wiersz)
+            poz = self._ostatnia_poz(nazwa)
+            self.conn.executemany(
+                "INSERT INTO wiersze (arkusz, poz, dane) VALUES (?, ?, ?)",
+                [(nazwa, poz + i + 1, json.dumps(list(w), default=str)) for i, w in enumerate(zmiany.dopisane)],
+            )
+
+
+# ==========================================================
+# LOKALNY MAGAZYN Z LUSTREM W GOOGLE SHEETS
+# ==========================================================
+# Odczyty idą tylko z magazynu głównego, zapisy najpierw do głównego, potem do lustra.
+# Błąd lustra nie przerywa pracy – zapamiętujemy go, żeby pokazać w interfejsie.
+class MagazynZLustrem(Magazyn):
+    def __init__(self, glowny, lustro):
+        self.glowny = glowny
+        self.lustro = lustro
+        self.blad_lustra = None
+        # Pusty magazyn lokalny zasilamy jednorazowo danymi z lustra (jednym zapytaniem)
+        puste = [nazwa for nazwa in ARKUSZE if lustro.istnieje(nazwa) and glowny.czy_pusty(nazwa)]
+        for nazwa, wartosci in lustro.pobierz_wiele(puste).items():
+            glowny.nadpisz(nazwa, wartosci)
+
+    def _do_lustra(self, metoda, nazwa, *args):
+        if not self.lustro.istnieje(nazwa):
+            return
+        try:
+            getattr(self.lustro, metoda)(nazwa, *args)
+            self.blad_lustra = None
+        except Exception as e:
+            self.blad_lustra = f"{nazwa}: {e}"
+
+    def istnieje(self, nazwa):
+        return self.glowny.istnieje(nazwa)
+
+    def pobierz_wartosci(self, nazwa):
+        return self.glowny.pobierz_wartosci(nazwa)
+
+    def pobierz_wiele(self, nazwy):
+        return self.glowny.pobierz_wiele(nazwy)
+
+    def dopisz_wiersz(self, nazwa, wiersz):
+        self.glowny.dopisz_wiersz(nazwa, wiersz)
+        self._do_lustra("dopisz_wiersz", nazwa, wiersz)
+
+    def nadpisz(self, nazwa, wartosci):
+        self.glowny.nadpisz(nazwa, wartosci)
+        self._do_lustra("nadpisz", nazwa, wartosci)
+
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        self.glowny.aktualizuj_komorke(nazwa, wiersz, kolumna, wartosc)
+        self._do_lustra("aktualizuj_komorke", nazwa, wiersz, kolumna, wartosc)
+
+    def usun_wiersz(self, nazwa, wiersz):
+        self.glowny.usun_wiersz(nazwa, wiersz)
+        self._do_lustra("usun_wiersz", nazwa, wiersz)
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        self.glowny.zastosuj_zmiany(nazwa, zmiany)
+        self._do_lustra("zastosuj_zmiany", nazwa, zmiany)
+
+    def zastosuj_zmiany_rekordow(self, nazwa, zmiany_rekordow, zmiany):
+        self.glowny.zastosuj_zmiany_rekordow(nazwa, zmiany_rekordow, zmiany)
+        self._do_lustra("zastosuj_zmiany_rekordow", nazwa, zmiany_rekordow, zmiany)
+
+
+# ==========================================================
+# PAMIĘĆ PODRĘCZNA ARKUSZY (wspólna dla wszystkich sesji)
+# ==========================================================
+# Każda zakładka ma własny wpis (wartości, czas pobrania) i własny numer wersji.
+# Zapis trafia do magazynu i jednocześnie jest nanoszony na kopię wartości w pamięci, więc kolejny odczyt
+# (z dowolnej sesji) nie pyta magazynu. Każdy zapis podbija wersję zakładki – po niej sesje poznają,
+# że ich dane są nieaktualne. Wartości w pamięci nie są nigdy modyfikowane w miejscu.
+# Z tych samych wartości budujemy indeks ID -> wiersz; zapisy rekordów (wyszukanie wiersza + zapis)
+# wykonujemy pod jedną blokadą, żeby inny zapis nie przesunął wierszy pomiędzy.
+class MagazynZPamiecia(Magazyn):
+    def __init__(self, magazyn, ttl=120, zegar=time.monotonic):
+        self.magazyn = magazyn
+        self.ttl = ttl
+        self.zegar = zegar
+        self.blokada = threading.Lock()
+        self.blokada_zapisu = threading.RLock()
+        self.wpisy = {}
+        self.wersje = {}
+        self.indeksy = {}
+
+    def wersja(self, nazwa):
+        return self.wersje.get(nazwa, 0)
+
+    def uniewaznij(self, nazwa):
+        with self.blokada:
+            self.wpisy.pop(nazwa, None)
+            self.wersje[nazwa] = self.wersje.get(nazwa, 0) + 1
+
+    def _z_pamieci(self, nazwa):
+        wpis = self.wpisy.get(nazwa)
+        if wpis is None or self.zegar() - wpis[1] > self.ttl:
+            return None
+        return wpis[0]
+
+    def _zapamietaj(self, nazwa, wersja, wartosci):
+        # Zwraca wartości do użycia: przy niezmienionej treści te same obiekty co dotąd (te same indeksy i ramki)
+        with self.blokada:
+            # Jeśli w trakcie pobierania ktoś zapisał zakładkę, nie utrwalamy nieaktualnych danych
+            if self.wersje.get(nazwa, 0) != wersja:
+                return wartosci
+            wpis = self.wpisy.get(nazwa)
+            if wpis is not None and wpis[0] == wartosci:
+                self.wpisy[nazwa] = (wpis[0], self.zegar())
+                return wpis[0]
+            if wpis is not None:
+                # Po upływie TTL treść jest inna (np. edycja wprost w arkuszu) – nowa wersja dla sesji i ramek
+                self.wersje[nazwa] = wersja + 1
+            self.wpisy[nazwa] = (wartosci, self.zegar())
+            return wartosci
+
+    def istnieje(self, nazwa):
+        return self.magazyn.istnieje(nazwa)
+
+    def pobierz_wartosci(self, nazwa):
+        wartosci = self._z_pamieci(nazwa)
+        if wartosci is None:
+            wersja = self.wersja(nazwa)
+            wartosci = self._zapamietaj(nazwa, wersja, self.magazyn.pobierz_wartosci(nazwa))
+        return wartosci
+
+    def pobierz_wiele(self, nazwy):
+        wynik = {}
+        brakujace = []
+        for nazwa in nazwy:
+            wartosci = self._z_pamieci(nazwa)
+            if wartosci is None:
+                brakujace.append(nazwa)
+            else:
+                wynik[nazwa] = wartosci
+        if brakujace:
+            wersje = {nazwa: self.wersja(nazwa) for nazwa in brakujace}
+            for nazwa, wartosci in self.magazyn.pobierz_wiele(brakujace).items():
+                wynik[nazwa] = self._zapamietaj(nazwa, wersje[nazwa], wartosci)
+        return wynik
+
+    def _nanies(self, nazwa, zmiany):
+        # Podbija wersję i nanosi zapis na wartości w pamięci (nowa lista, zmienione wiersze skopiowane)
+        if zmiany.pusta():
+            return
+        with self.blokada:
+            self.wersje[nazwa] = self.wersje.get(nazwa, 0) + 1
+            wpis = self.wpisy.get(nazwa)
+            if wpis is not None:
+                self.wpisy[nazwa] = (zastosuj_do_wartosci(wpis[0], zmiany), wpis[1])
+
+    def dopisz_wiersz(self, nazwa, wiersz):
+        with self.blokada_zapisu:
+            self.magazyn.dopisz_wiersz(nazwa, wiersz)
+            self._nanies(nazwa, Zmiany(dopisane=[list(wiersz)]))
+
+    def dopisz_wiersze(self, nazwa, wiersze):
+        with self.blokada_zapisu:
+            self.magazyn.dopisz_wiersze(nazwa, wiersze)
+            self._nanies(nazwa, Zmiany(dopisane=[list(w) for w in wiersze]))
+
+    def nadpisz(self, nazwa, wartosci):
+        with self.blokada_zapisu:
+            self.magazyn.nadpisz(nazwa, wartosci)
+            with self.blokada:
+                self.wersje[nazwa] = self.wersje.get(nazwa, 0) + 1
+                self.wpisy[nazwa] = ([list(w) for w in wartosci], self.zegar())
+
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        with self.blokada_zapisu:
+            self.magazyn.aktualizuj_komorke(nazwa, wiersz, kolumna, wartosc)
+            self._nanies(nazwa, Zmiany(komorki=[(wiersz, kolumna, wartosc)]))
+
+    def usun_wiersz(self, nazwa, wiersz):
+        with self.blokada_zapisu:
+            self.magazyn.usun_wiersz(nazwa, wiersz)
+            self._nanies(nazwa, Zmiany(usuniete=[wiersz]))
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        with self.blokada_zapisu:
+            self.magazyn.zastosuj_zmiany(nazwa, zmiany)
+            self._nanies(nazwa, zmiany)
+
+    def odswiez(self, nazwy):
+        # Pobiera zakładki ponownie (np. po połączeniu w tle) i podmienia tylko te, których treść się zmieniła –
+        # tylko one dostają nową wersję, więc sesje przeładują wyłącznie je
+        wersje = {nazwa: self.wersja(nazwa) for nazwa in nazwy}
+        for nazwa, wartosci in self.magazyn.pobierz_wiele(list(nazwy)).items():
+            with self.blokada:
+                if self.wersje.get(nazwa, 0) != wersje[nazwa]:
+                    continue    # w międzyczasie był zapis – jego wynik jest nowszy
+                wpis = self.wpisy.get(nazwa)
+                if wpis is not None and wpis[0] == wartosci:
+                    self.wpisy[nazwa] = (wpis[0], self.zegar())    # bez zmian: ta sama wersja i te same ramki
+                else:
+                    self.wersje[nazwa] = wersje[nazwa] + 1
+                    self.wpisy[nazwa] = (wartosci, self.zegar())
+
+    # --- REKORDY PO ID ---
+    def indeks(self, nazwa):
+        # Indeks przebudowujemy tylko dla nowych wartości zakładki (po zapisie albo ponownym pobraniu)
+        wartosci = self.pobierz_wartosci(nazwa)
+        with self.blokada:
+            wpis = self.indeksy.get(nazwa)
+        if wpis is None or wpis[0] is not wartosci:
+            wpis = (wartosci, IndeksRekordow(wartosci))
+            with self.blokada:
+                self.indeksy[nazwa] = wpis
+        return wpis[1]
+
+    def zapisz_rekordy(self, nazwa, zmiany_rekordow):
+        # Wszystkie zmiany rekordów jednej zakładki jedną paczką (jedno batch_update w Sheets)
+        if zmiany_rekordow.pusta():
+            return
+        with self.blokada_zapisu:
+            zmiany = self.indeks(nazwa).zmiany(zmiany_rekordow)
+            self.magazyn.zastosuj_zmiany_rekordow(nazwa, zmiany_rekordow, zmiany)
+            self._nanies(nazwa, zmiany)
+
+    def aktualizuj_rekord(self, nazwa, id_rekordu, wartosci):
+        self.zapisz_rekordy(nazwa, ZmianyRekordow(zmienione={id_rekordu: wartosci}))
+
+    def usun_rekord(self, nazwa, id_rekordu):
+        self.zapisz_rekordy(nazwa, ZmianyRekordow(usuniete=[id_rekordu]))
+
+    def uzupelnij_id(self, nazwa):
+        # Jednorazowa migracja starszych arkuszy; gdy wszystkie wiersze mają ID, nic nie zapisujemy
+        with self.blokada_zapisu:
+            self.zastosuj_zmiany(nazwa, self.indeks(nazwa).migracja())
+
+    def __getattr__(self, nazwa):
+        # Pozostałe atrybuty (np. blad_lustra) bierzemy z opakowanego magazynu
+        if nazwa == "magazyn":
+            raise AttributeError(nazwa)
+        return getattr(self.magazyn, nazwa)
@@ -0,0 +1,174 @@
+from collections import defaultdict
+
+import pandas as pd
+
+from schemat import KOLUMNA_ID, KOLUMNY_MIEJSCA
+
+
+def klucz_goscia(imie):
+    # Ten sam gość niezależnie od wielkości liter i nadmiarowych spacji
+    return " ".join(str(imie).split()).casefold()
+
+
+def indeks_imion(df_goscie):
+    # klucz imienia -> [ID gości o tym imieniu] (kilku gości może nosić to samo imię)
+    indeks = defaultdict(list)
+    for id_goscia, imie in zip(df_goscie[KOLUMNA_ID], df_goscie["Imie_Nazwisko"]):
+        if str(imie).strip() and str(id_goscia).strip():
+            indeks[klucz_goscia(imie)].append(id_goscia)
+    return indeks
+
+
+def wybierz_goscia(kandydaci, zajeci):
+    # Spośród gości o tym samym imieniu pierwszy bez miejsca (a gdy wszyscy je mają – pierwszy); "" gdy brak
+    return next((i for i in kandydaci if i not in zajeci), kandydaci[0] if kandydaci else "")
+
+
+# ==========================================================
+# PLAN MIEJSC: rekordy (stół, miejsce, ID gościa) + indeksy w obie strony
+# ==========================================================
+# Miejsca numerujemy od 1. Każdy zajęty fotel to jeden rekord (jeden wiersz zakładki "Miejsca"),
+# więc zmiana jednego miejsca to zmiana jednego rekordu. Rekord wskazuje gościa po ID – imiona
+# służą tylko do wyświetlania, więc zmiana nazwiska czy dwóch gości o tym samym imieniu nic nie psuje.
+class PlanMiejsc:
+    def __init__(self, df, df_goscie):
+        self.etykiety = {}                 # (stół, miejsce) -> etykieta wiersza w ramce rekordów
+        self.stoly = defaultdict(dict)     # stół -> {miejsce: ID gościa}
+        self.goscie = defaultdict(set)     # ID gościa -> {(stół, miejsce)}
+        for etykieta, stol, miejsce, gosc in zip(df.index, df["Stol"], df["Miejsce"], df["Gosc_ID"]):
+            if not str(gosc).strip():
+                continue
+            stol, miejsce = str(stol), int(miejsce)
+            self.etykiety[(stol, miejsce)] = etykieta
+            self.stoly[stol][miejsce] = gosc
+            self.goscie[gosc].add((stol, miejsce))
+        self.df_goscie = df_goscie
+        self.imiona = dict(zip(df_goscie[KOLUMNA_ID], df_goscie["Imie_Nazwisko"]))
+        self.wedlug_imion = indeks_imion(df_goscie)
+
+    def imie(self, id_goscia):
+        # Miejsce usuniętego gościa pokazujemy jako wolne
+        return self.imiona.get(id_goscia, "")
+
+    def znajdz(self, imie):
+        return self.wedlug_imion.get(klucz_goscia(imie), [])
+
+    def id_przy_stole(self, stol, liczba_miejsc):
+        # Lista ID gości dla kolejnych miejsc (puste miejsca jako "")
+        zajete = self.stoly.get(str(stol), {})
+        return [zajete.get(i, "") for i in range(1, liczba_miejsc + 1)]
+
+    def przy_stole(self, stol, liczba_miejsc):
+        # To samo co id_przy_stole, ale z imionami (do wyświetlania)
+        return [self.imie(i) for i in self.id_przy_stole(stol, liczba_miejsc)]
+
+    def gdzie_siedzi(self, id_goscia):
+        return sorted(self.goscie.get(id_goscia, ()))
+
+    def duplikaty(self):
+        # [(imię, [(stół, miejsce), ...])] dla gości posadzonych więcej niż raz
+        return [(self.imie(g) or g, sorted(miejsca)) for g, miejsca in self.goscie.items() if len(miejsca) > 1]
+
+    def nieposadzeni(self):
+        # Potwierdzeni goście, którzy nie mają jeszcze miejsca
+        df = self.df_goscie
+        if df.empty:
+            return []
+        potwierdzeni = df[df["RSVP"] == True]
+        return [imie for id_goscia, imie in zip(potwierdzeni[KOLUMNA_ID], potwierdzeni["Imie_Nazwisko"])
+                if str(imie).strip() and id_goscia not in self.goscie]
+
+    def id_z_pol(self, stol, wpisane):
+        # Pola edytora stołu -> (ID gości dla kolejnych miejsc, imiona spoza listy gości).
+        # Niezmienione pole zostawia siedzącego gościa (także jednego z kilku o tym samym imieniu);
+        # nowe imię dostaje gość bez miejsca, a nieznane imię zostawia miejsce wolne.
+        obecne = self.id_przy_stole(stol, len(wpisane))
+        wynik, nieznane = [], []
+        for id_goscia, tekst in zip(obecne, wpisane):
+            tekst = str(tekst).strip()
+            if tekst and klucz_goscia(tekst) == klucz_goscia(self.imie(id_goscia)):
+                wynik.append(id_goscia)
+                continue
+            kandydaci = self.znajdz(tekst) if tekst else []
+            if tekst and not kandydaci:
+                nieznane.append(tekst)
+            wolni = [i for i in kandydaci if i not in wynik]
+            wynik.append(wybierz_goscia(wolni or kandydaci, self.goscie))
+        return wynik, nieznane
+
+
+def uklad_po_zmianie(df, plan, stol, nowa_lista):
+    # Nowa ramka rekordów po zmianie układu jednego stołu (nowa_lista – ID gości dla kolejnych miejsc). Istniejące rekordy zachowują etykiety,
+    # więc synchronizacja różnicowa wyśle tylko faktycznie zmienione miejsca.
+    stol = str(stol)
+    df = df.copy()
+    do_usuniecia = []
+    nowe = []
+    for miejsce, gosc in enumerate(nowa_lista, start=1):
+        gosc = str(gosc).strip()
+        etykieta = plan.etykiety.get((stol, miejsce))
+        if etykieta is not None:
+            if not gosc:
+                do_usuniecia.append(etykieta)
+            elif df.at[etykieta, "Gosc_ID"] != gosc:
+                df.at[etykieta, "Gosc_ID"] = gosc
+        elif gosc:
+            nowe.append({"Stol": stol, "Miejsce": miejsce, "Gosc_ID": gosc})
+    # Miejsca poza nową liczbą miejsc również zwalniamy
+    for (s, miejsce), etykieta in plan.etykiety.items():
+        if s == stol and miejsce > len(nowa_lista):
+            do_usuniecia.append(etykieta)
+    df = df.drop(index=do_usuniecia)
+    return dopisz_rekordy(df, nowe)
+
+
+def bez_stolu(df, stol):
+    return df[df["Stol"].astype(str) != str(stol)]
+
+
+def dopisz_rekordy(df, rekordy):
+    if not rekordy:
+        return df
+    start = int(df.index.max()) + 1 if len(df.index) else 0
+    nowe = pd.DataFrame(rekordy, columns=KOLUMNY_MIEJSCA, index=pd.RangeIndex(start, start + len(rekordy)))
+    return pd.concat([df, nowe]) if len(df) else nowe
+
+
+# --- ZGODNOŚĆ ZE STARYM ZAPISEM (imiona zamiast ID gości) ---
+def id_z_imion(imiona, df_goscie):
+    # Imiona -> ID gości; kolejne wystąpienia tego samego imienia dostają kolejnych gości o tym imieniu.
+    # Imion spoza listy gości nie da się przypisać ("").
+    indeks = indeks_imion(df_goscie)
+    posadzeni = set()
+    wynik = []
+    for imie in imiona:
+        id_goscia = wybierz_goscia(indeks.get(klucz_goscia(imie), []), posadzeni) if str(imie).strip() else ""
+        posadzeni.add(id_goscia)
+        wynik.append(id_goscia)
+    return wynik
+
+
+def rekordy_z_list(df_stoly, df_goscie):
+    # Lista imion w kolumnie Goscie_Lista (rozdzielana ";") -> rekordy miejsc
+    miejsca = [(str(stol), miejsce, gosc)
+               for stol, lista in zip(df_stoly["Numer"], df_stoly["Goscie_Lista"])
+               for miejsce, gosc in enumerate(str(lista).split(";"), start=1)]
+    ids = id_z_imion([gosc for _, _, gosc in miejsca], df_goscie)
+    return [{"Stol": stol, "Miejsce": miejsce, "Gosc_ID": id_goscia}
+            for (stol, miejsce, _), id_goscia in zip(miejsca, ids) if id_goscia]
+
+
+def miejsca_z_imion(df, df_goscie):
+    # Starsza zakładka "Miejsca" trzymała imię gościa w kolumnie Gosc – zamieniamy je na ID
+    ids = id_z_imion(df["Gosc"], df_goscie)
+    df = df.assign(Gosc_ID=[gosc or i for i, gosc in zip(ids, df["Gosc_ID"])]).drop(columns="Gosc")
+    return df[df["Gosc_ID"].astype(str).str.strip() != ""]
+
+
+def listy_stolow(df_stoly, plan):
+    # df_stoly z kolumną Goscie_Lista odtworzoną z planu (np. do eksportu)
+    df = df_stoly.copy()
+    df["Goscie_Lista"] = [
+        ";".join(plan.przy_stole(stol, int(n))) for stol, n in zip(df["Numer"], df["Liczba_Miejsc"])
+    ]
+    return df
@@ -0,0 +1,219 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+
+from magazyn import ARKUSZE, Magazyn, Zmiany, zastosuj_do_wartosci
+
+
+def dostepne():
+    # Migawki zapisujemy w formacie Arrow – bez pyarrow aplikacja działa jak dawniej, tylko z Sheets
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def skrot_wartosci(wartosci):
+    return hashlib.sha256(json.dumps(wartosci, default=str, ensure_ascii=False).encode()).hexdigest()
+
+
+# --- PLIKI MIGAWEK ---
+# Jedna zakładka = jeden plik Arrow IPC z jedną kolumną list napisów (wiersz arkusza, także nagłówki,
+# z zachowaniem różnych długości wierszy). W metadanych: skrót wartości i czas zapisu.
+def zapisz_migawke(sciezka, wartosci, skrot):
+    import pyarrow as pa
+
+    tabela = pa.table(
+        {"wiersz": pa.array([[str(v) for v in w] for w in wartosci], type=pa.list_(pa.string()))},
+        metadata={"skrot": skrot, "zapisano": str(time.time())},
+    )
+    tymczasowa = f"{sciezka}.{threading.get_ident()}.tmp"
+    with pa.OSFile(tymczasowa, "wb") as plik, pa.ipc.new_file(plik, tabela.schema) as zapis:
+        zapis.write_table(tabela)
+    os.replace(tymczasowa, sciezka)
+
+
+def czytaj_metadane(sciezka):
+    import pyarrow as pa
+
+    with pa.memory_map(sciezka) as plik:
+        metadane = pa.ipc.open_file(plik).schema.metadata or {}
+    return metadane.get(b"skrot", b"").decode(), float(metadane.get(b"zapisano", b"0"))
+
+
+def czytaj_migawke(sciezka):
+    import pyarrow as pa
+
+    # Plik mapujemy w pamięć – odczyt nie kopiuje danych przed zamianą na listy
+    with pa.memory_map(sciezka) as plik:
+        return pa.ipc.open_file(plik).read_all().column("wiersz").to_pylist()
+
+
+# ==========================================================
+# MIGAWKI ZAKŁADEK NA DYSKU (szybki start, praca bez Google Sheets)
+# ==========================================================
+# Ostatni znany stan każdej zakładki trzymamy lokalnie. Nowa instancja aplikacji od razu czyta z migawek,
+# a połączenie z magazynem (autoryzacja, otwarcie pliku, kolejka zapisów) powstaje w wątku w tle.
+# Po połączeniu wołamy po_polaczeniu(magazyn) – aplikacja pobiera wtedy ponownie wszystkie zakładki i podmienia
+# tylko te, które się zmieniły. Każdy odczyt z magazynu odświeża migawkę, jeśli treść jest inna, a każdy
+# zapis nanosimy też na migawkę – kolejny start pokaże dane razem z własnymi zmianami.
+# Bez połączenia (jeszcze albo w ogóle) działamy tylko do odczytu: zapis czeka chwilę na połączenie,
+# a potem kończy się błędem TylkoDoOdczytu (tak samo odczyt zakładki bez migawki). Gdy migawek nie ma
+# wcale, łączymy się od razu, jak dawniej.
+class TylkoDoOdczytu(Exception):
+    pass
+
+
+class MagazynZMigawka(Magazyn):
+    def __init__(self, polacz, katalog="migawki", ponow_co=30.0, czekaj=10.0):
+        self.polacz = polacz
+        self.katalog = katalog
+        self.ponow_co = ponow_co
+        self.czekaj = czekaj
+        self.magazyn = None
+        self.blad = None
+        self.polaczony = threading.Event()
+        self.blokada = threading.Lock()
+        self.skroty = {}          # zakładka -> (skrót, czas zapisu) migawki na dysku
+        self.watek = None
+        os.makedirs(katalog, exist_ok=True)
+        for nazwa in ARKUSZE:
+            try:
+                self.skroty[nazwa] = czytaj_metadane(self._sciezka(nazwa))
+            except (OSError, ValueError):
+                pass
+        if not self.skroty:
+            self._ustaw_polaczenie(polacz())
+
+    def _sciezka(self, nazwa):
+        return os.path.join(self.katalog, f"{nazwa}.arrow")
+
+    def uruchom(self, po_polaczeniu=None):
+        # Łączenie (z ponawianiem co ponow_co sekund) i odświeżenie w wątku w tle
+        self.watek = threading.Thread(target=self._lacz, args=(po_polaczeniu,), name="migawki", daemon=True)
+        self.watek.start()
+
+    def _lacz(self, po_polaczeniu):
+        while not self.polaczony.is_set():
+            try:
+                self._ustaw_polaczenie(self.polacz())
+            except Exception as e:
+                self.blad = str(e) or type(e).__name__
+                time.sleep(self.ponow_co)
+        if po_polaczeniu is not None:
+            try:
+                po_polaczeniu(self.magazyn)
+            except Exception as e:
+                self.blad = str(e) or type(e).__name__
+
+    def _ustaw_polaczenie(self, magazyn):
+        self.magazyn = magazyn
+        self.blad = None
+        self.polaczony.set()
+
+    # --- STAN (do pokazania w interfejsie) ---
+    @property
+    def kolejka(self):
+        # Połączony magazyn to kolejka zapisów do Sheets; przed połączeniem nie ma czego pokazywać
+        return self.magazyn
+
+    def tylko_odczyt(self):
+        return not self.polaczony.is_set()
+
+    def czas_migawki(self):
+        # Czas zapisu najstarszej migawki (time.time()), None gdy nie ma żadnej
+        with self.blokada:
+            czasy = [czas for _, czas in self.skroty.values()]
+        return min(czasy) if czasy else None
+
+    # --- MIGAWKI ---
+    def _z_migawki(self, nazwa):
+        try:
+            return czytaj_migawke(self._sciezka(nazwa))
+        except (OSError, ValueError):
+            return None
+
+    def _utrwal(self, nazwa, wartosci):
+        skrot = skrot_wartosci(wartosci)
+        with self.blokada:
+            if self.skroty.get(nazwa, ("",))[0] == skrot:
+                return
+        try:
+            zapisz_migawke(self._sciezka(nazwa), wartosci, skrot)
+        except OSError:
+            return
+        with self.blokada:
+            self.skroty[nazwa] = (skrot, time.time())
+
+    # --- ODCZYTY ---
+    def istnieje(self, nazwa):
+        if self.polaczony.is_set():
+            return self.magazyn.istnieje(nazwa)
+        return nazwa in self.skroty
+
+    def pobierz_wartosci(self, nazwa):
+        return self.pobierz_wiele([nazwa])[nazwa]
+
+    def pobierz_wiele(self, nazwy):
+        # Po połączeniu czytamy z magazynu (i odświeżamy migawki); przed nim i przy błędzie sieci – z migawek
+        if not self.polaczony.is_set():
+            wynik = {nazwa: self._z_migawki(nazwa) for nazwa in nazwy}
+            if all(w is not None for w in wynik.values()):
+                return wynik
+            self._polaczony()    # zakładki bez migawki czytamy dopiero po połączeniu
+        try:
+            wynik = self.magazyn.pobierz_wiele(nazwy)
+        except Exception as e:
+            wynik = {nazwa: self._z_migawki(nazwa) for nazwa in nazwy}
+            if any(w is None for w in wynik.values()):
+                raise
+            self.blad = str(e) or type(e).__name__
+            return wynik
+        self.blad = None
+        for nazwa, wartosci in wynik.items():
+            self._utrwal(nazwa, wartosci)
+        return wynik
+
+    # --- ZAPISY (tylko z połączeniem) ---
+    def _polaczony(self):
+        # Czekamy chwilę na trwające łączenie; bez połączenia nie zapisujemy niczego
+        if not self.polaczony.wait(self.czekaj):
+            raise TylkoDoOdczytu("Brak połączenia z Google Sheets – aplikacja działa tylko do odczytu.")
+        return self.magazyn
+
+    def _nanies(self, nazwa, zmiany):
+        wartosci = self._z_migawki(nazwa) if nazwa in self.skroty else None
+        if wartosci is not None:
+            self._utrwal(nazwa, zastosuj_do_wartosci(wartosci, zmiany))
+
+    def dopisz_wiersz(self, nazwa, wiersz):
+        self._polaczony().dopisz_wiersz(nazwa, wiersz)
+        self._nanies(nazwa, Zmiany(dopisane=[list(wiersz)]))
+
+    def dopisz_wiersze(self, nazwa, wiersze):
+        self._polaczony().dopisz_wiersze(nazwa, wiersze)
+        self._nanies(nazwa, Zmiany(dopisane=[list(w) for w in wiersze]))
+
+    def nadpisz(self, nazwa, wartosci):
+        self._polaczony().nadpisz(nazwa, wartosci)
+        self._utrwal(nazwa, [list(w) for w in wartosci])
+
+    def aktualizuj_komorke(self, nazwa, wiersz, kolumna, wartosc):
+        self._polaczony().aktualizuj_komorke(nazwa, wiersz, kolumna, wartosc)
+        self._nanies(nazwa, Zmiany(komorki=[(wiersz, kolumna, wartosc)]))
+
+    def usun_wiersz(self, nazwa, wiersz):
+        self._polaczony().usun_wiersz(nazwa, wiersz)
+        self._nanies(nazwa, Zmiany(usuniete=[wiersz]))
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        if zmiany.pusta():
+            return
+        self._polaczony().zastosuj_zmiany(nazwa, zmiany)
+        self._nanies(nazwa, zmiany)
+
+    def zastosuj_zmiany_rekordow(self, nazwa, zmiany_rekordow, zmiany):
+        if zmiany_rekordow.pusta():
+            return
+        self._polaczony().zastosuj_zmiany_rekordow(nazwa, zmiany_rekordow, zmiany)
+        self._nanies(nazwa, zmiany)
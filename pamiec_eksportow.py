@@ -0,0 +1,122 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def skrot_danych(*ramki):
+    # Skrót treści ramek: kolumny, typy i wartości (wektorowo przez hash_pandas_object).
+    # Ta sama treść daje ten sam klucz niezależnie od sesji i kolejności kliknięć.
+    h = hashlib.sha256()
+    for df in ramki:
+        if df is None:
+            h.update(b"<brak>")
+            continue
+        h.update(repr((list(map(str, df.columns)), [str(t) for t in df.dtypes], df.shape)).encode())
+        if len(df):
+            h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+# ==========================================================
+# PAMIĘĆ WYGENEROWANYCH PLIKÓW (PDF, CSV, ...)
+# ==========================================================
+# Pliki adresujemy treścią: klucz = rodzaj + skrót danych wejściowych. W pamięci trzymamy LRU
+# ograniczone łącznym rozmiarem; opcjonalnie także katalog na dysku (również LRU po czasie użycia),
+# dzięki któremu pliki przetrwają restart aplikacji. Obiekt jest wspólny dla wszystkich sesji.
+class PamiecEksportow:
+    def __init__(self, maks_bajtow=64 * 1024 * 1024, katalog=None, maks_bajtow_na_dysku=256 * 1024 * 1024):
+        self.maks_bajtow = maks_bajtow
+        self.katalog = katalog
+        self.maks_bajtow_na_dysku = maks_bajtow_na_dysku
+        self.wpisy = OrderedDict()
+        self.rozmiar = 0
+        self.trafienia = 0
+        self.chybienia = 0
+        self.blokada = threading.Lock()
+        if katalog:
+            os.makedirs(katalog, exist_ok=True)
+
+    def pobierz(self, rodzaj, klucz, generuj):
+        # Zwraca bajty pliku; generuj() wołamy tylko, gdy pliku nie ma ani w pamięci, ani na dysku
+        nazwa = f"{klucz}.{rodzaj}"
+        with self.blokada:
+            if nazwa in self.wpisy:
+                self.wpisy.move_to_end(nazwa)
+                self.trafienia += 1
+                return self.wpisy[nazwa]
+        dane = self._z_dysku(nazwa)
+        if dane is None:
+            dane = generuj()
+            if not isinstance(dane, bytes):
+                dane = dane.getvalue() if hasattr(dane, "getvalue") else bytes(dane)
+            self._na_dysk(nazwa, dane)
+            with self.blokada:
+                self.chybienia += 1
+        else:
+            with self.blokada:
+                self.trafienia += 1
+        self._zapamietaj(nazwa, dane)
+        return dane
+
+    def _zapamietaj(self, nazwa, dane):
+        if len(dane) > self.maks_bajtow:
+            return
+        with self.blokada:
+            if nazwa in self.wpisy:
+                return
+            self.wpisy[nazwa] = dane
+            self.rozmiar += len(dane)
+            while self.rozmiar > self.maks_bajtow:
+                _, stare = self.wpisy.popitem(last=False)
+                self.rozmiar -= len(stare)
+
+    # --- DYSK ---
+    def _z_dysku(self, nazwa):
+        if not self.katalog:
+            return None
+        sciezka = os.path.join(self.katalog, nazwa)
+        try:
+            with open(sciezka, "rb") as f:
+                dane = f.read()
+            os.utime(sciezka)
+            return dane
+        except OSError:
+            return None
+
+    def _na_dysk(self, nazwa, dane):
+        if not self.katalog or len(dane) > self.maks_bajtow_na_dysku:
+            return
+        sciezka = os.path.join(self.katalog, nazwa)
+        tymczasowa = f"{sciezka}.{threading.get_ident()}.tmp"
+        try:
+            with open(tymczasowa, "wb") as f:
+                f.write(dane)
+            os.replace(tymczasowa, sciezka)
+            self._przytnij_dysk()
+        except OSError:
+            pass
+
+    def _przytnij_dysk(self):
+        pliki = []
+        for nazwa in os.listdir(self.katalog):
+            if nazwa.endswith(".tmp"):
+                continue
+            sciezka = os.path.join(self.katalog, nazwa)
+            try:
+                st = os.stat(sciezka)
+            except OSError:
+                continue
+            pliki.append((st.st_mtime, st.st_size, sciezka))
+        razem = sum(rozmiar for _, rozmiar, _ in pliki)
+        for _, rozmiar, sciezka in sorted(pliki):
+            if razem <= self.maks_bajtow_na_dysku:
+                break
+            try:
+                os.remove(sciezka)
+                razem -= rozmiar
+            except OSError:
+                pass
@@ -0,0 +1,176 @@
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+OKNO = 200      # tyle ostatnich pomiarów każdego odcinka bierzemy do percentyli
+
+# Jeden wiersz JSON na przebieg skryptu; logger "wesele.profil" można przekierować konfiguracją logging
+LOG = logging.getLogger("wesele.profil")
+if not LOG.handlers:
+    _wyjscie = logging.StreamHandler()
+    _wyjscie.setFormatter(logging.Formatter("%(message)s"))
+    LOG.addHandler(_wyjscie)
+    LOG.setLevel(logging.INFO)
+    LOG.propagate = False
+
+
+class _BezPomiaru:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *wyjatek):
+        return False
+
+
+BEZ_POMIARU = _BezPomiaru()
+
+
+class _Pomiar:
+    __slots__ = ("profil", "nazwa", "start")
+
+    def __init__(self, profil, nazwa):
+        self.profil = profil
+        self.nazwa = nazwa
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *wyjatek):
+        self.profil.zapisz(self.nazwa, time.perf_counter() - self.start)
+        return False
+
+
+# Przebieg bieżącego wątku; domyślna wartość w klasie, żeby sprawdzenie nie kosztowało wyjątku AttributeError
+class _Watek(threading.local):
+    przebieg = None
+
+
+# --- JEDEN PRZEBIEG SKRYPTU ---
+class Przebieg:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.czas = None
+        self.odcinki = []     # [(odcinek, sekundy)] w kolejności zakończenia
+        self.api = {}         # arkusz -> [wywołania, bajty]
+
+    def zsumowane(self):
+        # {odcinek: (łączny czas, liczba pomiarów)} – np. kilka podglądów stołów w jednym przebiegu
+        wynik = {}
+        for nazwa, czas in self.odcinki:
+            suma, ile = wynik.get(nazwa, (0.0, 0))
+            wynik[nazwa] = (suma + czas, ile + 1)
+        return wynik
+
+
+# ==========================================================
+# PROFIL: CZASY GORĄCYCH ŚCIEŻEK I WYWOŁANIA API
+# ==========================================================
+# Pomiary zbieramy tylko w wątku przebiegu, dla którego sesja włączyła panel "⏱ Profil" (zacznij(True)),
+# albo wszędzie, gdy wszedzie = True ([profil] zawsze = true w secrets – także wątki w tle, np. kolejka zapisów).
+# Wyłączony profil to jedno-dwa sprawdzenia atrybutu na odcinek (zmienną wątku czytamy dopiero, gdy jakaś sesja
+# choć raz włączyła panel); mierz() oddaje wtedy wspólny pusty kontekst.
+# Każdy odcinek trafia do przebiegu i do okna ostatnich OKNO pomiarów (wspólnego dla procesu), z którego
+# liczymy percentyle. Wywołania Google Sheets liczymy na zakładkę: liczba i przybliżony rozmiar danych (JSON).
+class Profil:
+    def __init__(self, okno=OKNO):
+        self.okno = okno
+        self.wszedzie = False
+        self.uzywany = False  # czy któraś sesja kiedykolwiek włączyła profil – do tego czasu nie pytamy wątku
+        self.lokalne = _Watek()
+        self.czasy = {}       # odcinek -> deque ostatnich czasów (s)
+        self.api = {}         # arkusz -> [wywołania, bajty] od startu procesu
+        self.blokada = threading.Lock()
+
+    def wlaczony(self):
+        return self.wszedzie or (self.uzywany and self.lokalne.przebieg is not None)
+
+    # mierz, mierzone i wywolanie_api leżą na gorących ścieżkach – warunek wlaczony() jest w nich wpisany wprost
+    def mierz(self, nazwa):
+        if not (self.wszedzie or (self.uzywany and self.lokalne.przebieg is not None)):
+            return BEZ_POMIARU
+        return _Pomiar(self, nazwa)
+
+    def mierzone(self, nazwa):
+        # Dekorator: cała funkcja jako jeden odcinek
+        def dekorator(funkcja):
+            @functools.wraps(funkcja)
+            def opakowana(*args, **kwargs):
+                if not (self.wszedzie or (self.uzywany and self.lokalne.przebieg is not None)):
+                    return funkcja(*args, **kwargs)
+                with _Pomiar(self, nazwa):
+                    return funkcja(*args, **kwargs)
+            return opakowana
+        return dekorator
+
+    def zapisz(self, nazwa, czas):
+        przebieg = self.lokalne.przebieg
+        if przebieg is not None:
+            przebieg.odcinki.append((nazwa, czas))
+        with self.blokada:
+            okno = self.czasy.get(nazwa)
+            if okno is None:
+                okno = self.czasy[nazwa] = deque(maxlen=self.okno)
+            okno.append(czas)
+
+    def wywolanie_api(self, arkusz, dane):
+        if not (self.wszedzie or (self.uzywany and self.lokalne.przebieg is not None)):
+            return
+        bajty = len(json.dumps(dane, default=str, ensure_ascii=False).encode())
+        przebieg = self.lokalne.przebieg
+        if przebieg is not None:
+            licznik = przebieg.api.setdefault(arkusz, [0, 0])
+            licznik[0] += 1
+            licznik[1] += bajty
+        with self.blokada:
+            licznik = self.api.setdefault(arkusz, [0, 0])
+            licznik[0] += 1
+            licznik[1] += bajty
+
+    # --- PRZEBIEG SKRYPTU ---
+    def zacznij(self, wlacz):
+        if wlacz:
+            self.uzywany = True
+        if self.uzywany or self.wszedzie:
+            self.lokalne.przebieg = Przebieg() if wlacz or self.wszedzie else None
+
+    def zakoncz(self, **opis):
+        # Kończy przebieg bieżącego wątku, zapisuje jego czas i loguje raport; zwraca przebieg (albo None)
+        przebieg = self.lokalne.przebieg
+        if przebieg is None:
+            return None
+        przebieg.czas = time.perf_counter() - przebieg.start
+        self.lokalne.przebieg = None
+        self.zapisz("przebieg", przebieg.czas)     # tylko do okna – czas całości jest w przebieg.czas
+        LOG.info(json.dumps(self.raport(przebieg, **opis), ensure_ascii=False))
+        return przebieg
+
+    def percentyle(self):
+        # {odcinek: {"n", "p50", "p90", "p99"}} w ms, z okna ostatnich pomiarów
+        with self.blokada:
+            okna = {nazwa: list(okno) for nazwa, okno in self.czasy.items()}
+        wynik = {}
+        for nazwa, czasy in okna.items():
+            p50, p90, p99 = np.percentile(np.asarray(czasy) * 1000, [50, 90, 99])
+            wynik[nazwa] = {"n": len(czasy), "p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2)}
+        return wynik
+
+    def raport(self, przebieg, **opis):
+        return {
+            "czas": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            **opis,
+            "przebieg_ms": round(przebieg.czas * 1000, 2),
+            "odcinki_ms": {n: round(c * 1000, 2) for n, (c, _) in przebieg.zsumowane().items()},
+            "api": {a: {"wywolania": w, "bajty": b} for a, (w, b) in przebieg.api.items()},
+            "percentyle_ms": self.percentyle(),
+        }
+
+
+profil = Profil()
+mierz = profil.mierz
+mierzone = profil.mierzone
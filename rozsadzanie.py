@@ -0,0 +1,327 @@
+import random
+import re
+import time
+
+from miejsca import klucz_goscia
+from schemat import KOLUMNA_ID
+
+WAGA_KONFLIKTU = 100       # para "nie razem" przy jednym stole kosztuje tyle, co 100 rozbitych miejsc w grupach
+WZOR_TOWARZYSZA = re.compile(r"\(Osoba tow\. dla:\s*(.*?)\)\s*$")
+
+
+# ==========================================================
+# AUTOMATYCZNE ROZSADZANIE GOŚCI
+# ==========================================================
+# Jednostką rozsadzania jest gość albo para (gość + osoba towarzysząca), która zawsze siedzi obok siebie.
+# 1) Zachłannie: jednostki z grup idą kolejno (największe grupy najpierw) do stołu, przy którym siedzi
+#    już ich grupa, a jeśli to niemożliwe – do stołu z największą liczbą wolnych miejsc.
+# 2) Przeszukiwanie lokalne: losowe przeniesienia i zamiany jednostek między stołami, akceptowane,
+#    gdy nie zwiększają kosztu (konflikty "nie razem" + członkowie grup poza stołem większości).
+# 3) Przy każdym stole pary dostają sąsiednie miejsca, a członkowie tej samej grupy siedzą obok siebie.
+class WynikRozsadzenia:
+    def __init__(self, rekordy, nieposadzeni, konflikty, rozbite):
+        self.rekordy = rekordy            # [{"Stol", "Miejsce", "Gosc_ID"}, ...]
+        self.nieposadzeni = nieposadzeni  # imiona gości, dla których zabrakło miejsc
+        self.konflikty = konflikty        # pary "nie razem", które i tak siedzą przy jednym stole
+        self.rozbite = rozbite            # członkowie grup siedzący poza stołem większości swojej grupy
+
+    def listy(self, df_stoly):
+        # {stół: [ID gościa na miejscu 1, ID gościa na miejscu 2, ...]}
+        wynik = {str(s): [""] * int(n) for s, n in zip(df_stoly["Numer"], df_stoly["Liczba_Miejsc"])}
+        for r in self.rekordy:
+            wynik[r["Stol"]][r["Miejsce"] - 1] = r["Gosc_ID"]
+        return wynik
+
+    def __repr__(self):
+        return (f"WynikRozsadzenia(rekordy={len(self.rekordy)}, nieposadzeni={len(self.nieposadzeni)}, "
+                f"konflikty={self.konflikty}, rozbite={self.rozbite})")
+
+
+def wczytaj_grupy(tekst):
+    # Jedna grupa w linii, imiona po przecinku (tak samo zapisujemy pary "nie razem")
+    grupy = []
+    for linia in str(tekst).splitlines():
+        imiona = [i.strip() for i in linia.split(",") if i.strip()]
+        if len(imiona) > 1:
+            grupy.append(imiona)
+    return grupy
+
+
+def goscie_do_rozsadzenia(df_goscie):
+    # (lista gości jako (ID, imię), lista par imion) – tylko potwierdzeni; para to (gość, osoba towarzysząca)
+    if df_goscie.empty:
+        return [], []
+    potwierdzeni = df_goscie[df_goscie["RSVP"] == True]
+    imiona = [str(i).strip() for i in potwierdzeni["Imie_Nazwisko"]]
+    towarzysze = [WZOR_TOWARZYSZA.search(str(t)) for t in potwierdzeni["Imie_Osoby_Tow"]]
+    goscie = [(id_goscia, i) for id_goscia, i in zip(potwierdzeni[KOLUMNA_ID], imiona) if i]
+    glowni = {klucz_goscia(i) for i, t in zip(imiona, towarzysze) if i and t is None}
+    pary = [(t.group(1).strip(), i) for i, t in zip(imiona, towarzysze)
+            if i and t is not None and klucz_goscia(t.group(1)) in glowni]
+    return goscie, pary
+
+
+def maks_par(liczba_miejsc, ksztalt):
+    # Ile par zmieści się obok siebie: stół prostokątny ma dwa boki, para nie może siedzieć "przez róg"
+    if ksztalt == "Okrągły":
+        return liczba_miejsc // 2
+    bok = (liczba_miejsc + 1) // 2
+    return bok // 2 + (liczba_miejsc - bok) // 2
+
+
+class Rozsadzanie:
+    def __init__(self, goscie, stoly, pary=(), grupy=(), nie_razem=(), ziarno=0):
+        # goscie – [(ID, imię)]; stoly – [(numer, liczba miejsc, kształt)]; pary/nie_razem – pary imion;
+        # grupy – listy imion. Życzenia podajemy imionami, ale wynik wskazuje gości po ID.
+        self.id_gosci = [id_goscia for id_goscia, _ in goscie]
+        self.goscie = [imie for _, imie in goscie]
+        self.stoly = [(str(n), int(m), str(k)) for n, m, k in stoly]
+        self.los = random.Random(ziarno)
+
+        indeks = {}
+        for i, g in enumerate(self.goscie):
+            indeks.setdefault(klucz_goscia(g), []).append(i)
+        def znajdz(imie):
+            return indeks.get(klucz_goscia(imie), [])
+
+        # --- JEDNOSTKI: pary i pojedynczy goście ---
+        w_parze = set()
+        self.jednostki = []
+        for glowny, towarzysz in pary:
+            a = [i for i in znajdz(glowny) if i not in w_parze]
+            b = [i for i in znajdz(towarzysz) if i not in w_parze]
+            if a and b and a[0] != b[0]:
+                self.jednostki.append((a[0], b[0]))
+                w_parze.update((a[0], b[0]))
+        self.jednostki += [(i,) for i in range(len(self.goscie)) if i not in w_parze]
+
+        # --- OGRANICZENIA ---
+        self.grupa = [None] * len(self.goscie)
+        for nr, imiona in enumerate(grupy):
+            for imie in imiona:
+                for i in znajdz(imie):
+                    if self.grupa[i] is None:
+                        self.grupa[i] = nr
+        self.rozmiar_grupy = {}
+        for g in self.grupa:
+            if g is not None:
+                self.rozmiar_grupy[g] = self.rozmiar_grupy.get(g, 0) + 1
+
+        self.wrogowie = [set() for _ in self.goscie]
+        for imiona in nie_razem:
+            osoby = [i for imie in imiona for i in znajdz(imie)]
+            for a in osoby:
+                for b in osoby:
+                    if a != b:
+                        self.wrogowie[a].add(b)
+
+        # --- STAN ---
+        self.wolne = [m for _, m, _ in self.stoly]
+        self.wolne_pary = [maks_par(m, k) for _, m, k in self.stoly]
+        self.przy_stole = [set() for _ in self.stoly]      # jednostki przy stole
+        self.stol_jednostki = [None] * len(self.jednostki)
+        self.stol_goscia = [None] * len(self.goscie)
+        self.grupy_przy_stolach = {g: {} for g in self.rozmiar_grupy}  # grupa -> {stół: liczba członków}
+
+    # --- KOSZT ---
+    def koszt(self):
+        return WAGA_KONFLIKTU * self.liczba_konfliktow() + self.liczba_rozbitych()
+
+    def liczba_konfliktow(self):
+        return sum(
+            1 for a, wrogowie in enumerate(self.wrogowie) for b in wrogowie
+            if a < b and self.stol_goscia[a] is not None and self.stol_goscia[a] == self.stol_goscia[b]
+        )
+
+    def liczba_rozbitych(self):
+        return sum(
+            rozmiar - max(self.grupy_przy_stolach[g].values(), default=0)
+            for g, rozmiar in self.rozmiar_grupy.items()
+        )
+
+    def _delta(self, u, cel):
+        # Zmiana kosztu po przeniesieniu jednostki u do stołu cel (None = bez miejsca)
+        zrodlo = self.stol_jednostki[u]
+        if zrodlo == cel:
+            return 0
+        osoby = self.jednostki[u]
+        delta = 0
+        for i in osoby:
+            for j in self.wrogowie[i]:
+                if j in osoby:
+                    continue
+                s = self.stol_goscia[j]
+                if s is None:
+                    continue
+                if s == zrodlo:
+                    delta -= WAGA_KONFLIKTU
+                elif s == cel:
+                    delta += WAGA_KONFLIKTU
+        zmiany_grup = {}
+        for i in osoby:
+            g = self.grupa[i]
+            if g is not None:
+                zmiany_grup[g] = zmiany_grup.get(g, 0) + 1
+        for g, n in zmiany_grup.items():
+            licznik = self.grupy_przy_stolach[g]
+            przed = max(licznik.values(), default=0)
+            po = 0
+            for s, k in licznik.items():
+                if s == zrodlo:
+                    k -= n
+                elif s == cel:
+                    k += n
+                po = max(po, k)
+            if cel is not None and cel not in licznik:
+                po = max(po, n)
+            delta += przed - po
+        return delta
+
+    def _miesci_sie(self, u, cel, zwalniane=None):
+        osoby = self.jednostki[u]
+        wolne = self.wolne[cel]
+        wolne_pary = self.wolne_pary[cel]
+        if zwalniane is not None:
+            wolne += len(self.jednostki[zwalniane])
+            wolne_pary += len(self.jednostki[zwalniane]) == 2
+        return wolne >= len(osoby) and (len(osoby) == 1 or wolne_pary >= 1)
+
+    def _przenies(self, u, cel):
+        zrodlo = self.stol_jednostki[u]
+        osoby = self.jednostki[u]
+        para = len(osoby) == 2
+        if zrodlo is not None:
+            self.przy_stole[zrodlo].discard(u)
+            self.wolne[zrodlo] += len(osoby)
+            self.wolne_pary[zrodlo] += para
+        if cel is not None:
+            self.przy_stole[cel].add(u)
+            self.wolne[cel] -= len(osoby)
+            self.wolne_pary[cel] -= para
+        self.stol_jednostki[u] = cel
+        for i in osoby:
+            self.stol_goscia[i] = cel
+            g = self.grupa[i]
+            if g is None:
+                continue
+            licznik = self.grupy_przy_stolach[g]
+            if zrodlo is not None:
+                licznik[zrodlo] -= 1
+                if not licznik[zrodlo]:
+                    del licznik[zrodlo]
+            if cel is not None:
+                licznik[cel] = licznik.get(cel, 0) + 1
+
+    # --- 1) ROZSADZENIE ZACHŁANNE ---
+    def _grupa_jednostki(self, u):
+        grupy = [self.grupa[i] for i in self.jednostki[u] if self.grupa[i] is not None]
+        return grupy[0] if grupy else None
+
+    def zachlannie(self):
+        def kolejnosc(u):
+            g = self._grupa_jednostki(u)
+            if g is None:
+                return (1, 0, 0, -len(self.jednostki[u]))
+            return (0, -self.rozmiar_grupy[g], g, -len(self.jednostki[u]))
+
+        for u in sorted(range(len(self.jednostki)), key=kolejnosc):
+            g = self._grupa_jednostki(u)
+            najlepszy, najlepsza_ocena = None, None
+            for s in range(len(self.stoly)):
+                if not self._miesci_sie(u, s):
+                    continue
+                konflikty = sum(
+                    1 for i in self.jednostki[u] for j in self.wrogowie[i] if self.stol_goscia[j] == s
+                )
+                if g is not None:
+                    # Do swojej grupy, a jeśli jej jeszcze nie ma – tam, gdzie najwięcej miejsca
+                    ocena = (konflikty, -self.grupy_przy_stolach[g].get(s, 0), -self.wolne[s])
+                else:
+                    # Pojedynczych gości dosadzamy ciasno, żeby zostawić całe stoły dla kolejnych
+                    ocena = (konflikty, 0, self.wolne[s])
+                if najlepsza_ocena is None or ocena < najlepsza_ocena:
+                    najlepszy, najlepsza_ocena = s, ocena
+            if najlepszy is not None:
+                self._przenies(u, najlepszy)
+
+    # --- 2) PRZESZUKIWANIE LOKALNE ---
+    def popraw(self, limit_czasu=1.0, maks_iteracji=200000):
+        koniec = time.perf_counter() + limit_czasu
+        koszt = self.koszt()
+        posadzone = [u for u in range(len(self.jednostki)) if self.stol_jednostki[u] is not None]
+        if not posadzone or len(self.stoly) < 2:
+            return koszt
+        for iteracja in range(maks_iteracji):
+            if koszt == 0:
+                break
+            if iteracja % 256 == 0 and time.perf_counter() > koniec:
+                break
+            u = self.los.choice(posadzone)
+            zrodlo = self.stol_jednostki[u]
+            cel = self.los.randrange(len(self.stoly))
+            if cel == zrodlo:
+                continue
+            if self._miesci_sie(u, cel):
+                delta = self._delta(u, cel)
+                if delta <= 0:
+                    self._przenies(u, cel)
+                    koszt += delta
+                continue
+            if not self.przy_stole[cel]:
+                continue
+            # Brak miejsca – próbujemy zamiany z losową jednostką z docelowego stołu
+            v = self.los.choice(tuple(self.przy_stole[cel]))
+            if not (self._miesci_sie(u, cel, zwalniane=v) and self._miesci_sie(v, zrodlo, zwalniane=u)):
+                continue
+            delta = self._delta(u, cel)
+            self._przenies(u, cel)
+            delta += self._delta(v, zrodlo)
+            if delta <= 0:
+                self._przenies(v, zrodlo)
+                koszt += delta
+            else:
+                self._przenies(u, zrodlo)
+        return koszt
+
+    # --- 3) MIEJSCA PRZY STOLE ---
+    def miejsca_przy_stole(self, s):
+        _, liczba_miejsc, ksztalt = self.stoly[s]
+        def kolejnosc(u):
+            g = self._grupa_jednostki(u)
+            return (g is None, g if g is not None else 0, u)
+        jednostki = sorted(self.przy_stole[s], key=kolejnosc)
+
+        # Sąsiednie pary miejsc (numeracja od 1); przy stole prostokątnym osobno dla każdego boku
+        if ksztalt == "Okrągły":
+            boki = [list(range(1, liczba_miejsc + 1))]
+        else:
+            bok = (liczba_miejsc + 1) // 2
+            boki = [list(range(1, bok + 1)), list(range(bok + 1, liczba_miejsc + 1))]
+        sloty_par = [(b[k], b[k + 1]) for b in boki for k in range(0, len(b) - 1, 2)]
+
+        zajete = {}
+        for u in jednostki:
+            if len(self.jednostki[u]) == 2:
+                for miejsce, i in zip(sloty_par.pop(0), self.jednostki[u]):
+                    zajete[miejsce] = i
+        wolne = (m for m in range(1, liczba_miejsc + 1) if m not in zajete)
+        for u in jednostki:
+            if len(self.jednostki[u]) == 1:
+                zajete[next(wolne)] = self.jednostki[u][0]
+        return zajete
+
+    def rozsadz(self, limit_czasu=1.0):
+        self.zachlannie()
+        self.popraw(limit_czasu=limit_czasu)
+        rekordy = []
+        for s, (numer, _, _) in enumerate(self.stoly):
+            for miejsce, i in sorted(self.miejsca_przy_stole(s).items()):
+                rekordy.append({"Stol": numer, "Miejsce": miejsce, "Gosc_ID": self.id_gosci[i]})
+        nieposadzeni = [self.goscie[i] for i, s in enumerate(self.stol_goscia) if s is None]
+        return WynikRozsadzenia(rekordy, nieposadzeni, self.liczba_konfliktow(), self.liczba_rozbitych())
+
+
+def rozsadz(df_goscie, df_stoly, grupy=(), nie_razem=(), limit_czasu=1.0, ziarno=0):
+    goscie, pary = goscie_do_rozsadzenia(df_goscie)
+    stoly = zip(df_stoly["Numer"], df_stoly["Liczba_Miejsc"], df_stoly["Ksztalt"].astype(str))
+    return Rozsadzanie(goscie, stoly, pary, grupy, nie_razem, ziarno).rozsadz(limit_czasu=limit_czasu)
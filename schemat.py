@@ -0,0 +1,148 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# --- STAŁE KOLUMN ---
+KOLUMNY_GOSCIE = ["Imie_Nazwisko", "Imie_Osoby_Tow", "RSVP", "Zaproszenie_Wyslane", "Dieta"]
+KOLUMNY_OBSLUGA  = ["Kategoria", "Rola", "Informacje", "Koszt", "Czy_Oplacone", "Zaliczka", "Czy_Zaliczka_Oplacona"]
+KOLUMNY_ZADANIA  = ["Zadanie", "Termin", "Czy_Zrobione"]
+KOLUMNY_STOLY    = ["Numer", "Ksztalt", "Liczba_Miejsc", "Goscie_Lista"]
+KOLUMNY_HARMONOGRAM = ["Godzina", "Czynność", "Uwagi"]
+KOLUMNY_USTAWIENIA = ["Data_Slubu"]
+KOLUMNY_MIEJSCA = ["Stol", "Miejsce", "Gosc_ID"]
+
+# --- IDENTYFIKATORY REKORDÓW ---
+# Każdy rekord (poza zakładką Ustawienia, która trzyma pojedyncze wartości) ma trwałe ID w kolumnie "ID",
+# dopisywanej na końcu arkusza. Po ID – a nie po pozycji czy imieniu – znajdujemy wiersz do zmiany lub usunięcia.
+KOLUMNA_ID = "ID"
+
+# ==========================================================
+# SCHEMAT ARKUSZY: typ każdej kolumny
+# ==========================================================
+# tekst     – zwykły napis, puste komórki jako ""
+# bool      – w arkuszu "Tak"/"Nie" (przy odczycie akceptujemy też true/1/yes)
+# liczba    – float, puste i błędne jako 0.0
+# calkowita – int, puste i błędne jako 0
+# kategoria – pandas category (mało różnych wartości)
+# data      – datetime.date, w arkuszu "RRRR-MM-DD"
+# godzina   – napis "HH:MM"
+TYPY_KOLUMN = {
+    "Goscie": {"Imie_Nazwisko": "tekst", "Imie_Osoby_Tow": "tekst", "RSVP": "bool",
+               "Zaproszenie_Wyslane": "bool", "Dieta": "tekst", KOLUMNA_ID: "tekst"},
+    "Obsluga": {"Kategoria": "tekst", "Rola": "tekst", "Informacje": "tekst", "Koszt": "liczba",
+                "Czy_Oplacone": "bool", "Zaliczka": "liczba", "Czy_Zaliczka_Oplacona": "bool", KOLUMNA_ID: "tekst"},
+    "Zadania": {"Zadanie": "tekst", "Termin": "data", "Czy_Zrobione": "bool", KOLUMNA_ID: "tekst"},
+    "Stoly": {"Numer": "tekst", "Ksztalt": "kategoria", "Liczba_Miejsc": "calkowita", "Goscie_Lista": "tekst",
+              KOLUMNA_ID: "tekst"},
+    "Harmonogram": {"Godzina": "godzina", "Czynność": "tekst", "Uwagi": "tekst", KOLUMNA_ID: "tekst"},
+    "Ustawienia": {"Data_Slubu": "tekst"},
+    "Miejsca": {"Stol": "tekst", "Miejsce": "calkowita", "Gosc_ID": "tekst", KOLUMNA_ID: "tekst"},
+}
+
+KOLUMNY_ARKUSZY = {
+    "Goscie": KOLUMNY_GOSCIE + [KOLUMNA_ID],
+    "Obsluga": KOLUMNY_OBSLUGA + [KOLUMNA_ID],
+    "Zadania": KOLUMNY_ZADANIA + [KOLUMNA_ID],
+    "Stoly": KOLUMNY_STOLY + [KOLUMNA_ID],
+    "Harmonogram": KOLUMNY_HARMONOGRAM + [KOLUMNA_ID],
+    "Ustawienia": KOLUMNY_USTAWIENIA,
+    "Miejsca": KOLUMNY_MIEJSCA + [KOLUMNA_ID],
+}
+
+PRAWDA = ["tak", "true", "1", "yes"]
+
+
+# --- DEKODOWANIE: wartości z arkusza -> typy pandas (cała kolumna naraz) ---
+def _tekst(s):
+    return s.fillna("").astype(str)
+
+def _dekoduj_bool(s):
+    return _tekst(s).str.strip().str.lower().isin(PRAWDA)
+
+def _dekoduj_liczba(s):
+    return pd.to_numeric(s, errors='coerce').fillna(0.0).astype(float)
+
+def _dekoduj_calkowita(s):
+    return pd.to_numeric(s, errors='coerce').fillna(0).astype(int)
+
+def _dekoduj_kategoria(s):
+    return _tekst(s).astype("category")
+
+def _dekoduj_data(s):
+    daty = pd.to_datetime(s.where(s != ""), errors='coerce')
+    return daty.dt.date.astype(object).where(daty.notna(), "")
+
+def _dekoduj_godzina(s):
+    tekst = _tekst(s).str.strip()
+    czas = pd.to_datetime(tekst, format="%H:%M", errors='coerce')
+    czas = czas.fillna(pd.to_datetime(tekst, format="%H:%M:%S", errors='coerce'))
+    return czas.dt.strftime("%H:%M").where(czas.notna(), tekst).astype(str)
+
+DEKODERY = {
+    "tekst": _tekst,
+    "bool": _dekoduj_bool,
+    "liczba": _dekoduj_liczba,
+    "calkowita": _dekoduj_calkowita,
+    "kategoria": _dekoduj_kategoria,
+    "data": _dekoduj_data,
+    "godzina": _dekoduj_godzina,
+}
+
+
+# --- KODOWANIE: typy pandas -> wartości do arkusza ---
+def _koduj_bool(s):
+    return pd.Series(np.where(s.fillna(False).astype(bool), "Tak", "Nie"), index=s.index)
+
+def _koduj_data(s):
+    return pd.to_datetime(s.where(s != ""), errors='coerce').dt.strftime("%Y-%m-%d").fillna("")
+
+KODERY = {
+    "tekst": _tekst,
+    "bool": _koduj_bool,
+    "liczba": _dekoduj_liczba,
+    "calkowita": _dekoduj_calkowita,
+    "kategoria": _tekst,
+    "data": _koduj_data,
+    "godzina": _tekst,
+}
+
+
+def pusta_ramka(nazwa):
+    return dekoduj(nazwa, pd.DataFrame(columns=KOLUMNY_ARKUSZY[nazwa]))
+
+
+def dekoduj(nazwa, df):
+    # Brakujące kolumny dodajemy puste, nadmiarowe zostawiamy bez zmian.
+    # Funkcja jest idempotentna – można nią też ujednolicić wynik st.data_editor.
+    df = df.copy()
+    for kol, typ in TYPY_KOLUMN[nazwa].items():
+        if kol not in df.columns:
+            df[kol] = pd.Series("", index=df.index, dtype=object)
+        df[kol] = DEKODERY[typ](df[kol])
+    return df
+
+
+def koduj(nazwa, df):
+    df = df.copy()
+    for kol, typ in TYPY_KOLUMN[nazwa].items():
+        if kol in df.columns:
+            df[kol] = KODERY[typ](df[kol])
+    return df.fillna("")
+
+
+def nowe_id():
+    return uuid.uuid4().hex[:12]
+
+
+def nadaj_id(df):
+    # Rekordy bez ID (nowe wiersze z edytora lub formularza) dostają świeże identyfikatory
+    if KOLUMNA_ID not in df.columns:
+        df = df.assign(**{KOLUMNA_ID: ""})
+    brak = df[KOLUMNA_ID].fillna("").astype(str).str.strip() == ""
+    if not brak.any():
+        return df
+    df = df.copy()
+    df[KOLUMNA_ID] = df[KOLUMNA_ID].astype(object)
+    df.loc[brak, KOLUMNA_ID] = [nowe_id() for _ in range(int(brak.sum()))]
+    return df
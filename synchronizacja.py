@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from magazyn import ZmianyRekordow
+from schemat import KOLUMNA_ID, koduj
+
+
+# ==========================================================
+# SYNCHRONIZACJA RÓŻNICOWA (zamiast czyszczenia i zapisu całego arkusza)
+# ==========================================================
+# Edycje łączymy ze stanem sesji po etykietach indeksu DataFrame'u, a zmiany dla arkusza adresujemy po ID
+# rekordu – numer wiersza w arkuszu ustala dopiero magazyn (IndeksRekordow), w chwili zapisu.
+
+def scal_edycje(stan, pokazane, edytowane):
+    # stan      – pełne dane arkusza z sesji (również wiersze ukryte filtrem)
+    # pokazane  – to, co trafiło do st.data_editor (może być posortowane, przefiltrowane, bez części kolumn)
+    # edytowane – wynik st.data_editor
+    # Zwraca nowy stan: zachowane wiersze w dotychczasowej kolejności, nowe dopisane na końcu.
+    w_edytorze = edytowane.index.isin(pokazane.index)
+    usuniete = pokazane.index.difference(edytowane.index)
+    wspolne = edytowane.index[w_edytorze]
+
+    nowy = stan.drop(index=usuniete)
+    zmieniane = nowy.index.isin(wspolne)
+    for kol in edytowane.columns:
+        if kol in nowy.columns:
+            nowy[kol] = edytowane[kol].reindex(nowy.index).where(zmieniane, nowy[kol])
+
+    # Nowe wiersze dostają świeże etykiety, bo edytor mógł nadać im etykiety ukrytych wierszy
+    dopisane = edytowane[~w_edytorze].reindex(columns=stan.columns)
+    start = int(stan.index.max()) + 1 if len(stan.index) else 0
+    dopisane.index = pd.RangeIndex(start, start + len(dopisane))
+
+    if dopisane.empty:
+        return nowy.infer_objects()
+    return pd.concat([nowy, dopisane]).infer_objects()
+
+
+def scal_kolumne(nazwa, stan, edytowane, kolumna):
+    # Wartości jednej kolumny z edytora (z kolumną ID) nanosimy na stan sesji jednym mapowaniem po ID.
+    # Zwraca (nowy stan, ZmianyRekordow tylko ze zmienionymi komórkami tej kolumny).
+    wartosci = edytowane.drop_duplicates(KOLUMNA_ID).set_index(KOLUMNA_ID)[kolumna].fillna("")
+    nowe = stan[KOLUMNA_ID].map(wartosci)
+    zmienione = nowe.notna() & (nowe.astype(str) != stan[kolumna].fillna("").astype(str))
+    if not zmienione.any():
+        return stan, ZmianyRekordow()
+    nowy = stan.copy()
+    nowy.loc[zmienione, kolumna] = nowe[zmienione]
+    zakodowane = koduj(nazwa, nowy.loc[zmienione, [kolumna]])[kolumna]
+    zmiany = {i: {kolumna: _wartosc(v)} for i, v in zip(nowy.loc[zmienione, KOLUMNA_ID], zakodowane)}
+    return nowy, ZmianyRekordow(zmienione=zmiany)
+
+
+def oblicz_zmiany(stare, nowe):
+    # stare, nowe – dane w postaci arkusza (po zakodowaniu), z kolumną ID uzupełnioną w każdym wierszu.
+    # Wiersze łączymy po ID, komórki porównujemy wektorowo jako tekst.
+    stare = stare.set_index(KOLUMNA_ID, drop=False)
+    stare = stare[~stare.index.duplicated()]
+    nowe = nowe.set_index(KOLUMNA_ID, drop=False)
+    kolumny = [k for k in nowe.columns if k != KOLUMNA_ID]
+    zachowane = nowe.index[nowe.index.isin(stare.index)]
+
+    zmienione = {}
+    if len(zachowane):
+        a = stare.reindex(columns=kolumny).loc[zachowane].fillna("").astype(str).to_numpy()
+        b = nowe.loc[zachowane, kolumny].fillna("").astype(str).to_numpy()
+        wiersze, kol = np.nonzero(a != b)
+        wartosci = nowe.loc[zachowane, kolumny].to_numpy()
+        for w, k in zip(wiersze, kol):
+            zmienione.setdefault(zachowane[w], {})[kolumny[k]] = _wartosc(wartosci[w, k])
+
+    usuniete = stare.index[~stare.index.isin(nowe.index)].tolist()
+    dopisane = [
+        {k: _wartosc(v) for k, v in zip(nowe.columns, w)}
+        for w in nowe[~nowe.index.isin(stare.index)].to_numpy().tolist()
+    ]
+    return ZmianyRekordow(zmienione, usuniete, dopisane)
+
+
+def _wartosc(v):
+    # Typy numpy zamieniamy na zwykłe typy Pythona, puste wartości na ""
+    if isinstance(v, np.generic):
+        v = v.item()
+    if v is None or (pd.api.types.is_scalar(v) and pd.isna(v)):
+        return ""
+    return v
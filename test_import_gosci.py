@@ -0,0 +1,34 @@
+import io
+
+import pytest
+
+from import_gosci import importuj
+
+
+def zaimportuj(tekst):
+    paczki = []
+    imp = importuj(io.BytesIO(tekst.encode("utf-8")), "goscie.csv", [], paczki.append)
+    return imp, [imie for p in paczki for imie in p["Imie_Nazwisko"]]
+
+
+@pytest.mark.parametrize("tekst", [
+    "Imie_Nazwisko\nJan Kowalski\nAnna Nowak\n",
+    "Gość\nJan Kowalski\nAnna Nowak\n",
+    "Imię i nazwisko\nJan Kowalski\nAnna Nowak\n",
+])
+def test_plik_z_jedna_kolumna(tekst):
+    imp, imiona = zaimportuj(tekst)
+    assert imiona == ["Jan Kowalski", "Anna Nowak"]
+    assert imp.przyjete == 2
+
+
+@pytest.mark.parametrize("sep", [",", ";", "\t"])
+def test_separator(sep):
+    _, imiona = zaimportuj(f"Imię i nazwisko{sep}Dieta\nJan Kowalski{sep}wege\n")
+    assert imiona == ["Jan Kowalski"]
+
+
+@pytest.mark.parametrize("tekst", ["", " \n"])
+def test_pusty_plik(tekst):
+    with pytest.raises(ValueError):
+        zaimportuj(tekst)
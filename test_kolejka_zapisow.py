@@ -0,0 +1,88 @@
+from kolejka_zapisow import KolejkaZapisow, polacz_operacje
+from magazyn import IndeksRekordow, MagazynSQLite, MagazynZPamiecia, ZmianyRekordow
+
+GOSCIE = [["Imie", "ID"], ["A", "a"], ["B", "b"], ["C", "c"], ["D", "d"]]
+
+
+class Arkusz(MagazynSQLite):
+    # Magazyn w roli Google Sheets: zapisuje paczki, które do niego dotarły, i może odrzucić najbliższą
+    def __init__(self, sciezka):
+        super().__init__(sciezka)
+        self.paczki = []
+        self.odrzuc = False
+
+    def zastosuj_zmiany(self, nazwa, zmiany):
+        if self.odrzuc:
+            self.odrzuc = False
+            raise ValueError("odrzucone")
+        self.paczki.append(zmiany)
+        super().zastosuj_zmiany(nazwa, zmiany)
+
+
+def przygotuj(tmp_path, **opcje):
+    arkusz = Arkusz(str(tmp_path / "arkusz.db"))
+    arkusz.nadpisz("Goscie", GOSCIE)
+    kolejka = KolejkaZapisow(arkusz, str(tmp_path / "kolejka.db"), uruchom=False, **opcje)
+    zegar = [0.0]
+    pamiec = MagazynZPamiecia(kolejka, ttl=120, zegar=lambda: zegar[0])
+    kolejka.po_zapisie = kolejka.po_bledzie = pamiec.uniewaznij
+    pamiec.pobierz_wartosci("Goscie")
+    return arkusz, kolejka, pamiec, zegar
+
+
+def test_indeks_zamienia_id_na_wiersze_i_pomija_nieznane():
+    zmienione = {"c": {"Imie": "C2", "Brak": 1}, "x": {"Imie": "X"}}
+    zmiany = IndeksRekordow(GOSCIE).zmiany(ZmianyRekordow(zmienione=zmienione, usuniete=["b", "x"]))
+    assert zmiany.komorki == [(4, 1, "C2")]
+    assert zmiany.usuniete == [3]
+
+
+def test_kolejne_usuniecia_ida_jedna_paczka(tmp_path):
+    arkusz, kolejka, pamiec, _ = przygotuj(tmp_path)
+    pamiec.usun_rekord("Goscie", "a")
+    pamiec.usun_rekord("Goscie", "c")
+    assert len(polacz_operacje(kolejka._oczekujace())) == 1
+
+    kolejka.wyslij_oczekujace()
+    assert len(arkusz.paczki) == 1
+    assert arkusz.pobierz_wartosci("Goscie") == [["Imie", "ID"], ["B", "b"], ["D", "d"]]
+
+
+def test_usuniecie_po_dopisaniu(tmp_path):
+    arkusz, kolejka, pamiec, _ = przygotuj(tmp_path)
+    pamiec.zapisz_rekordy("Goscie", ZmianyRekordow(dopisane=[{"Imie": "E", "ID": "e"}, {"Imie": "F", "ID": "f"}]))
+    pamiec.usun_rekord("Goscie", "e")
+    pamiec.usun_rekord("Goscie", "b")
+    assert len(polacz_operacje(kolejka._oczekujace())) == 1
+
+    kolejka.wyslij_oczekujace()
+    oczekiwane = [["Imie", "ID"], ["A", "a"], ["C", "c"], ["D", "d"], ["F", "f"]]
+    assert arkusz.pobierz_wartosci("Goscie") == oczekiwane
+    assert pamiec.pobierz_wartosci("Goscie") == oczekiwane
+
+
+def test_zmiana_po_usunieciu_nie_trafia_w_inny_wiersz(tmp_path):
+    # Usunięcie czeka w kolejce (brak sieci), pamięć wygasa i jest pobierana od nowa, potem zmiana dalszego wiersza
+    arkusz, kolejka, pamiec, zegar = przygotuj(tmp_path)
+    pamiec.usun_rekord("Goscie", "a")
+    zegar[0] += 200
+    assert pamiec.pobierz_wartosci("Goscie")[1] == ["B", "b"]
+    pamiec.aktualizuj_rekord("Goscie", "c", {"Imie": "C2"})
+
+    kolejka.wyslij_oczekujace()
+    assert arkusz.pobierz_wartosci("Goscie") == [["Imie", "ID"], ["B", "b"], ["C2", "c"], ["D", "d"]]
+
+
+def test_odrzucona_operacja_odklada_zalezne(tmp_path):
+    arkusz, kolejka, pamiec, _ = przygotuj(tmp_path, maks_prob=1)
+    arkusz.odrzuc = True
+    pamiec.usun_wiersz("Goscie", 2)                           # odrzucona
+    pamiec.aktualizuj_komorke("Goscie", 2, 1, "B2")           # numer wiersza zakładał usunięcie – odłożona
+    pamiec.aktualizuj_rekord("Goscie", "c", {"Imie": "C2"})   # po ID – wysłana
+
+    kolejka.wyslij_oczekujace()
+    oczekiwane = [["Imie", "ID"], ["A", "a"], ["B", "b"], ["C2", "c"], ["D", "d"]]
+    assert arkusz.pobierz_wartosci("Goscie") == oczekiwane
+    assert kolejka.nieudane() == 2
+    assert kolejka.blad_trwaly == "Goscie: odrzucone"
+    assert pamiec.pobierz_wartosci("Goscie") == oczekiwane
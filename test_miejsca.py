@@ -0,0 +1,35 @@
+import pandas as pd
+
+from miejsca import PlanMiejsc, miejsca_z_imion, uklad_po_zmianie
+from schemat import pusta_ramka
+
+GOSCIE = pd.DataFrame({
+    "Imie_Nazwisko": ["Jan Zięba", "Jan Zięba", "Ola"],
+    "RSVP": [True, True, True],
+    "ID": ["j1", "j2", "o"],
+})
+
+
+def test_goscie_o_tym_samym_imieniu_siedza_osobno():
+    plan = PlanMiejsc(pusta_ramka("Miejsca"), GOSCIE)
+    ids, nieznane = plan.id_z_pol("A", ["Jan Zięba", "jan  zięba", "Obcy"])
+    assert ids == ["j1", "j2", ""]
+    assert nieznane == ["Obcy"]
+
+    plan = PlanMiejsc(uklad_po_zmianie(pusta_ramka("Miejsca"), plan, "A", ids), GOSCIE)
+    assert plan.duplikaty() == []
+    assert plan.nieposadzeni() == ["Ola"]
+
+
+def test_zmiana_imienia_nie_zwalnia_miejsca():
+    df = pd.DataFrame({"Stol": ["A"], "Miejsce": [1], "Gosc_ID": ["j2"], "ID": ["m"]})
+    goscie = GOSCIE.assign(Imie_Nazwisko=["Jan Zięba", "Jan Nowak", "Ola"])
+    assert PlanMiejsc(df, goscie).przy_stole("A", 2) == ["Jan Nowak", ""]
+
+
+def test_migracja_imion_na_id():
+    df = pd.DataFrame({"Stol": ["A", "A", "A"], "Miejsce": [1, 2, 3], "Gosc": ["Jan Zięba", "Jan Zięba", "Obcy"],
+                       "Gosc_ID": ["", "", ""], "ID": ["m1", "m2", "m3"]})
+    df = miejsca_z_imion(df, GOSCIE)
+    assert df["Gosc_ID"].tolist() == ["j1", "j2"]
+    assert "Gosc" not in df.columns
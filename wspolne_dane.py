@@ -0,0 +1,40 @@
+import threading
+
+import pandas as pd
+
+from magazyn import wartosci_na_rekordy
+from schemat import dekoduj
+
+
+# ==========================================================
+# WSPÓLNE RAMKI DANYCH (jedna kopia każdej zakładki na proces)
+# ==========================================================
+# Ramkę zakładki budujemy (rekordy + dekodowanie typów) raz dla danych wartości z pamięci magazynu
+# i oddajemy ten sam obiekt każdej sesji. Nowa ramka powstaje dopiero wtedy, gdy magazyn zwróci inne
+# wartości – po zapisie z dowolnej sesji albo po wygaśnięciu pamięci. Ramek nie zmieniamy w miejscu:
+# kod aplikacji zawsze pracuje na kopii i podmienia ramkę w sesji.
+def zbuduj_ramke(nazwa, wartosci):
+    return dekoduj(nazwa, pd.DataFrame(wartosci_na_rekordy(wartosci)))
+
+
+class WspolneRamki:
+    def __init__(self, magazyn):
+        self.magazyn = magazyn
+        self.ramki = {}
+        self.blokada = threading.Lock()
+
+    def wersja(self, nazwa):
+        return self.magazyn.wersja(nazwa)
+
+    def pobierz(self, nazwa):
+        # Zwraca (wersja, ramka). Wersję czytamy przed danymi: jeśli w międzyczasie
+        # ktoś zapisze zakładkę, sesja zobaczy starszą wersję i przy następnym przebiegu wczyta ją ponownie.
+        wersja = self.magazyn.wersja(nazwa)
+        wartosci = self.magazyn.pobierz_wartosci(nazwa)
+        with self.blokada:
+            wpis = self.ramki.get(nazwa)
+        if wpis is None or wpis[0] is not wartosci:
+            wpis = (wartosci, zbuduj_ramke(nazwa, wartosci))
+            with self.blokada:
+                self.ramki[nazwa] = wpis
+        return wersja, wpis[1]
@@ -0,0 +1,197 @@
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.collections import EllipseCollection, PolyCollection
+from matplotlib.patches import Circle, Rectangle
+
+from profil import mierzone
+
+KOLOR_STOLU = '#9D5B03'
+KOLOR_MIEJSCA = '#1B4D3E'
+KOLOR_TEKSTU = 'white'
+KOLOR_KRAWEDZI = '#7B3F00'
+
+# Wymiary stołów (w jednostkach osi)
+R_STOL = 1.1; R_KRZESLO_SRODEK = 1.4; R_TEKST = 1.65
+W_STOL = 2.0; H_STOL = 4.0; DIST_X = 1.3
+R_KRZESLA = 0.21
+
+
+# ==========================================================
+# WSPÓŁRZĘDNE MIEJSC (jedno wektorowe przejście dla całego stołu)
+# ==========================================================
+def wspolrzedne_miejsc(ksztalt, liczba_miejsc):
+    # Zwraca tablice: środki krzeseł (x, y), punkty zaczepienia napisów (tx, ty), obrót napisów
+    # w stopniach i wyrównanie ("left"/"right") – po jednym elemencie na miejsce.
+    i = np.arange(liczba_miejsc)
+    if ksztalt == "Okrągły":
+        kat = 2 * np.pi * i / max(liczba_miejsc, 1)
+        x, y = R_KRZESLO_SRODEK * np.cos(kat), R_KRZESLO_SRODEK * np.sin(kat)
+        tx, ty = R_TEKST * np.cos(kat), R_TEKST * np.sin(kat)
+        obrot = np.degrees(kat)
+        na_lewo = (obrot > 90) & (obrot < 270)
+        obrot = np.where(na_lewo, obrot + 180, obrot)
+    else:
+        bok = (liczba_miejsc + 1) // 2
+        lewy = i < bok
+        # Pozycja w obrębie boku i jego długość: lewy bok ma `bok` miejsc, prawy resztę
+        k = np.where(lewy, i, i - bok)
+        n = np.where(lewy, bok, liczba_miejsc - bok)
+        poczatek, koniec = -H_STOL / 2 + 0.4, H_STOL / 2 - 0.4
+        krok = np.where(n > 1, (koniec - poczatek) / np.maximum(n - 1, 1), 0.0)
+        y = np.where(n > 1, poczatek + k * krok, poczatek)
+        x = np.where(lewy, -DIST_X, DIST_X)
+        tx, ty = x + np.where(lewy, -0.25, 0.25), y
+        obrot = np.zeros(liczba_miejsc)
+        na_lewo = lewy
+    wyrownanie = np.where(na_lewo, "right", "left")
+    return x, y, tx, ty, obrot, wyrownanie
+
+
+# ==========================================================
+# PODGLĄD JEDNEGO STOŁU (PNG, z pamięcią podręczną)
+# ==========================================================
+# Figury tworzymy przez matplotlib.figure.Figure – nie trafiają do globalnego stanu pyplot,
+# więc po zapisaniu do PNG są po prostu zwalniane. Gotowe obrazy trzymamy w pamięci LRU,
+# wspólnej dla wszystkich sesji: ponowne wyświetlenie niezmienionego stołu to jedno wyszukanie w słowniku.
+# Pamięć ograniczamy łącznym rozmiarem PNG (jak w pamiec_eksportow.py) – plan sali w 300 dpi waży tyle,
+# co setki podglądów, więc sam limit liczby obrazów nie wystarcza.
+MAKS_BAJTOW_OBRAZOW = 32 * 1024 * 1024
+_obrazy = OrderedDict()
+_rozmiar = 0
+_blokada = threading.Lock()
+
+
+def _z_pamieci(klucz, rysuj):
+    global _rozmiar
+    with _blokada:
+        if klucz in _obrazy:
+            _obrazy.move_to_end(klucz)
+            return _obrazy[klucz]
+    png = rysuj()
+    if len(png) > MAKS_BAJTOW_OBRAZOW:
+        return png
+    with _blokada:
+        if klucz not in _obrazy:
+            _obrazy[klucz] = png
+            _rozmiar += len(png)
+        _obrazy.move_to_end(klucz)
+        while _rozmiar > MAKS_BAJTOW_OBRAZOW:
+            _, stary = _obrazy.popitem(last=False)
+            _rozmiar -= len(stary)
+    return png
+
+
+def _do_png(fig, dpi=100):
+    bufor = io.BytesIO()
+    fig.savefig(bufor, format="png", dpi=dpi, bbox_inches="tight", transparent=True)
+    return bufor.getvalue()
+
+
+@mierzone("matplotlib: obraz_stolu")
+def obraz_stolu(numer, ksztalt, goscie):
+    # goscie – imiona dla kolejnych miejsc ("" = wolne miejsce)
+    klucz = ("stol", str(numer), str(ksztalt), tuple(str(g) for g in goscie))
+    return _z_pamieci(klucz, lambda: _rysuj_stol(str(numer), str(ksztalt), list(klucz[3])))
+
+
+@mierzone("matplotlib: rysowanie stołu")
+def _rysuj_stol(numer, ksztalt, goscie):
+    liczba_miejsc = len(goscie)
+    fig = Figure(figsize=(20, 16))
+    ax = fig.subplots()
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    if ksztalt == "Okrągły":
+        ax.add_patch(Circle((0, 0), R_STOL, color=KOLOR_STOLU, ec=KOLOR_KRAWEDZI, lw=4))
+        ax.text(0, 0, numer, ha='center', va='center', fontsize=24, fontweight='bold', color='white')
+        granica = 2.2
+    else:
+        ax.add_patch(Rectangle((-W_STOL / 2, -H_STOL / 2), W_STOL, H_STOL, color=KOLOR_STOLU, ec=KOLOR_KRAWEDZI, lw=4))
+        ax.text(0, 0, numer, ha='center', va='center', rotation=90, fontsize=24, fontweight='bold', color='white')
+        granica = 2.8
+
+    x, y, tx, ty, obrot, wyrownanie = wspolrzedne_miejsc(ksztalt, liczba_miejsc)
+    for i, gosc in enumerate(goscie):
+        ax.add_patch(Circle((x[i], y[i]), R_KRZESLA, color=KOLOR_MIEJSCA))
+        if gosc:
+            ax.text(tx[i], ty[i], gosc, ha=wyrownanie[i], va='center', rotation=obrot[i], rotation_mode='anchor',
+                    fontsize=16, color=KOLOR_TEKSTU, fontweight='bold')
+        else:
+            ax.text(x[i], y[i], str(i + 1), ha='center', va='center', fontsize=16, color='white')
+    ax.set_xlim(-granica, granica); ax.set_ylim(-granica, granica)
+    return _do_png(fig)
+
+
+# ==========================================================
+# PLAN CAŁEJ SALI (wszystkie stoły na jednym obrazie)
+# ==========================================================
+# Stoły układamy w siatce. Wszystkie stoły okrągłe to jedna kolekcja elips, prostokątne – jedna kolekcja
+# wielokątów, a wszystkie krzesła – jedna kolekcja elips (zajęte i wolne różnią się kolorem).
+# Imiona gości każdego stołu są jednym blokiem tekstu obok stołu ("nr miejsca. imię"), bo przy
+# kilkuset osobnych napisach to właśnie składanie tekstu, a nie figury, zajmuje najwięcej czasu.
+KOMORKA_X = 10.0        # odstęp między środkami stołów w poziomie (stół + lista gości)
+KOMORKA_Y = 7.0
+KOLOR_TLA_SALI = '#0E1117'
+KOLOR_WOLNEGO = '#555555'
+
+
+@mierzone("matplotlib: obraz_sali")
+def obraz_sali(stoly, dpi=100):
+    # stoly – [(numer, kształt, [goście kolejnych miejsc]), ...]
+    klucz = ("sala", dpi, tuple((str(n), str(k), tuple(str(g) for g in goscie)) for n, k, goscie in stoly))
+    return _z_pamieci(klucz, lambda: _rysuj_sale(klucz[2], dpi))
+
+
+@mierzone("matplotlib: rysowanie sali")
+def _rysuj_sale(stoly, dpi):
+    liczba = max(len(stoly), 1)
+    kolumny = int(np.ceil(np.sqrt(liczba * KOMORKA_Y / KOMORKA_X)))
+    wiersze = int(np.ceil(liczba / kolumny))
+    fig = Figure(figsize=(kolumny * 3.2, wiersze * 2.24), facecolor=KOLOR_TLA_SALI)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_facecolor(KOLOR_TLA_SALI)
+    ax.axis('off')
+
+    nr = np.arange(len(stoly))
+    sx, sy = (nr % kolumny) * KOMORKA_X, -(nr // kolumny) * KOMORKA_Y
+    okragle = np.array([k == "Okrągły" for _, k, _ in stoly], dtype=bool)
+
+    ax.add_collection(EllipseCollection(
+        2 * R_STOL, 2 * R_STOL, 0, units='xy', offsets=np.column_stack([sx[okragle], sy[okragle]]),
+        offset_transform=ax.transData, facecolors=KOLOR_STOLU, edgecolors=KOLOR_KRAWEDZI, linewidths=2,
+    ))
+    prostokat = np.array([[-W_STOL / 2, -H_STOL / 2], [W_STOL / 2, -H_STOL / 2], [W_STOL / 2, H_STOL / 2], [-W_STOL / 2, H_STOL / 2]])
+    ax.add_collection(PolyCollection(
+        [prostokat + (x, y) for x, y in zip(sx[~okragle], sy[~okragle])],
+        facecolors=KOLOR_STOLU, edgecolors=KOLOR_KRAWEDZI, linewidths=2,
+    ))
+
+    krzesla_x, krzesla_y, zajete = [], [], []
+    for (numer, ksztalt, goscie), x0, y0 in zip(stoly, sx, sy):
+        x, y, _, _, _, _ = wspolrzedne_miejsc(ksztalt, len(goscie))
+        krzesla_x.append(x + x0)
+        krzesla_y.append(y + y0)
+        zajete.append(np.array([bool(g) for g in goscie], dtype=bool))
+        ax.text(x0, y0, numer, ha='center', va='center', rotation=0 if ksztalt == "Okrągły" else 90,
+                fontsize=9, fontweight='bold', color='white')
+        lista = "\n".join(f"{i}. {g}" for i, g in enumerate(goscie, start=1) if g)
+        if lista:
+            ax.text(x0 + 2.4, y0, lista, ha='left', va='center', fontsize=6, color=KOLOR_TEKSTU, linespacing=1.3)
+    if krzesla_x:
+        zajete = np.concatenate(zajete)
+        ax.add_collection(EllipseCollection(
+            2 * R_KRZESLA, 2 * R_KRZESLA, 0, units='xy',
+            offsets=np.column_stack([np.concatenate(krzesla_x), np.concatenate(krzesla_y)]),
+            offset_transform=ax.transData, facecolors=np.where(zajete, KOLOR_MIEJSCA, KOLOR_WOLNEGO),
+        ))
+
+    ax.set_xlim(-KOMORKA_X * 0.3, (kolumny - 0.3) * KOMORKA_X)
+    ax.set_ylim(-(wiersze - 0.5) * KOMORKA_Y, KOMORKA_Y * 0.5)
+    bufor = io.BytesIO()
+    fig.savefig(bufor, format="png", dpi=dpi, facecolor=KOLOR_TLA_SALI)
+    return bufor.getvalue()
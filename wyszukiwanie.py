@@ -0,0 +1,117 @@
+import threading
+import unicodedata
+
+import numpy as np
+
+# Litery, których NFD nie rozkłada na literę + znak diakrytyczny
+ZAMIANY = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ß": "ss", "æ": "ae", "œ": "oe"})
+
+
+def zloz_tekst(tekst):
+    # "Łukasz  Żółć" -> "lukasz zolc": małe litery, bez znaków diakrytycznych i nadmiarowych spacji
+    tekst = unicodedata.normalize("NFD", str(tekst).casefold().translate(ZAMIANY))
+    return " ".join("".join(c for c in tekst if unicodedata.category(c) != "Mn").split())
+
+
+def trigramy(tekst, prefiks=False):
+    # Trigramy każdego słowa z dopełnieniem spacjami; przy prefiks=True ostatnie słowo traktujemy jako
+    # niedokończone (bez dopełnienia na końcu), żeby podpowiedzi działały już w trakcie pisania
+    wynik = []
+    slowa = tekst.split()
+    for i, slowo in enumerate(slowa):
+        slowo = "  " + slowo + ("" if prefiks and i == len(slowa) - 1 else " ")
+        wynik.extend(slowo[j:j + 3] for j in range(len(slowo) - 2))
+    return wynik
+
+
+# ==========================================================
+# INDEKS WYSZUKIWANIA GOŚCI (trigramy, bez polskich znaków)
+# ==========================================================
+# Każde nazwisko dostaje numer; dla każdego trigramu trzymamy listę numerów nazwisk, które go zawierają.
+# Zapytanie to zliczenie wspólnych trigramów (np.bincount na połączonych listach) i podobieństwo Jaccarda;
+# nazwiska zawierające zapytanie w całości idą na początek. Dodawanie i usuwanie jest przyrostowe:
+# zmienia tylko listy trigramów danego nazwiska, tablice NumPy odtwarzamy leniwie przy następnym zapytaniu.
+class IndeksNazwisk:
+    def __init__(self):
+        self.blokada = threading.RLock()
+        self.nazwy = []             # numer -> oryginalna nazwa
+        self.zlozone = []           # numer -> nazwa po zloz_tekst
+        self.klucze = []            # numer -> klucz rekordu (np. ID gościa)
+        self.numery = {}            # klucz -> numer
+        self.listy = {}             # trigram -> [numery]
+        self.tablice = {}           # trigram -> np.array(numery), odtwarzane leniwie
+        self.liczby = np.zeros(0)   # numer -> liczba trigramów nazwy (0 = usunięta)
+        self.zrodlo = None          # ostatnio zsynchronizowana ramka
+
+    def __len__(self):
+        return len(self.numery)
+
+    def dodaj(self, klucz, nazwa):
+        with self.blokada:
+            self._usun(klucz)
+            numer = len(self.nazwy)
+            zlozona = zloz_tekst(nazwa)
+            tri = set(trigramy(zlozona))
+            self.nazwy.append(str(nazwa))
+            self.zlozone.append(zlozona)
+            self.klucze.append(klucz)
+            self.numery[klucz] = numer
+            for t in tri:
+                self.listy.setdefault(t, []).append(numer)
+                self.tablice.pop(t, None)
+            if numer >= len(self.liczby):
+                self.liczby = np.concatenate([self.liczby, np.zeros(max(64, len(self.liczby)))])
+            self.liczby[numer] = len(tri)
+
+    def usun(self, klucz):
+        with self.blokada:
+            self._usun(klucz)
+
+    def _usun(self, klucz):
+        # Numer zostaje w listach trigramów, ale z liczbą trigramów 0 nie trafi do wyników
+        numer = self.numery.pop(klucz, None)
+        if numer is not None:
+            self.liczby[numer] = 0
+
+    def zsynchronizuj(self, klucze, nazwy, zrodlo=None):
+        # Doprowadza indeks do podanej listy (klucz, nazwa): dodaje nowe i zmienione, usuwa brakujące
+        with self.blokada:
+            if zrodlo is not None and zrodlo is self.zrodlo:
+                return
+            obecne = dict(zip(klucze, nazwy))
+            for klucz in [k for k in self.numery if k not in obecne]:
+                self._usun(klucz)
+            for klucz, nazwa in obecne.items():
+                numer = self.numery.get(klucz)
+                if numer is None or self.nazwy[numer] != str(nazwa):
+                    self.dodaj(klucz, nazwa)
+            self.zrodlo = zrodlo
+
+    def szukaj(self, zapytanie, limit=10):
+        # Zwraca [(klucz, nazwa), ...] od najlepiej pasujących
+        zlozone = zloz_tekst(zapytanie)
+        tri = set(trigramy(zlozone, prefiks=True))
+        if not tri:
+            return []
+        with self.blokada:
+            tablice = [self._tablica(t) for t in tri if t in self.listy]
+            if not tablice:
+                return []
+            wspolne = np.bincount(np.concatenate(tablice), minlength=len(self.nazwy))
+            liczby = self.liczby[:len(self.nazwy)]
+            wynik = np.where(liczby > 0, wspolne / np.maximum(liczby + len(tri) - wspolne, 1), 0.0)
+            kandydaci = np.flatnonzero(wynik > 0)
+            if len(kandydaci) > limit * 4:
+                kandydaci = kandydaci[np.argpartition(-wynik[kandydaci], limit * 4)[:limit * 4]]
+            ranking = sorted(
+                kandydaci.tolist(),
+                key=lambda n: (zlozone not in self.zlozone[n], -wynik[n], self.zlozone[n]),
+            )
+            return [(self.klucze[n], self.nazwy[n]) for n in ranking[:limit]]
+
+    def _tablica(self, trigram):
+        tablica = self.tablice.get(trigram)
+        if tablica is None:
+            tablica = np.array(self.listy[trigram], dtype=np.int64)
+            self.tablice[trigram] = tablica
+        return tablica